@@ -2,4 +2,4 @@
 """
 This is the root of all evil - just kidding - this file contains references on all child modules of this package.
 """
-__all__ = ["buildModel", "classify", "config", "database"]
+__all__ = ["buildModel", "classify", "config", "database", "worker"]
@@ -2,4 +2,5 @@
 """
 This file marks the buildModel package as Module.
 """
-__all__ = ["buildModel"]
+__all__ = ["buildModel", "candidates", "featureCache", "featureEngine", "imputation", "instrumentation", "pipeline",
+           "registry"]
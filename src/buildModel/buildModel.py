@@ -6,27 +6,41 @@ from pathlib import Path
 
 from sklearn.exceptions import ConvergenceWarning
 
-sys.path.append(str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import copy
 import json
 import os
+import tempfile
+import warnings
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 
-from typing import Union
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Union
 
 import numpy as np
 import pandas
-import tsfresh
 from pandas import DataFrame, Series
-from sklearn.dummy import DummyClassifier
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.impute import SimpleImputer
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.neural_network import MLPClassifier
-from sklearn.preprocessing import Normalizer, MinMaxScaler, QuantileTransformer, RobustScaler, StandardScaler
-from sklearn.svm import SVC
-from tsfresh.feature_extraction import ComprehensiveFCParameters
-
+from sklearn.base import clone
+
+from buildModel import featureEngine
+from buildModel.candidates import train_candidates
+from buildModel.featureCache import FeatureCache
+from buildModel.instrumentation import Instrumentation
+from buildModel.pipeline import InferencePipeline
+from buildModel.registry import CLASSIFIERS, IMPUTATORS, SCALERS, SELECTORS
 from database.database import Database
+from database.decoding import smallest_int_dtype
+from database.snapshotStore import SnapshotStore
+
+if TYPE_CHECKING:
+    # Scalers, classifiers and tsfresh are imported on demand only, see registry.py and compute_features.
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.impute import SimpleImputer
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.neural_network import MLPClassifier
+    from sklearn.preprocessing import Normalizer, MinMaxScaler, QuantileTransformer, RobustScaler, StandardScaler
+    from sklearn.svm import SVC
 
 
 class IllegalArgumentError(OSError):
@@ -69,19 +83,63 @@ def fetch_parameters() -> dict:
 
         "slidingWindowSize": 128,
 
-        "slidingWindowStep": 64
+        "slidingWindowStep": 64,
+
+        "featureEngine": "NUMPY",
+
+        "compact": false,
+
+        "resample": "LINEAR",
+
+        "resampleInterval": 20,
+
+        "featureSelection": "RELEVANCE",
+
+        "selectedFeatures": 40
     }
 
     The numbers in 'datasets' are just the ids of the datasets to use in the model.
 
     The strings in 'features', 'scaler' and 'classifier' are just the constants of the corresponding enums as strings.
 
-    The last three values are optional.
+    'imputator' is one of "MEAN", "FORWARD_FILL" and "LINEAR", see imputation.py.
+
+    All the values after 'projectID' are optional.
 
     'trainingDataPercentage' must be in range (0;1).
 
     'slidingWindowSize' and 'slidingWindowStep' must be larger than 0 and integer numbers.
 
+    'featureEngine' is either "NUMPY" (default) or "TSFRESH" and selects how features are extracted.
+
+    'compact' set to true keeps sensor data and features in float32 and labels in the smallest integer type all the
+    way through, which roughly halves the memory needed.
+
+    'resample' puts the channels of every data set onto a grid of equally spaced relative times, either by interpolating
+    ("LINEAR") or by taking the last sample before ("ASOF"), instead of onto the union of the times of all sensors.
+    'resampleInterval' is the spacing of the grid; if not passed, it is inferred from the fastest sensor of each data
+    set. This way a window of 'slidingWindowSize' rows always covers the same time span. Models built on resampled
+    data need to classify resampled data, too.
+
+    'featureSelection' selects the feature columns to keep on the training data, before scaling and training:
+    "VARIANCE", "RELEVANCE" or "IMPORTANCE", see choose_selector. 'selectedFeatures' caps the number kept,
+    'selectionThreshold' overrides the threshold of the method. The model stores the names of the columns kept as its
+    features, so classifying computes these columns only. Incremental builds and candidates do not select features.
+
+    'incremental' set to true trains data set by data set via partial_fit, so the features of the whole project are
+    never held in memory at once. This requires a scaler and a classifier supporting partial_fit, e.g.
+    "STANDARD_SCALER" or "MIN_MAX" and "SGD", "MLP" or "NAIVE_BAYES"; otherwise the model is trained as usual. 'epochs'
+    tells how often the training data is passed to the classifier, it defaults to 1. See train_incremental.
+
+    To update a stored model with data sets added to its project instead of building a new one, pass its id in
+    'baseClassifier' and only the new data sets in 'dataSets'. The window parameters have to be the ones the model has
+    been built with, its features, scaler, label table and sensors are kept. 'addedEstimators' tells how many trees a
+    forest gets for the new data, it defaults to 10. See update.
+
+    To train and compare several models at once instead of a single one, pass a list of candidates like
+    [{"classifier": "<Classifier>", "scaler": "<Scaler>"}, <...>] in 'candidates'. 'scaler' and 'classifier' are then
+    ignored. The best candidate is stored, or all of them, if 'storeAll' is true. See build_candidates.
+
     The file must of course be correct json format.
 
     If there is more information in the json file, this is no problem.
@@ -99,6 +157,17 @@ def fetch_parameters() -> dict:
         data: dict = json.load(file)
         file.close()
     os.remove(file_path)
+    return check_parameters(data)
+
+
+def check_parameters(data: dict) -> dict:
+    """
+    This method checks the execution parameters as described in fetch_parameters and fills in the defaults of the
+    optional ones that 'build' relies on.
+
+    :param data: The execution parameters as loaded from json.
+    :return: The very same dict.
+    """
     if "dataSets" not in data or "projectID" not in data:
         raise IndexError()
     if "features" not in data:
@@ -141,16 +210,7 @@ def choose_scaler(name: str):
     :param name: The name of the scaler type as of Preprocessing enum in TypeScript
     :return: A Scaler object matching the type of the passed type name
     """
-    options = {
-        'MIN_MAX': MinMaxScaler(),
-        'NORMALIZER': Normalizer(),
-        'QUANTILE_TRANSFORMER': QuantileTransformer(),
-        'ROBUST_SCALER': RobustScaler(),
-        'STANDARD_SCALER': StandardScaler()
-    }
-    if name in options:
-        return options[name]
-    return StandardScaler()
+    return SCALERS.create(name)
 
 
 def choose_classifier(name: str):
@@ -160,15 +220,36 @@ def choose_classifier(name: str):
     :param name: The name of the classifier type as of Classifier enum in TypeScript
     :return: A Classifier object matching the type of the passed type name (more or less). MLP creates no ponies.
     """
-    options = {
-        'MLP': MLPClassifier(),
-        'RANDOM_FOREST': RandomForestClassifier(),
-        'K_NEIGHBORS': KNeighborsClassifier(),
-        'SVM': SVC()
-    }
-    if name in options:
-        return options[name]
-    return DummyClassifier()
+    return CLASSIFIERS.create(name)
+
+
+def choose_selector(name: str, count: Optional[int] = None, threshold: Optional[float] = None):
+    """
+    This method acts as a switch over the feature selection methods and creates a selector from
+    sklearn.feature_selection out of a method name:
+
+    VARIANCE drops features whose variance does not exceed threshold (default 0), i.e. constant ones. RELEVANCE keeps
+    the count features most relevant for the labels by the ANOVA F-test or, without count, all features whose p-value
+    is below threshold (default 0.05). IMPORTANCE keeps the count features a random forest finds most important or,
+    without count, the ones more important than the mean.
+
+    :param name: The name of the selection method.
+    :param count: How many features to keep at most. Not used by VARIANCE.
+    :param threshold: The threshold of the method as described above. Not used by IMPORTANCE.
+    :return: An unfitted selector.
+    """
+    if name == "RELEVANCE":
+        from sklearn.feature_selection import f_classif
+        if count is None:
+            return SELECTORS.create(name, score_func=f_classif, mode="fpr",
+                                    param=0.05 if threshold is None else threshold)
+        return SELECTORS.create(name, score_func=f_classif, mode="k_best", param=count)
+    if name == "IMPORTANCE":
+        forest = CLASSIFIERS.create("RANDOM_FOREST", n_estimators=50, random_state=0)
+        if count is None:
+            return SELECTORS.create(name, estimator=forest)
+        return SELECTORS.create(name, estimator=forest, max_features=count, threshold=-np.inf)
+    return SELECTORS.create(name, threshold=0.0 if threshold is None else threshold)
 
 
 def choose_imputator(name: str) -> tuple:
@@ -177,40 +258,64 @@ def choose_imputator(name: str) -> tuple:
     because of this it is fine. Ok. To the method:
 
     This method acts as a switch over the Imputation enum type from the TypeScript front end and creates out of a
-    constant of this enum an imputator object from sklearn and returns it.
+    constant of this enum an imputator object and returns it. MEAN, FORWARD_FILL and LINEAR are the ones of the
+    imputation engine, see imputation.py, anything else gets an imputator from sklearn.
 
     :param name: The name of the imputator type as of Imputation enum in TypeScript
-    :return: Two imputator objects from sklearn.impute corresponding to the passed name. There are two as we need two.
-             Believe me.
+    :return: Two imputator objects corresponding to the passed name. There are two as we need two. Believe me.
+             The first one is for the data sets, the second one for the features. The features of consecutive windows
+             are no time series, so FORWARD_FILL and LINEAR leave them to MEAN.
     """
-    options = {
-        "MEAN": SimpleImputer()
-    }
-    if name in options:
-        return options[name], options[name]
-    return SimpleImputer(), SimpleImputer()
+    if name in IMPUTATORS.components:
+        imputator = IMPUTATORS.create(name)
+        if getattr(imputator, "time_series", False):
+            return imputator, IMPUTATORS.create("MEAN")
+        return imputator, imputator
+    return IMPUTATORS.create(name), IMPUTATORS.create(name)
 
 
-def impute(data: DataFrame, imputator: Union[SimpleImputer]) -> DataFrame:
+def impute(data: DataFrame, imputator: "Union[SimpleImputer]") -> DataFrame:
     """
     Executes Imputation over a data frame
 
+    Imputators of the imputation engine work in place on the values of the data frame, which therefore is changed and
+    returned itself. Only if its values are not held by one writeable float array, they are imputed on a copy.
+
     :param data: The data frame object on which imputation is to be performed
     :param imputator: an object doing this as one does it with sklearn.impute imputers.
-    :return: the same data frame just with imputed values.
+    :return: the same data frame just with imputed values. The types of the columns are kept as far as the imputator
+             does, so float32 data stays float32 with sklearn.impute imputers.
     """
-    data = data.replace([np.inf, -np.inf], np.NaN)
+    if hasattr(imputator, "impute_in_place"):
+        values = data.to_numpy()
+        if not np.issubdtype(values.dtype, np.floating):
+            # There are no gaps in integers.
+            return data
+        # Frames of a single float type hand out a view on their values, anything else a copy.
+        shared = values.flags.writeable and data.shape[1] > 0 and np.may_share_memory(values,
+                                                                                       data.iloc[:, 0].to_numpy())
+        if not values.flags.writeable:
+            values = values.copy()
+        times = data.index.to_numpy() if imputator.time_series else None
+        if imputator.impute_in_place(values, times) == 0 or shared:
+            return data
+        return DataFrame(values, columns=data.columns, index=data.index)
+    if np.isinf(data.to_numpy()).any():
+        data = data.replace([np.inf, -np.inf], np.NaN)
     if data.isna().values.any():
-        for x in data.columns:
-            if data[x].isna().values.all():
-                data[x] = 0.0
+        empty = [x for x in data.columns if data[x].isna().values.all()]
+        if len(empty) > 0:
+            data = data.copy()
+        for x in empty:
+            data[x] = np.zeros(data.shape[0], dtype=data[x].dtype)
         imputator.fit(data)
         return DataFrame(imputator.transform(data), columns=data.columns, index=data.index)
     return data
 
 
-def create_time_slices(data: list[DataFrame], imputer: Union[SimpleImputer], slidingWindowSize=128,
-                       slidingWindowStep=64) -> tuple[list[DataFrame], list[int]]:
+def create_time_slices(data: list[DataFrame], imputer: "Union[SimpleImputer]", slidingWindowSize=128,
+                       slidingWindowStep=64, strided=False) \
+        -> tuple[Union[list[DataFrame], list[featureEngine.WindowBlock]], list[int]]:
     """
     This method cuts timeline based data sets into slices specified by passed parameters.
 
@@ -221,6 +326,8 @@ def create_time_slices(data: list[DataFrame], imputer: Union[SimpleImputer], sli
     :param data:    A list of pandas DataFrame objects containing timeline based data to be transformed.
                     Those Dataframe objects must contain a column 'label' as last column.
     :param imputer: An object from sklearn.impute or anything performing similar, used to impute numbers on bad values.
+    :param strided: If set, no DataFrame is created per slice. Instead there is one window block per data set whose
+                    windows are a read-only strided view on a single contiguous array of that data set.
     :returns: Training data and after that the corresponding labels.
     """
     if slidingWindowSize < 1:
@@ -231,40 +338,75 @@ def create_time_slices(data: list[DataFrame], imputer: Union[SimpleImputer], sli
         raise ValueError('Step Size bigger than Sliding Window Size.')
     if any([d.columns[-1] != "label" for d in data]):
         raise ValueError('At least one data set does not contain a column labelled "label" as last column.')
-    x: list[DataFrame] = []
+    x: list[Union[DataFrame, featureEngine.WindowBlock]] = []
     y: list[int] = []
     for df in data:
         labels = np.array(df["label"].fillna(-1))
-        df = impute(df, imputer)
-        df["label"] = labels
+        # Only the values are imputed, so their type is not mixed up with the one of the labels.
+        df = impute(df.iloc[:, :-1], imputer)
         local_cs = slidingWindowSize
         local_step = slidingWindowStep
         if local_cs > df.shape[0] // 4:
             local_cs = df.shape[0] // 4
         if local_step > local_cs:
             local_step = local_cs
+        if strided:
+            if local_cs < 1:
+                continue
+            values = np.ascontiguousarray(df.to_numpy(dtype=featureEngine.float_dtype(df.dtypes)))
+            x.append(featureEngine.WindowBlock(featureEngine.slide(values, local_cs, local_step), list(df.columns)))
+            y.extend(featureEngine.majority_labels(labels, local_cs, local_step).tolist())
+            continue
         for i in range(0, df.shape[0] - local_cs + 1, local_step):
-            data_x: DataFrame = df.iloc[i:i + local_cs, :-1]
-            data_y: int = df.iloc[i:i + local_cs, -1].value_counts().index[0]
+            data_x: DataFrame = df.iloc[i:i + local_cs]
+            data_y: int = Series(labels[i:i + local_cs]).value_counts().index[0]
             x.append(data_x)
             y.append(data_y)
     return x, y
 
 
-def extract_features(ft_list: list[str], data: list[DataFrame], label: list[int], imputer: Union[SimpleImputer])\
-        -> DataFrame:
+def extract_features(ft_list: list[str], data: Union[list[DataFrame], list[featureEngine.WindowBlock]],
+                     label: list[int], imputer: "Union[SimpleImputer]", engine: str = "NUMPY") -> DataFrame:
     """
     This method performs the slidingWindowStep of feature extraction on a list of DataFrames from pandas.
 
     :param ft_list: a list of features generated by method 'choose_features'
-    :param data:    The data sets on which the feature extraction is to be performed.
-    :param label:   The labels column belonging to the data passed. It is expected to have the same length as data
+    :param data:    The data sets on which the feature extraction is to be performed. Window blocks as created by
+                    'create_time_slices' in strided mode are accepted as well.
+    :param label:   The labels column belonging to the data passed. It is expected to contain one entry per window.
     :param imputer: An object from sklearn.impute or anything that does the job the same way for imputing numbers that
                     have been corrupted in feature extraction.
+    :param engine:  Either "NUMPY" for the vectorized feature engine or "TSFRESH" for extracting every window with
+                    tsfresh. If the vectorized engine does not know all features desired, tsfresh is used anyway.
     :return:        A list containing all the data with extracted features on them.
     """
-    if len(data) != len(label) and len(label) > 0:
+    if featureEngine.count_windows(data) != len(label) and len(label) > 0:
         raise ValueError("Input data does not contain same amount of entries as labels.")
+    output: DataFrame = impute(compute_features(ft_list, data, engine), imputer)
+    if len(label) > 0:
+        output["label"] = label_column(label, output)
+    return output
+
+
+def compute_features(ft_list: list[str], data: Union[list[DataFrame], list[featureEngine.WindowBlock]],
+                     engine: str = "NUMPY") -> DataFrame:
+    """
+    This method computes the raw features for 'extract_features', which means there is neither imputation nor labelling.
+
+    :param ft_list: a list of features generated by method 'choose_features' or of single feature columns, e.g. the
+                    ones kept by 'select_features'. For columns, only what they need is computed.
+    :param data:    The windows on which the feature extraction is to be performed, as data frames or window blocks.
+    :param engine:  Either "NUMPY" or "TSFRESH", see 'extract_features'.
+    :return:        A data frame with one row per window, indexed starting with 1.
+    """
+    if engine != "TSFRESH" and featureEngine.supports(ft_list):
+        return featureEngine.extract(ft_list, data)
+    if featureEngine.is_columns(ft_list):
+        return compute_features(featureEngine.feature_kinds(ft_list), data, engine)[ft_list]
+    # tsfresh takes seconds to import, so only processes really falling back to it pay for that.
+    import tsfresh
+    from tsfresh.feature_extraction import ComprehensiveFCParameters
+    data = featureEngine.to_frames(data)
     settings = {key: ComprehensiveFCParameters()[key] for key in ft_list}
     results: list[DataFrame] = []
     for i, x in enumerate(data):
@@ -272,12 +414,159 @@ def extract_features(ft_list: list[str], data: list[DataFrame], label: list[int]
         block["id"] = i + 1
         results.append(tsfresh.extract_features(block, column_id="id", default_fc_parameters=settings,
                                                 disable_progressbar=True))
-    output: DataFrame = impute(pandas.concat(results), imputer)
-    if len(label) > 0:
-        output["label"] = label
+    output = pandas.concat(results)
+    # tsfresh always computes in float64, compact data gets its type back.
+    if len(data) > 0 and featureEngine.float_dtype(data[0].dtypes) == np.float32:
+        output = output.astype(np.float32)
     return output
 
 
+def extract_features_pipelined(ft_list: list[str], data_sets: Iterable[DataFrame], imputers: tuple,
+                               engine: str = "NUMPY", workers: int = None, queue_size: int = None,
+                               instrumentation: Instrumentation = None, **window_parameters) -> DataFrame:
+    """
+    This method does the same as 'create_time_slices' followed by 'extract_features', but as a pipeline: While the
+    iterable passed still loads (and decodes) data set N+1, data set N is already imputed, sliced and extracted on a
+    pool of worker threads. The heavy lifting in numpy releases the GIL, so loading and computing truly overlap.
+
+    At most queue_size data sets are on their way at any time, so memory does not grow with the number of data sets.
+
+    :param ft_list:   a list of features generated by method 'choose_features'
+    :param data_sets: The labelled data sets, e.g. 'Database.iter_data_sets()'.
+    :param imputers:  The two imputators as returned by 'choose_imputator'. The first one is cloned for every data set.
+    :param engine:    Either "NUMPY" or "TSFRESH", see 'extract_features'.
+    :param workers:   The number of worker threads. Defaults to the number of CPUs.
+    :param queue_size: The maximum number of data sets being processed or waiting to be processed. Defaults to one more
+                      than there are workers.
+    :param instrumentation: Where to measure the stages of the pipeline, see 'iter_features'.
+    :param window_parameters: 'slidingWindowSize' and 'slidingWindowStep' as for 'create_time_slices'.
+    :return: The same as 'extract_features' would.
+    """
+    results = [(x, y) for _, x, y in iter_features(ft_list, data_sets, imputers[0], engine, workers, queue_size,
+                                                   instrumentation, **window_parameters)]
+    return combine_features(results, imputers[1])
+
+
+def iter_features(ft_list: list[str], data_sets: Iterable[DataFrame], imputer: "Union[SimpleImputer]",
+                  engine: str = "NUMPY", workers: int = None, queue_size: int = None,
+                  instrumentation: Instrumentation = None, **window_parameters) \
+        -> Iterator[tuple[int, Optional[DataFrame], list[int]]]:
+    """
+    This method is the pipeline behind 'extract_features_pipelined'. It hands out the raw features of every data set
+    on its own, in the order the data sets arrive.
+
+    :param ft_list:   a list of features generated by method 'choose_features'
+    :param data_sets: The labelled data sets, e.g. 'Database.iter_data_sets()'. Their id attribute must be set.
+    :param imputer:   The imputator used on the data sets. It is cloned for every data set.
+    :param engine:    Either "NUMPY" or "TSFRESH", see 'extract_features'.
+    :param workers:   The number of worker threads. Defaults to the number of CPUs.
+    :param queue_size: The maximum number of data sets being processed or waiting to be processed. Defaults to one more
+                      than there are workers.
+    :param instrumentation: Where to measure the stages 'get_data_sets' (the time spent waiting for the next data set),
+                      'create_time_slices' and 'extract_features'. The latter two are added up over the worker threads.
+    :param window_parameters: 'slidingWindowSize' and 'slidingWindowStep' as for 'create_time_slices'.
+    :return: An iterator over the id, the raw features (None, if there is no window) and the labels of every data set.
+    """
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    queue_size = queue_size if queue_size is not None else workers + 1
+    instrumentation = instrumentation or Instrumentation()
+
+    def work(data_set: DataFrame) -> tuple[int, Optional[DataFrame], list[int]]:
+        with instrumentation.accumulate("create_time_slices") as record:
+            x, y = create_time_slices([data_set], clone(imputer), strided=True, **window_parameters)
+            record["windows"] = len(y)
+        if len(x) == 0:
+            return getattr(data_set, "id", None), None, y
+        with instrumentation.accumulate("extract_features", windows=len(y)) as record:
+            features = compute_features(ft_list, x, engine)
+            record["values"] = features.size
+        return getattr(data_set, "id", None), features, y
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: deque[Future] = deque()
+        for data_set in instrumentation.iterate("get_data_sets", data_sets,
+                                                lambda d: {"dataSets": 1, "rows": d.shape[0]}):
+            pending.append(pool.submit(work, data_set))
+            while len(pending) >= queue_size:
+                yield pending.popleft().result()
+        while len(pending) > 0:
+            yield pending.popleft().result()
+
+
+def combine_features(results: list[tuple[Optional[DataFrame], list[int]]], imputer: "Union[SimpleImputer]") \
+        -> DataFrame:
+    """
+    This method puts together the raw features of several data sets, imputes them and appends the labels.
+
+    :param results: The raw features (or None, if there are no windows) and the labels of every data set.
+    :param imputer: An imputator for the numbers that have been corrupted in feature extraction.
+    :return: The same as 'extract_features' would for all the windows of all data sets.
+    """
+    frames = [x for x, _ in results if x is not None]
+    if len(frames) == 0:
+        raise ValueError("None of the data sets passed is large enough to contain a single window.")
+    output: DataFrame = frames[0] if len(frames) == 1 else pandas.concat(frames, ignore_index=True)
+    output.index = np.arange(1, output.shape[0] + 1)
+    output = impute(output, imputer)
+    output["label"] = label_column([label for _, y in results for label in y], output)
+    return output
+
+
+def label_column(labels: list[int], features: DataFrame) -> Union[list[int], np.ndarray]:
+    """
+    This method prepares the labels of the windows for being appended to their features. With compact features, i.e.
+    float32 ones, the labels are put into the smallest integer type fitting them.
+
+    :param labels: The label of every window.
+    :param features: The features of the windows, without labels.
+    :return: The labels as they are or as an array of a narrow integer type.
+    """
+    if len(labels) == 0 or featureEngine.float_dtype(features.dtypes) != np.float32:
+        return labels
+    return np.asarray(labels, dtype=smallest_int_dtype(min(labels), max(labels)))
+
+
+def extract_features_cached(ft_list: list[str], database: Database, imputers: tuple, cache: FeatureCache,
+                            engine: str = "NUMPY", instrumentation: Instrumentation = None,
+                            **window_parameters) -> DataFrame:
+    """
+    This method does the same as 'extract_features_pipelined' on all data sets of the database object passed, but
+    looks up the raw features of every data set in the feature cache first. Only data sets missing there are loaded
+    from the data base, and their features are stored in the cache afterwards.
+
+    :param ft_list:  a list of features generated by method 'choose_features'
+    :param database: The database object holding the ids of the data sets to use.
+    :param imputers: The two imputators as returned by 'choose_imputator'.
+    :param cache:    The feature cache to use.
+    :param engine:   Either "NUMPY" or "TSFRESH", see 'extract_features'.
+    :param instrumentation: Where to measure the stage 'feature_cache' and those of 'iter_features'.
+    :param window_parameters: 'slidingWindowSize' and 'slidingWindowStep' as for 'create_time_slices'.
+    :return: The same as 'extract_features_pipelined' would.
+    """
+    instrumentation = instrumentation or Instrumentation()
+    results: dict[int, tuple[Optional[DataFrame], list[int]]] = {}
+    with instrumentation.stage("feature_cache") as record:
+        # Compact or resampled data sets yield other features, which must not be mixed up with the others.
+        loading = {"compact": True} if database.compact else {}
+        if database.resample is not None:
+            loading.update(resample=database.resample, resampleInterval=database.resample_interval)
+        keys = {i: FeatureCache.make_key(digest, features=ft_list, engine=engine, imputator=repr(imputers[0]),
+                                         **loading, **window_parameters)
+                for i, digest in database.get_data_set_digests().items()}
+        for i in keys:
+            entry = cache.get(keys[i])
+            if entry is not None:
+                results[i] = entry
+        record["hits"] = len(results)
+        record["misses"] = len(keys) - len(results)
+    missing = sorted(i for i in keys if i not in results)
+    for i, x, y in iter_features(ft_list, database.iter_data_sets(missing), imputers[0], engine,
+                                 instrumentation=instrumentation, **window_parameters):
+        results[i] = x, y
+        cache.put(keys[i], x, y)
+    return combine_features([results[i] for i in sorted(results)], imputers[1])
+
+
 def partition_data(data: DataFrame, percentage=0.8) -> tuple[DataFrame, Series, DataFrame, Series]:
     """
     This method breaks up the passed data into a part of paired X/Y-axis training data and a part of X/Y-axis labeled
@@ -301,7 +590,7 @@ def partition_data(data: DataFrame, percentage=0.8) -> tuple[DataFrame, Series,
 
 
 def preprocess_data(data: DataFrame,
-                    scaler: Union[StandardScaler, MinMaxScaler, Normalizer, QuantileTransformer, RobustScaler],
+                    scaler: "Union[StandardScaler, MinMaxScaler, Normalizer, QuantileTransformer, RobustScaler]",
                     ready_to_use=False) -> DataFrame:
     """
     This method performs the data preprocessing slidingWindowStep.
@@ -317,7 +606,7 @@ def preprocess_data(data: DataFrame,
 
 
 def train_classifier(x_axis_data: DataFrame, y_axis_data: Series,
-                     classifier: Union[MLPClassifier, RandomForestClassifier, KNeighborsClassifier, SVC]) -> None:
+                     classifier: "Union[MLPClassifier, RandomForestClassifier, KNeighborsClassifier, SVC]") -> None:
     """
     This method performs training on the classifier.
 
@@ -329,6 +618,92 @@ def train_classifier(x_axis_data: DataFrame, y_axis_data: Series,
     classifier.fit(x_axis_data, y_axis_data)
 
 
+def supports_partial_fit(component) -> bool:
+    """
+    This method tells whether a scaler or a classifier can be trained incrementally.
+
+    :param component: The scaler or classifier.
+    :return: True, if it has a method partial_fit.
+    """
+    return hasattr(component, "partial_fit")
+
+
+def train_incremental(exec_params: dict, database: Database, scaler, classifier,
+                      instrumentation: Instrumentation = None) -> tuple[list[str], list[str], np.ndarray]:
+    """
+    This method does what load_features, split_data, preprocess_data and train_classifier do for 'build', but without
+    ever holding the features of more than one data set in memory:
+
+    First, the features of every data set are extracted as usual, imputed on their own and spilled to a temporary
+    directory. Then the scaler is fitted chunk by chunk on the training part of them, and after that the classifier,
+    for 'epochs' passes over the chunks in shuffled order.
+
+    The training part is the same as split_data would choose, i.e. the first 'trainingDataPercentage' of all windows.
+
+    :param exec_params: The execution parameters as described in fetch_parameters.
+    :param database: The database object to load the data sets with.
+    :param scaler: A scaler supporting partial_fit. It is fitted in place.
+    :param classifier: A classifier supporting partial_fit. It is trained in place.
+    :param instrumentation: Where to measure the stages.
+    :return: The features chosen, the feature columns in the order the scaler has been fitted with and the mean of
+             every feature column over the training part, which an inference pipeline fills gaps with.
+    """
+    instrumentation = instrumentation or Instrumentation()
+    features = choose_features(exec_params["features"])
+    imputators = choose_imputator(exec_params["imputator"])
+    window_parameters = {x: exec_params[x] for x in ("slidingWindowSize", "slidingWindowStep") if x in exec_params}
+    percentage = exec_params.get("trainingDataPercentage", 0.8)
+    if percentage is None or not (0 < percentage <= 1):
+        raise ValueError("Param percentage must lie in the open interval (0;1]. Passed value was " + str(percentage))
+    with tempfile.TemporaryDirectory() as directory:
+        # The feature cache is unbounded here, it only lives as long as the training does.
+        spill = FeatureCache(directory, 2 ** 63)
+        chunks: list[tuple[int, int]] = []
+        classes: set[int] = set()
+        with instrumentation.stage("load_features") as record:
+            for i, x, y in iter_features(features, database.iter_data_sets(), imputators[0],
+                                         exec_params.get("featureEngine", "NUMPY"), instrumentation=instrumentation,
+                                         **window_parameters):
+                if x is None:
+                    continue
+                spill.put(str(i), impute(x, clone(imputators[1])), y)
+                chunks.append((i, len(y)))
+                classes.update(y)
+            record["dataSets"], record["windows"] = len(chunks), sum(n for _, n in chunks)
+        if len(chunks) == 0:
+            raise ValueError("None of the data sets passed is large enough to contain a single window.")
+        cut = int((sum(n for _, n in chunks) - 1) * percentage)
+        sums, columns = None, []
+        with instrumentation.stage("preprocess_data", windows=cut):
+            for x, _ in _training_chunks(spill, chunks, cut):
+                scaler.partial_fit(x)
+                columns = [str(c) for c in x.columns]
+                # The chunks are imputed already, so their means are plain ones.
+                sums = x.sum(axis=0).to_numpy(dtype=np.float64) + (0 if sums is None else sums)
+        rng = np.random.default_rng(0)
+        with instrumentation.stage("train_classifier", windows=cut) as record:
+            for _ in range(exec_params.get("epochs", 1)):
+                order = rng.permutation(len(chunks))
+                for x, y in _training_chunks(spill, chunks, cut, order):
+                    shuffle = rng.permutation(x.shape[0])
+                    classifier.partial_fit(preprocess_data(x.iloc[shuffle], scaler, True), y[shuffle],
+                                           classes=np.array(sorted(classes)))
+            record["epochs"] = exec_params.get("epochs", 1)
+    return features, columns, sums / max(cut, 1)
+
+
+def _training_chunks(spill: FeatureCache, chunks: list[tuple[int, int]], cut: int,
+                     order: Optional[Iterable[int]] = None) -> Iterator[tuple[DataFrame, np.ndarray]]:
+    # The windows of chunk k start at the sum of the sizes of the chunks before, only those before the cut are trained.
+    starts = np.cumsum([0] + [n for _, n in chunks])
+    for k in (range(len(chunks)) if order is None else order):
+        if starts[k] >= cut:
+            continue
+        x, y = spill.get(str(chunks[k][0]))
+        end = min(chunks[k][1], cut - starts[k])
+        yield x.iloc[:end], np.asarray(y[:end])
+
+
 def notify_server(model_id: int):
     """
     This method is used to notify the server that the calculation of an ai model is done.
@@ -340,40 +715,273 @@ def notify_server(model_id: int):
     print(str(model_id))
 
 
-if __name__ == "__main__":
-    # first of all - get our execution parameters!
-    exec_params = fetch_parameters()
-    # Second, pick all available objects already available here.
-    features = choose_features(exec_params["features"])
+def load_features(exec_params: dict, database: Database, instrumentation: Instrumentation = None,
+                  features: Optional[list[str]] = None) -> tuple[list[str], DataFrame]:
+    """
+    This method loads the data sets described by the execution parameters from the database, and while doing so,
+    already prepares them and extracts all the features desired. Whatever has been extracted with the same settings
+    before is taken from the feature cache.
+
+    :param exec_params: The execution parameters as described in fetch_parameters.
+    :param database: The database object to load the data sets with.
+    :param instrumentation: Where to measure the stage 'load_features' and the stages within.
+    :param features: The features to extract, e.g. those of a stored model. If not passed, they are chosen as the
+                     execution parameters say.
+    :return: The features chosen and the extracted features of all windows, labels included.
+    """
+    instrumentation = instrumentation or Instrumentation()
+    features = choose_features(exec_params["features"]) if features is None else features
+    imputators = choose_imputator(exec_params["imputator"])
+    window_parameters = {x: exec_params[x] for x in ("slidingWindowSize", "slidingWindowStep") if x in exec_params}
+    feature_cache = FeatureCache.from_config()
+    with instrumentation.stage("load_features") as record:
+        if feature_cache is None:
+            featured_data = extract_features_pipelined(features, database.iter_data_sets(), imputators,
+                                                       exec_params.get("featureEngine", "NUMPY"),
+                                                       instrumentation=instrumentation, **window_parameters)
+        else:
+            featured_data = extract_features_cached(features, database, imputators, feature_cache,
+                                                    exec_params.get("featureEngine", "NUMPY"),
+                                                    instrumentation=instrumentation, **window_parameters)
+        record["windows"], record["features"] = featured_data.shape[0], featured_data.shape[1] - 1
+    return features, featured_data
+
+
+def select_features(exec_params: dict, x_axis_data: DataFrame, y_axis_data: Series) -> list[str]:
+    """
+    This method selects the feature columns worth keeping on the training data as the execution parameters say.
+
+    :param exec_params: The execution parameters as described in fetch_parameters.
+    :param x_axis_data: The features of the training data.
+    :param y_axis_data: The labels of the training data.
+    :return: The names of the columns kept in their original order, at least one.
+    """
+    count = exec_params.get("selectedFeatures")
+    if count is not None:
+        count = min(count, x_axis_data.shape[1])
+    selector = choose_selector(exec_params["featureSelection"], count, exec_params.get("selectionThreshold"))
+    try:
+        with warnings.catch_warnings():
+            # Constant features make the F-test warn and divide by zero, they just get no score.
+            warnings.simplefilter("ignore", RuntimeWarning)
+            warnings.simplefilter("ignore", UserWarning)
+            selector.fit(x_axis_data, y_axis_data)
+    except ValueError:
+        # No feature passed the threshold.
+        return list(x_axis_data.columns)
+    kept = [str(x) for x in x_axis_data.columns[selector.get_support()]]
+    return kept if len(kept) > 0 else list(x_axis_data.columns)
+
+
+def split_data(exec_params: dict, featured_data: DataFrame) -> tuple[DataFrame, Series, DataFrame, Series]:
+    """
+    This method parts the data into one part of training and one part of testing data as the execution parameters say.
+
+    :param exec_params: The execution parameters as described in fetch_parameters.
+    :param featured_data: The data as returned by load_features.
+    :return: The same as 'partition_data' does.
+    """
+    if "trainingDataPercentage" in exec_params:
+        return partition_data(featured_data, exec_params["trainingDataPercentage"])
+    return partition_data(featured_data)
+
+
+def build(exec_params: dict, connection=None, instrumentation: Instrumentation = None) -> int:
+    """
+    This method executes all steps to build and train an AI model as described by the execution parameters and stores
+    the model in the data base.
+
+    :param exec_params: The execution parameters as described in fetch_parameters.
+    :param connection: An open data base connection to use. If not passed, a new one is opened.
+    :param instrumentation: Where to measure the stages. If not passed, it is created from the config file. It is
+                            reported when the build is done.
+    :return: The id of the classifier in the data base or -1, if the classifier did not converge.
+    """
+    instrumentation = instrumentation or Instrumentation.from_config("buildModel")
+    # First, pick all available objects already available here.
     scaler = choose_scaler(exec_params["scaler"])
     classifier = choose_classifier(exec_params["classifier"])
-    imputators = choose_imputator(exec_params["imputator"])
     # Get Access to our data base
-    database = Database(exec_params["dataSets"], exec_params["projectID"])
-    # Get the data sets we need from the database
-    datasets = database.get_data_sets()
-    # Prepare the data
-    x_data, y_data = create_time_slices(datasets, imputators[0], **{x: exec_params[x]
-                                                                    for x in ("slidingWindowSize", "slidingWindowStep")
-                                                                    if x in exec_params})
-    # Extract all the features desired.
-    featured_data = extract_features(features, x_data, y_data, imputators[1])
-    # After that, part our data into one part of training and one part of testing data.
-    if "trainingDataPercentage" in exec_params:
-        x_training, y_training, x_testing, y_testing = partition_data(featured_data,
-                                                                      exec_params["trainingDataPercentage"])
-    else:
-        x_training, y_training, x_testing, y_testing = partition_data(featured_data)
-    # Now preprocess our data through our scaler
-    x_training_processed = preprocess_data(x_training, scaler)
-    x_testing_processed = preprocess_data(x_testing, scaler, True)
-    # as second to last slidingWindowStep, train our classifier!
+    database = Database(exec_params["dataSets"], exec_params["projectID"], connection=connection,
+                        compact=exec_params.get("compact", False), resample=exec_params.get("resample"),
+                        resample_interval=exec_params.get("resampleInterval"), snapshots=SnapshotStore.from_config())
     try:
-        train_classifier(x_training_processed, y_training, classifier)
-    except ConvergenceWarning:
-        notify_server(-1)
-        exit(0)
-    # as last, put everything in the data base and be done.
-    model_id = database.put_stuff(classifier, scaler, features=features)
-    # as very last, say our server hello, so that it sends an email.
-    notify_server(model_id)
+        if exec_params.get("incremental", False) and supports_partial_fit(scaler) and supports_partial_fit(classifier):
+            try:
+                features, columns, means = train_incremental(exec_params, database, scaler, classifier,
+                                                             instrumentation)
+            except ConvergenceWarning:
+                return -1
+            pipeline = InferencePipeline(classifier, scaler, columns, means)
+        else:
+            features, featured_data = load_features(exec_params, database, instrumentation)
+            # After that, part our data into one part of training and one part of testing data.
+            x_training, y_training, x_testing, y_testing = split_data(exec_params, featured_data)
+            # Optionally, keep only the features worth it. Only those are stored, so classifying computes just them.
+            if "featureSelection" in exec_params:
+                with instrumentation.stage("select_features", features=x_training.shape[1]) as record:
+                    features = select_features(exec_params, x_training, y_training)
+                    record["selected"] = len(features)
+                x_training, x_testing = x_training[features], x_testing[features]
+            # Now preprocess our data through our scaler
+            with instrumentation.stage("preprocess_data", windows=featured_data.shape[0]):
+                x_training_processed = preprocess_data(x_training, scaler)
+                x_testing_processed = preprocess_data(x_testing, scaler, True)
+            # as second to last slidingWindowStep, train our classifier!
+            try:
+                with instrumentation.stage("train_classifier", windows=x_training_processed.shape[0]):
+                    train_classifier(x_training_processed, y_training, classifier)
+            except ConvergenceWarning:
+                return -1
+            pipeline = InferencePipeline.compile(classifier, scaler, x_training)
+        # as last, put everything in the data base and be done.
+        with instrumentation.stage("put_stuff"):
+            model_id = database.put_stuff(pipeline, features=features)
+        if instrumentation.store:
+            database.put_metrics(model_id, instrumentation.summary())
+        return model_id
+    finally:
+        instrumentation.report()
+        database.close()
+
+
+def update(exec_params: dict, connection=None, instrumentation: Instrumentation = None) -> int:
+    """
+    This method continues training the model stored under 'baseClassifier' on the data sets passed, which usually are
+    the ones added to its project since, and stores the result as a new model. The cost depends on the new data only.
+
+    The features, the scaler, the label table and the sensors of the stored model are kept, so the new model reads data
+    just like the old one. How training continues depends on the classifier, see continue_training.
+
+    :param exec_params: The execution parameters as described in fetch_parameters.
+    :param connection: An open data base connection to use. If not passed, a new one is opened.
+    :param instrumentation: Where to measure the stages, see 'build'.
+    :return: The id of the new classifier in the data base or -1, if the classifier did not converge.
+    """
+    instrumentation = instrumentation or Instrumentation.from_config("buildModel")
+    database = Database(exec_params["dataSets"], exec_params["projectID"], connection=connection,
+                        compact=exec_params.get("compact", False), resample=exec_params.get("resample"),
+                        resample_interval=exec_params.get("resampleInterval"), snapshots=SnapshotStore.from_config())
+    try:
+        with instrumentation.stage("get_stuff"):
+            base, sensors, _, features = database.get_pipeline(exec_params["baseClassifier"])
+        # The model may be shared by the model cache, so the one trained on is a copy.
+        classifier, scaler = copy.deepcopy(base.classifier), base.scaler
+        features, featured_data = load_features(exec_params, database, instrumentation, features)
+        # There is no evaluation of the new model, so all the new data is used for training.
+        x_training, y_training = featured_data.iloc[:, :-1], featured_data.iloc[:, -1]
+        if list(getattr(scaler, "feature_names_in_", x_training.columns)) != list(x_training.columns):
+            raise ValueError("The data sets do not provide the sensors the model has been built with.")
+        with instrumentation.stage("preprocess_data", windows=x_training.shape[0]):
+            x_training_processed = preprocess_data(x_training, scaler, True)
+        try:
+            with instrumentation.stage("train_classifier", windows=x_training_processed.shape[0]):
+                continue_training(classifier, x_training_processed, y_training,
+                                  exec_params.get("addedEstimators", 10))
+        except ConvergenceWarning:
+            return -1
+        # The new model fills gaps just like the old one did.
+        pipeline = InferencePipeline(classifier, scaler, list(x_training.columns), base.fill_values)
+        with instrumentation.stage("put_stuff"):
+            model_id = database.put_stuff(pipeline, sensors, features=features)
+        if instrumentation.store:
+            database.put_metrics(model_id, instrumentation.summary())
+        return model_id
+    finally:
+        instrumentation.report()
+        database.close()
+
+
+def continue_training(classifier, x_axis_data: DataFrame, y_axis_data: Series, added_estimators: int = 10) -> None:
+    """
+    This method trains an already trained classifier further on new data, keeping what it has learned so far:
+
+    Classifiers supporting partial_fit (e.g. SGD, MLP and naive Bayes) are simply fed with the new data. Ensembles
+    supporting warm_start (e.g. random forests) get added_estimators more estimators, which are trained on the new data.
+    Other classifiers cannot be updated, a value error is raised for them.
+
+    Windows of labels the classifier does not know are left out, if they are unlabelled (-1). For any other unknown
+    label a value error is raised, as the classifier has to be built anew to learn it.
+
+    :param classifier: The classifier to train in place.
+    :param x_axis_data: Transformed X training data
+    :param y_axis_data: Untransformed Y training data
+    :param added_estimators: How many estimators an ensemble gets.
+    """
+    y = np.asarray(y_axis_data)
+    known = np.isin(y, classifier.classes_)
+    unknown = set(np.unique(y[~known]).tolist()).difference([-1])
+    if len(unknown) > 0:
+        raise ValueError("The classifier does not know the labels " + ", ".join(str(x) for x in sorted(unknown)))
+    x_axis_data, y = x_axis_data[known], y[known]
+    if hasattr(classifier, "partial_fit"):
+        classifier.partial_fit(x_axis_data, y)
+        return
+    parameters = classifier.get_params()
+    if "warm_start" not in parameters or "n_estimators" not in parameters:
+        raise ValueError(type(classifier).__name__ + " cannot be updated, the model has to be built anew.")
+    # The classes are taken from the data, so classes missing there get a sample without weight. This way, the new
+    # estimators know all the classes the old ones do.
+    missing = np.setdiff1d(classifier.classes_, y)
+    x_axis_data = pandas.concat([x_axis_data, DataFrame(np.zeros((missing.shape[0], x_axis_data.shape[1]),
+                                                                 dtype=x_axis_data.dtypes.iloc[0]),
+                                                        columns=x_axis_data.columns)], ignore_index=True)
+    weights = np.concatenate([np.ones(y.shape[0]), np.zeros(missing.shape[0])])
+    classifier.set_params(warm_start=True, n_estimators=parameters["n_estimators"] + added_estimators)
+    classifier.fit(x_axis_data, np.concatenate([y, missing]), sample_weight=weights)
+
+
+def build_candidates(exec_params: dict, connection=None, instrumentation: Instrumentation = None) -> list[dict]:
+    """
+    This method does the same as 'build', but for all the candidates listed in the execution parameters. The features
+    are extracted only once, and the candidates are trained in parallel and scored on the testing data.
+
+    :param exec_params: The execution parameters as described in fetch_parameters.
+    :param connection: An open data base connection to use. If not passed, a new one is opened.
+    :param instrumentation: Where to measure the stages, see 'build'.
+    :return: One dict per candidate, best first, containing the names of 'classifier' and 'scaler', the 'score' on the
+             testing data (None without testing data) and the 'id' of the classifier in the data base (None, if the
+             candidate has not been stored).
+    """
+    instrumentation = instrumentation or Instrumentation.from_config("buildModel")
+    database = Database(exec_params["dataSets"], exec_params["projectID"], connection=connection,
+                        compact=exec_params.get("compact", False), resample=exec_params.get("resample"),
+                        resample_interval=exec_params.get("resampleInterval"), snapshots=SnapshotStore.from_config())
+    try:
+        features, featured_data = load_features(exec_params, database, instrumentation)
+        split = split_data(exec_params, featured_data)
+        with instrumentation.stage("train_candidates", candidates=len(exec_params["candidates"])):
+            results = train_candidates(*split, exec_params["candidates"])
+        store_all = exec_params.get("storeAll", False)
+        summaries: list[dict] = []
+        for i, result in enumerate(results):
+            model_id = None
+            if i == 0 or store_all:
+                with instrumentation.stage("put_stuff"):
+                    pipeline = InferencePipeline.compile(result["classifierObject"], result["scalerObject"], split[0])
+                    model_id = database.put_stuff(pipeline, features=features)
+                if instrumentation.store:
+                    database.put_metrics(model_id, instrumentation.summary())
+            summaries.append({"classifier": result["classifier"], "scaler": result["scaler"],
+                              "score": None if np.isnan(result["score"]) else result["score"], "id": model_id})
+        return summaries
+    finally:
+        instrumentation.report()
+        database.close()
+
+
+if __name__ == "__main__":
+    # first of all - get our execution parameters!
+    exec_params = fetch_parameters()
+    if "candidates" in exec_params:
+        candidates = build_candidates(exec_params)
+        for candidate in candidates:
+            print(json.dumps(candidate))
+        # The id of the best candidate is printed last, where the server expects the id of a single model.
+        notify_server(candidates[0]["id"])
+    elif "baseClassifier" in exec_params:
+        notify_server(update(exec_params))
+    else:
+        model_id = build(exec_params)
+        # as very last, say our server hello, so that it sends an email.
+        notify_server(model_id)
@@ -0,0 +1,119 @@
+# coding=utf-8
+"""
+This file contains the training of several candidate models on the same features at once. The feature matrices are put
+into shared memory, so the processes training the candidates read them without copying or pickling them.
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+from pandas import DataFrame, Series
+
+from buildModel.registry import CLASSIFIERS, SCALERS
+
+
+class SharedArray(NamedTuple):
+    """
+    Everything needed to find an array in shared memory again.
+    """
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+def share(array: np.ndarray) -> tuple[shared_memory.SharedMemory, SharedArray]:
+    """
+    Copies an array into a new block of shared memory.
+
+    :param array: The array.
+    :return: The block, which the caller has to close and unlink, and its description for attach.
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+    return block, SharedArray(block.name, array.shape, array.dtype.str)
+
+
+def attach(shared: SharedArray) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    """
+    Attaches to an array in shared memory.
+
+    :param shared: The description of the array as returned by share.
+    :return: The block, which the caller has to close once the array is not needed anymore, and the array on it.
+    """
+    block = shared_memory.SharedMemory(name=shared.name)
+    return block, np.ndarray(shared.shape, np.dtype(shared.dtype), buffer=block.buf)
+
+
+def train_candidates(x_training: DataFrame, y_training: Series, x_testing: DataFrame, y_testing: Series,
+                     candidates: list[dict[str, str]], workers: Optional[int] = None) -> list[dict[str, Any]]:
+    """
+    Trains every candidate, a combination of a classifier and a scaler, on the same training data in a process pool
+    and scores it on the testing data.
+
+    :param x_training: The features of the training data as returned by partition_data.
+    :param y_training: The labels of the training data.
+    :param x_testing: The features of the testing data.
+    :param y_testing: The labels of the testing data.
+    :param candidates: The candidates as dicts holding the names of a 'classifier' and a 'scaler' as accepted by
+                       choose_classifier and choose_scaler.
+    :param workers: The number of processes. Defaults to one per candidate, but not more than there are CPUs.
+    :return: One dict per candidate containing the names of 'classifier' and 'scaler', the mean accuracy on the
+             testing data in 'score' (NaN without testing data), and the fitted 'classifierObject' and 'scalerObject'.
+             The candidates are ordered by descending score, ties keep their order.
+    """
+    columns = [str(c) for c in x_training.columns]
+    blocks: list[shared_memory.SharedMemory] = []
+    shared: list[SharedArray] = []
+    try:
+        for data in (x_training, y_training, x_testing, y_testing):
+            block, description = share(np.ascontiguousarray(data.to_numpy()))
+            blocks.append(block)
+            shared.append(description)
+        workers = workers or max(1, min(len(candidates), os.cpu_count() or 1))
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(_train, [(c.get("classifier", ""), c.get("scaler", ""), columns, shared)
+                                                  for c in candidates]))
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    results = [{"classifier": c.get("classifier", ""), "scaler": c.get("scaler", ""), "score": score,
+                "classifierObject": classifier, "scalerObject": scaler}
+               for c, (classifier, scaler, score) in zip(candidates, results)]
+    return sorted(results, key=lambda x: np.inf if np.isnan(x["score"]) else -x["score"])
+
+
+def _train(task: tuple[str, str, list[str], list[SharedArray]]) -> tuple[Any, Any, float]:
+    # This runs in a process of the pool. The import is done here, as buildModel imports this module itself.
+    from buildModel.buildModel import preprocess_data, train_classifier
+    classifier_name, scaler_name, columns, shared = task
+    blocks: list[shared_memory.SharedMemory] = []
+    arrays: list[np.ndarray] = []
+    try:
+        for description in shared:
+            block, array = attach(description)
+            blocks.append(block)
+            arrays.append(array)
+        x_training, y_training, x_testing, y_testing = arrays
+        scaler = SCALERS.create(scaler_name)
+        classifier = CLASSIFIERS.create(classifier_name)
+        # Scaling creates new arrays, so nothing fitted keeps a reference into the shared memory.
+        train_classifier(preprocess_data(DataFrame(x_training, columns=columns), scaler), Series(y_training.copy()),
+                         classifier)
+        score = float("nan")
+        if x_testing.shape[0] > 0:
+            score = float(classifier.score(preprocess_data(DataFrame(x_testing, columns=columns), scaler, True),
+                                           y_testing))
+        return classifier, scaler, score
+    finally:
+        # The blocks can only be closed, once no array refers to them anymore.
+        x_training = y_training = x_testing = y_testing = None
+        arrays.clear()
+        for block in blocks:
+            block.close()
@@ -0,0 +1,90 @@
+# coding=utf-8
+"""
+This file contains the class FeatureCache, a persistent on-disk cache for the feature matrices of single data sets.
+"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+from pandas import DataFrame
+
+from database.diskStore import DiskStore
+
+
+class FeatureCache(DiskStore):
+    """
+    This class stores the raw (not yet imputed) features and the labels of the windows of a data set as npz files in a
+    local directory. Entries are looked up by a key covering everything those features depend on. If the directory
+    grows beyond its size limit, the least recently used entries are deleted. It is configured in section
+    FEATURE_CACHE of the config file.
+    """
+
+    SECTION = "FEATURE_CACHE"
+    DEFAULT_NAME = "featureCache"
+    SUFFIX = ".npz"
+    # Increase this whenever the features computed for the same key might change, e.g. on changes to the feature engine.
+    VERSION = 1
+
+    @classmethod
+    def make_key(cls, data_set_digest: str, **settings) -> str:
+        """
+        Builds the key of a cache entry.
+
+        :param data_set_digest: The content hash of the data set as of 'Database.get_data_set_digests'.
+        :param settings: Everything else the features depend on, e.g. window size and step, the resolved feature list,
+                         the feature engine and the imputator. The values must be serializable to json.
+        :return: The key as a hex string.
+        """
+        description = json.dumps([cls.VERSION, data_set_digest, settings], sort_keys=True, default=repr)
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[tuple[Optional[DataFrame], list[int]]]:
+        """
+        Looks up an entry and marks it as recently used.
+
+        :param key: The key as built by make_key.
+        :return: The raw features and the labels stored under key, or None, if there is no such entry.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                # The column names come back as numpy.str_, which scalers fitted on them do not take for feature names.
+                features = DataFrame(entry["features"], columns=[str(c) for c in entry["columns"]]) \
+                    if entry["columns"].shape[0] > 0 else None
+                labels = entry["labels"].tolist()
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            self.misses += 1
+            return None
+        if features is not None:
+            features.index = np.arange(1, features.shape[0] + 1)
+        self.hits += 1
+        return features, labels
+
+    def put(self, key: str, features: Optional[DataFrame], labels: list[int]) -> None:
+        """
+        Stores an entry and evicts the least recently used entries, if the size limit is exceeded afterwards.
+
+        :param key: The key as built by make_key.
+        :param features: The raw features of all windows of a data set or None, if it has no windows.
+        :param labels: The labels of all windows of that data set.
+        """
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "wb") as file:
+            np.savez(file,
+                     features=np.empty((0, 0)) if features is None else features.to_numpy(),
+                     columns=np.array([] if features is None else [str(c) for c in features.columns]),
+                     labels=np.array(labels))
+        # Replacing is atomic, so concurrent readers never see half written entries.
+        os.replace(temporary, self._path(key))
+        self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".npz")
@@ -0,0 +1,401 @@
+# coding=utf-8
+"""
+This file contains a vectorized feature engine. It computes the features offered by choose_features on whole stacks of
+windows at once instead of calling tsfresh for every single window. Column names and column order are exactly the ones
+tsfresh would produce, so models trained with one engine can be fed with data from the other one.
+
+Instead of features, the names of single output columns may be passed, e.g. the ones kept by a feature selection. Then
+only the features and channels behind these columns are computed, and the output has exactly these columns.
+"""
+from typing import NamedTuple, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from pandas import DataFrame, concat
+
+# These are the parameters ComprehensiveFCParameters of tsfresh uses for the parametrized features we support.
+FEATURE_PARAMETERS: dict[str, Union[list[dict], None]] = {
+    "minimum": None,
+    "maximum": None,
+    "variance": None,
+    "abs_energy": None,
+    "mean": None,
+    "quantile": [{"q": q} for q in (0.1, 0.2, 0.3, 0.4, 0.6, 0.7, 0.8, 0.9)],
+    "skewness": None,
+    "kurtosis": None,
+    "ar_coefficient": [{"coeff": coeff, "k": 10} for coeff in range(11)]
+}
+
+# Upper bound for the number of single series the autoregression is solved for in one go.
+_AR_CHUNK = 4096
+# Upper bound for the number of windows whose features are computed in one go, as intermediate results of most features
+# have the size of the windows themselves.
+_WINDOW_CHUNK = 8192
+
+
+class WindowBlock(NamedTuple):
+    """
+    A stack of equally sized windows over the same channels, shaped (windows, window length, channels).
+    """
+    windows: np.ndarray
+    columns: list[str]
+
+
+def supports(ft_list: list[str]) -> bool:
+    """
+    Tells whether all of the passed features can be computed by this engine.
+
+    :param ft_list: a list of features generated by method 'choose_features' or of output column names
+    :return: True, if this engine knows every feature in the list, else False.
+    """
+    return all(x in FEATURE_PARAMETERS for x in feature_kinds(ft_list))
+
+
+def is_columns(ft_list: list[str]) -> bool:
+    """
+    Tells whether a list names output columns as built by feature_names rather than features.
+
+    :param ft_list: a list of features generated by method 'choose_features' or of output column names
+    :return: True for column names.
+    """
+    return any("__" in x for x in ft_list)
+
+
+def split_column(name: str) -> tuple[str, str]:
+    """
+    Splits an output column name as built by feature_names into the channel and the feature it belongs to.
+
+    :param name: The column name, e.g. "Accelerometer 0__quantile__q_0.1".
+    :return: The channel and the feature, e.g. ("Accelerometer 0", "quantile").
+    """
+    found = (-1, "")
+    for kind in FEATURE_PARAMETERS:
+        position = name.rfind("__" + kind)
+        end = position + len(kind) + 2
+        # The last feature in the name is the one, as channel names may contain anything.
+        if position > found[0] and (end == len(name) or name.startswith("__", end)):
+            found = (position, kind)
+    if found[0] <= 0:
+        raise ValueError("Unknown feature column " + name)
+    return name[:found[0]], found[1]
+
+
+def feature_kinds(ft_list: list[str]) -> list[str]:
+    """
+    Finds the features needed for a list of features or output columns.
+
+    :param ft_list: a list of features generated by method 'choose_features' or of output column names
+    :return: The features in the order of their first appearance.
+    """
+    if not is_columns(ft_list):
+        return ft_list
+    return list(dict.fromkeys(split_column(x)[1] for x in ft_list))
+
+
+def feature_names(ft_list: list[str], columns: list[str]) -> list[str]:
+    """
+    Builds the names of the output columns the same way tsfresh does: channel first, then the features in the order
+    passed and after that their parameters.
+
+    :param ft_list: a list of features generated by method 'choose_features'
+    :param columns: The names of the channels the features are computed on.
+    :return: The list of all output column names.
+    """
+    suffixes: list[str] = []
+    for kind in ft_list:
+        if FEATURE_PARAMETERS[kind] is None:
+            suffixes.append(kind)
+            continue
+        for param in FEATURE_PARAMETERS[kind]:
+            suffixes.append(kind + "__" + "__".join(k + "_" + str(v) for k, v in sorted(param.items())))
+    return [str(c) + "__" + s for c in columns for s in suffixes]
+
+
+def float_dtype(dtypes) -> np.dtype:
+    """
+    Chooses the floating point type to compute in: float32 if all of the passed types are float32 (compact mode),
+    else float64.
+
+    :param dtypes: The types of the input columns, e.g. the dtypes of a data frame.
+    :return: The floating point type.
+    """
+    dtypes = list(dtypes)
+    if len(dtypes) > 0 and all(np.dtype(x) == np.float32 for x in dtypes):
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def count_windows(data: Union[list[DataFrame], list[WindowBlock]]) -> int:
+    """
+    Counts the windows contained in a list of data frames or window blocks.
+
+    :param data: Either a list of data frames, each one being one window, or a list of window blocks.
+    :return: The number of windows.
+    """
+    return sum(x.windows.shape[0] if isinstance(x, tuple) else 1 for x in data)
+
+
+def slide(values: np.ndarray, size: int, step: int) -> np.ndarray:
+    """
+    Creates a read-only view of all windows on a two dimensional array without copying any data.
+
+    :param values: A C contiguous array shaped (data points, channels).
+    :param size: How many data points a window contains.
+    :param step: How many data points lie between the beginnings of two consecutive windows.
+    :return: An array shaped (windows, size, channels) sharing its memory with values.
+    """
+    return sliding_window_view(values, size, axis=0)[::step].transpose(0, 2, 1)
+
+
+def majority_labels(labels: np.ndarray, size: int, step: int) -> np.ndarray:
+    """
+    Finds the most frequent label of every window in one pass over all windows. Ties are resolved in favour of the
+    label occurring first inside the window, just like value_counts().index[0] does.
+
+    :param labels: The label of every data point.
+    :param size: How many data points a window contains.
+    :param step: How many data points lie between the beginnings of two consecutive windows.
+    :return: An array containing one label per window.
+    """
+    starts = np.arange(0, labels.shape[0] - size + 1, step)
+    uniques, codes = np.unique(labels, return_inverse=True)
+    one_hot = np.zeros((labels.shape[0] + 1, uniques.shape[0]), dtype=np.int64)
+    one_hot[np.arange(1, labels.shape[0] + 1), codes] = 1
+    counts = np.cumsum(one_hot, axis=0)
+    counts = counts[starts + size] - counts[starts]
+    # The position of the next occurrence of every label, looking from every data point onwards.
+    positions = np.where(one_hot[1:] == 1, np.arange(labels.shape[0])[:, None], labels.shape[0])
+    next_occurrence = np.minimum.accumulate(positions[::-1], axis=0)[::-1]
+    score = counts * (labels.shape[0] + 1) - next_occurrence[starts]
+    return uniques[np.argmax(score, axis=1)]
+
+
+def to_blocks(data: list[DataFrame]) -> list[WindowBlock]:
+    """
+    Stacks consecutive data frames of equal shape and equal columns into window blocks.
+
+    :param data: A list of pandas DataFrame objects, each one containing a single window.
+    :return: A list of window blocks which contains all the windows in their original order.
+    """
+    blocks: list[WindowBlock] = []
+    start = 0
+    for i in range(1, len(data) + 1):
+        if i < len(data) and data[i].shape == data[start].shape and data[i].columns.equals(data[start].columns):
+            continue
+        dtype = float_dtype(data[start].dtypes)
+        windows = np.stack([x.to_numpy(dtype=dtype) for x in data[start:i]])
+        blocks.append(WindowBlock(windows, list(data[start].columns)))
+        start = i
+    return blocks
+
+
+def to_frames(data: Union[list[DataFrame], list[WindowBlock]]) -> list[DataFrame]:
+    """
+    Turns window blocks back into one data frame per window, which is what tsfresh needs.
+
+    :param data: Either a list of data frames, each one being one window, or a list of window blocks.
+    :return: A list containing one data frame per window.
+    """
+    if len(data) == 0 or not isinstance(data[0], tuple):
+        return data
+    return [DataFrame(w, columns=b.columns) for b in data for w in b.windows]
+
+
+def extract(ft_list: list[str], data: Union[list[DataFrame], list[WindowBlock]]) -> DataFrame:
+    """
+    Computes all the passed features on all windows passed.
+
+    :param ft_list: a list of features generated by method 'choose_features' or of output column names. All of them
+                    must be supported.
+    :param data: Either a list of data frames, each one being one window, or a list of window blocks.
+    :return: A data frame containing one row per window, indexed starting with 1 like tsfresh does.
+    """
+    blocks = data if len(data) > 0 and isinstance(data[0], tuple) else to_blocks(data)
+    if is_columns(ft_list):
+        results = [DataFrame(compute_columns(ft_list, b), columns=ft_list) for b in blocks]
+    else:
+        results = [DataFrame(np.concatenate([compute(ft_list, b.windows[i:i + _WINDOW_CHUNK])
+                                             for i in range(0, b.windows.shape[0], _WINDOW_CHUNK)]),
+                             columns=feature_names(ft_list, b.columns)) for b in blocks]
+    output = results[0] if len(results) == 1 else concat(results, ignore_index=True)
+    output.index = np.arange(1, output.shape[0] + 1)
+    return output
+
+
+def compute(ft_list: list[str], windows: np.ndarray) -> np.ndarray:
+    """
+    Computes the passed features over a stack of windows.
+
+    :param ft_list: a list of features generated by method 'choose_features'. All of them must be supported.
+    :param windows: An array shaped (windows, window length, channels).
+    :return: A two dimensional array with one row per window and its columns ordered like feature_names orders them.
+             It has the type of the windows, if they are float32, else float64.
+    """
+    n, length, channels = windows.shape
+    dtype = float_dtype([windows.dtype])
+    parts: list[np.ndarray] = []
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for kind in ft_list:
+            parts.append(_CALCULATORS[kind](windows).reshape(n, channels, -1).astype(dtype, copy=False))
+    return np.concatenate(parts, axis=2).reshape(n, -1)
+
+
+def compute_columns(columns: list[str], block: WindowBlock) -> np.ndarray:
+    """
+    Computes single output columns over a block of windows. Every feature is computed on the channels it is needed for
+    only, and features not needed at all are skipped.
+
+    :param columns: The output column names as built by feature_names.
+    :param block: The windows.
+    :return: A two dimensional array with one row per window and one column per column name.
+    """
+    index = {str(c): i for i, c in enumerate(block.columns)}
+    wanted: dict[str, list[tuple[int, str]]] = {}
+    for position, name in enumerate(columns):
+        channel, kind = split_column(name)
+        if channel not in index:
+            raise ValueError("The data lacks channel " + channel + ".")
+        wanted.setdefault(kind, []).append((position, channel))
+    n = block.windows.shape[0]
+    output = np.empty((n, len(columns)), dtype=float_dtype([block.windows.dtype]))
+    for kind, places in wanted.items():
+        channels = list(dict.fromkeys(channel for _, channel in places))
+        selected = [index[c] for c in channels]
+        values = np.concatenate([compute([kind], block.windows[i:i + _WINDOW_CHUNK][:, :, selected])
+                                 for i in range(0, n, _WINDOW_CHUNK)]) if n > 0 else \
+            np.empty((0, len(feature_names([kind], channels))))
+        lookup = {name: j for j, name in enumerate(feature_names([kind], channels))}
+        for position, _ in places:
+            output[:, position] = values[:, lookup[columns[position]]]
+    return output
+
+
+def _minimum(windows: np.ndarray) -> np.ndarray:
+    return windows.min(axis=1)
+
+
+def _maximum(windows: np.ndarray) -> np.ndarray:
+    return windows.max(axis=1)
+
+
+def _variance(windows: np.ndarray) -> np.ndarray:
+    return windows.var(axis=1)
+
+
+def _abs_energy(windows: np.ndarray) -> np.ndarray:
+    return np.einsum("nwc,nwc->nc", windows, windows)
+
+
+def _mean(windows: np.ndarray) -> np.ndarray:
+    return windows.mean(axis=1)
+
+
+def _quantile(windows: np.ndarray) -> np.ndarray:
+    qs = [p["q"] for p in FEATURE_PARAMETERS["quantile"]]
+    return np.moveaxis(np.quantile(windows, qs, axis=1), 0, -1)
+
+
+def _central_sums(windows: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Higher moments cancel out too much in float32, so they are always computed in float64.
+    windows = windows.astype(np.float64, copy=False)
+    adjusted = windows - windows.mean(axis=1, keepdims=True)
+    adjusted2 = adjusted ** 2
+    return adjusted2.sum(axis=1), (adjusted2 * adjusted).sum(axis=1), (adjusted2 ** 2).sum(axis=1)
+
+
+def _zero_out_fperr(values: np.ndarray) -> np.ndarray:
+    return np.where(np.abs(values) < 1e-14, 0, values)
+
+
+def _skewness(windows: np.ndarray) -> np.ndarray:
+    m2, m3, _ = _central_sums(windows)
+    return skewness_from_sums(windows.shape[1], m2, m3)
+
+
+def _kurtosis(windows: np.ndarray) -> np.ndarray:
+    m2, _, m4 = _central_sums(windows)
+    return kurtosis_from_sums(windows.shape[1], m2, m4)
+
+
+def skewness_from_sums(count: int, m2: np.ndarray, m3: np.ndarray) -> np.ndarray:
+    """
+    Computes the skewness out of the sums of the squared and cubed deviations from the mean, with the same formula and
+    the same corner cases as pandas.Series.skew, which tsfresh uses.
+
+    :param count: The number of data points per window.
+    :param m2: The sums of the squared deviations.
+    :param m3: The sums of the cubed deviations.
+    :return: The skewness of every window.
+    """
+    m2, m3 = _zero_out_fperr(m2), _zero_out_fperr(m3)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = (count * (count - 1) ** 0.5 / (count - 2)) * (m3 / m2 ** 1.5) if count > 2 else np.zeros_like(m2)
+    result = np.where(m2 == 0, 0, result)
+    if count < 3:
+        result[...] = np.nan
+    return result
+
+
+def kurtosis_from_sums(count: int, m2: np.ndarray, m4: np.ndarray) -> np.ndarray:
+    """
+    Computes the kurtosis out of the sums of the squared and the fourth powers of the deviations from the mean, with
+    the same formula and the same corner cases as pandas.Series.kurtosis, which tsfresh uses.
+
+    :param count: The number of data points per window.
+    :param m2: The sums of the squared deviations.
+    :param m4: The sums of the fourth powers of the deviations.
+    :return: The kurtosis of every window.
+    """
+    if count < 4:
+        return np.full_like(m2, np.nan)
+    adj = 3 * (count - 1) ** 2 / ((count - 2) * (count - 3))
+    numerator = _zero_out_fperr(count * (count + 1) * (count - 1) * m4)
+    denominator = _zero_out_fperr((count - 2) * (count - 3) * m2 ** 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denominator == 0, 0, numerator / denominator - adj)
+
+
+def _ar_coefficient(windows: np.ndarray) -> np.ndarray:
+    """
+    Fits an AR(k) process with constant by least squares for every window and channel like statsmodels' AutoReg does
+    for tsfresh. Instead of one pseudo inverse of the lag matrix per series, the normal equations of all series are
+    accumulated at once from a strided view and solved through a batched pseudo inverse of the tiny gram matrices.
+    """
+    k = FEATURE_PARAMETERS["ar_coefficient"][0]["k"]
+    n, length, channels = windows.shape
+    series = np.ascontiguousarray(windows.transpose(0, 2, 1), dtype=np.float64).reshape(n * channels, length)
+    params = np.full((series.shape[0], k + 1), np.nan)
+    if length - k < k + 1:
+        # AutoReg refuses to fit with fewer observations than parameters, tsfresh then reports NaN for the first k
+        # coefficients and 0 for the last one.
+        params[:, k] = 0
+    else:
+        for start in range(0, series.shape[0], _AR_CHUNK):
+            x = series[start:start + _AR_CHUNK]
+            lagged = sliding_window_view(x, k + 1, axis=1)
+            y = lagged[:, :, k]
+            lags = lagged[:, :, k - 1::-1]
+            gram = np.empty((x.shape[0], k + 1, k + 1))
+            gram[:, 0, 0] = y.shape[1]
+            gram[:, 0, 1:] = lags.sum(axis=1)
+            gram[:, 1:, 0] = gram[:, 0, 1:]
+            gram[:, 1:, 1:] = np.einsum("smi,smj->sij", lags, lags)
+            moment = np.empty((x.shape[0], k + 1))
+            moment[:, 0] = y.sum(axis=1)
+            moment[:, 1:] = np.einsum("smi,sm->si", lags, y)
+            params[start:start + _AR_CHUNK] = np.einsum("sij,sj->si", np.linalg.pinv(gram, rcond=1e-15), moment)
+    coeffs = [p["coeff"] for p in FEATURE_PARAMETERS["ar_coefficient"]]
+    return params[:, coeffs].reshape(n, channels, len(coeffs))
+
+
+_CALCULATORS = {
+    "minimum": _minimum,
+    "maximum": _maximum,
+    "variance": _variance,
+    "abs_energy": _abs_energy,
+    "mean": _mean,
+    "quantile": _quantile,
+    "skewness": _skewness,
+    "kurtosis": _kurtosis,
+    "ar_coefficient": _ar_coefficient
+}
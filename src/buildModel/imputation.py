@@ -0,0 +1,157 @@
+# coding=utf-8
+"""
+This file contains the imputation engine. Its imputators fill the gaps of sensor data and of features, i.e. NaN and
+infinite values, in place on the numpy arrays holding them, so neither the data nor a data frame is copied for this.
+
+MEAN fills a gap with the mean of the finite values of its column. FORWARD_FILL takes the last finite value before the
+gap, or the first one after it at the start of a column. LINEAR interpolates linearly in time between the finite values
+around the gap and holds the values at both ends. Columns without any finite value become zero with every strategy.
+
+The imputators look like the ones of sklearn.impute, so they can be cloned and stand in wherever those do. Unlike those,
+they learn nothing in fit: every array is imputed from its own values.
+"""
+from typing import Optional
+
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+
+
+class Imputator(BaseEstimator, TransformerMixin):
+    """
+    This is the base class of the imputators of the engine.
+    """
+
+    # Whether the imputator relies on the order of the rows, i.e. the rows have to be points in time.
+    time_series = False
+
+    def fit(self, x, y=None) -> "Imputator":
+        """
+        Does nothing, as there is nothing to learn.
+
+        :param x: The data to impute later.
+        :param y: Ignored.
+        :return: This imputator.
+        """
+        return self
+
+    def transform(self, x) -> np.ndarray:
+        """
+        Imputes a copy of the data, as sklearn.impute imputers do.
+
+        :param x: The data, one column per channel or feature.
+        :return: The imputed copy as an array of the float type of the data, or float64 for other data.
+        """
+        values = np.array(x, copy=True)
+        if not np.issubdtype(values.dtype, np.floating):
+            values = values.astype(np.float64)
+        self.impute_in_place(values)
+        return values
+
+    def impute_in_place(self, values: np.ndarray, times: Optional[np.ndarray] = None) -> int:
+        """
+        Imputes an array in place. Finding the gaps and replacing infinite values is one single pass over the data; its
+        only temporary of the size of the data is a boolean mask of the gaps.
+
+        :param values: The writeable float array to impute, rows by columns. A one-dimensional array is one column.
+        :param times: The ascending points in time of the rows, if they are not equally spaced. Only LINEAR uses them.
+        :return: The number of values filled in.
+        """
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        gaps = ~np.isfinite(values)
+        filled = int(np.count_nonzero(gaps))
+        if filled > 0:
+            self._fill(values, gaps, times)
+        return filled
+
+    def _fill(self, values: np.ndarray, gaps: np.ndarray, times: Optional[np.ndarray]) -> None:
+        raise NotImplementedError
+
+
+class MeanImputator(Imputator):
+    """
+    This imputator fills gaps with the mean of their column.
+    """
+
+    def _fill(self, values: np.ndarray, gaps: np.ndarray, times: Optional[np.ndarray]) -> None:
+        # Zeroing the gaps first lets a plain sum add up the finite values only. Sums are float64 even for float32 data.
+        np.copyto(values, 0, where=gaps)
+        counts = values.shape[0] - np.count_nonzero(gaps, axis=0)
+        sums = values.sum(axis=0, dtype=np.float64)
+        means = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+        np.copyto(values, means.astype(values.dtype), where=gaps)
+
+
+class _TimeSeriesImputator(Imputator):
+    """
+    This is the base class of the imputators filling a gap from the values around it in time. They work column by
+    column, and only on the columns having gaps.
+    """
+
+    time_series = True
+
+    def _fill(self, values: np.ndarray, gaps: np.ndarray, times: Optional[np.ndarray]) -> None:
+        if times is not None and not np.issubdtype(times.dtype, np.number):
+            times = None
+        for j in np.flatnonzero(gaps.any(axis=0)):
+            column, column_gaps = values[:, j], gaps[:, j]
+            if column_gaps.all():
+                column[:] = 0
+            else:
+                self._fill_column(column, column_gaps, times)
+
+    def _fill_column(self, column: np.ndarray, gaps: np.ndarray, times: Optional[np.ndarray]) -> None:
+        raise NotImplementedError
+
+    @staticmethod
+    def _neighbours(gaps: np.ndarray, rows: np.ndarray, after: bool) -> np.ndarray:
+        """
+        Finds the finite values next to gaps with one scratch array of positions as long as the column.
+
+        :param gaps: The mask of the gaps of a column.
+        :param rows: The positions of the gaps.
+        :param after: Whether to look for the next finite value instead of the last one before.
+        :return: The position of that value for every gap, -1 if there is none before and the length of the column if
+                 there is none after.
+        """
+        positions = np.arange(gaps.shape[0])
+        if after:
+            positions[gaps] = gaps.shape[0]
+            np.minimum.accumulate(positions[::-1], out=positions[::-1])
+        else:
+            positions[gaps] = -1
+            np.maximum.accumulate(positions, out=positions)
+        return positions[rows]
+
+
+class ForwardFillImputator(_TimeSeriesImputator):
+    """
+    This imputator fills gaps with the last value before them.
+    """
+
+    def _fill_column(self, column: np.ndarray, gaps: np.ndarray, times: Optional[np.ndarray]) -> None:
+        rows = np.flatnonzero(gaps)
+        before = self._neighbours(gaps, rows, False)
+        # Leading gaps take the first finite value instead.
+        before[before < 0] = np.argmin(gaps)
+        column[rows] = column[before]
+
+
+class LinearImputator(_TimeSeriesImputator):
+    """
+    This imputator interpolates gaps linearly between the values before and after them.
+    """
+
+    def _fill_column(self, column: np.ndarray, gaps: np.ndarray, times: Optional[np.ndarray]) -> None:
+        rows = np.flatnonzero(gaps)
+        before, after = self._neighbours(gaps, rows, False), self._neighbours(gaps, rows, True)
+        # Gaps at the ends hold the value next to them.
+        before = np.where(before < 0, after, before)
+        after = np.where(after == gaps.shape[0], before, after)
+        if times is None:
+            time, start, end = rows, before, after
+        else:
+            time, start, end = times[rows], times[before], times[after]
+        span = (end - start).astype(np.float64)
+        weights = np.divide(time - start, span, out=np.zeros_like(span), where=span != 0)
+        column[rows] = column[before] + weights * (column[after] - column[before])
@@ -0,0 +1,201 @@
+# coding=utf-8
+"""
+This file contains the instrumentation of the stages of a job like building or applying a model: wall time, CPU time,
+peak memory and whatever a stage counts, e.g. rows, windows or features.
+
+The measurements are written to stderr as one json object per line and stage, if switched on by option emit of
+section METRICS of the config file or by environment variable KIAPP_METRICS=1.
+
+Stages named in environment variable KIAPP_PROFILE (comma-separated, or "all") additionally run under cProfile. Their
+stats are dumped to <job>-<stage>-<pid>.prof in the directory given by KIAPP_PROFILE_DIRECTORY, which defaults to the
+temporary directory of the system.
+"""
+import cProfile
+import json
+import os
+import pstats
+import resource
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, TextIO
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.configReader import ConfigReader
+
+_END = object()
+
+
+def peak_rss() -> float:
+    """
+    :return: The peak resident set size of this process so far in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def _is_true(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class Instrumentation:
+    """
+    This class measures the stages of one job. Measuring is always done, as it is cheap; only emitting the results and
+    profiling are optional.
+    """
+
+    def __init__(self, job: str = "", *, emit: bool = False, store: bool = False, profile: Iterable[str] = (),
+                 profile_directory: Optional[str] = None, stream: Optional[TextIO] = None):
+        """
+        :param job: The name of the job, e.g. "buildModel".
+        :param emit: Whether report writes the measurements to the stream.
+        :param store: Whether the measurements are to be stored along with the model built. Only read by the jobs.
+        :param profile: The names of the stages to profile, "all" for every stage.
+        :param profile_directory: Where to dump the profiles. Defaults to the temporary directory of the system.
+        :param stream: Where report writes to. Defaults to stderr.
+        """
+        self.job = job
+        self.emit = emit
+        self.store = store
+        self.profile = set(profile)
+        self.profile_directory = profile_directory or tempfile.gettempdir()
+        self.stream = stream
+        self._start = (time.perf_counter(), time.process_time(), peak_rss())
+        self._records: dict[str, dict[str, Any]] = {}
+        self._profiles: dict[str, list[cProfile.Profile]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, job: str) -> "Instrumentation":
+        """
+        Creates the instrumentation of a job as configured in section METRICS of the config file and the environment.
+
+        :param job: The name of the job.
+        :return: The instrumentation.
+        """
+        config = ConfigReader()
+        emit = os.environ.get("KIAPP_METRICS", config.get_value("METRICS", "emit") or "false")
+        store = config.get_value("METRICS", "store") or "false"
+        profile = [x.strip() for x in os.environ.get("KIAPP_PROFILE", "").split(",") if x.strip() != ""]
+        return cls(job, emit=_is_true(emit), store=_is_true(store), profile=profile,
+                   profile_directory=os.environ.get("KIAPP_PROFILE_DIRECTORY"))
+
+    @contextmanager
+    def stage(self, name: str, **counts: int) -> Iterator[dict[str, Any]]:
+        """
+        Measures a stage run by the calling thread, including the peak memory it adds.
+
+        :param name: The name of the stage. Running a stage several times adds up the measurements.
+        :param counts: Initial counts of the stage. More can be added to the dict handed out, e.g. record["rows"] += 5.
+        :return: A context manager handing out the counts of the stage.
+        """
+        record = dict(counts)
+        rss = peak_rss()
+        with self._measure(name, record, time.process_time):
+            yield record
+        record["peakRssDeltaMb"] = peak_rss() - rss
+        self._add(name, record)
+
+    @contextmanager
+    def accumulate(self, name: str, **counts: int) -> Iterator[dict[str, Any]]:
+        """
+        Measures a part of a stage, which may be run by several threads at the same time. The CPU time is the one of the
+        calling thread, the wall times of all parts are added up. There is no memory measurement, as memory is shared.
+
+        :param name: The name of the stage.
+        :param counts: Initial counts of the part, see stage.
+        :return: A context manager handing out the counts of the part.
+        """
+        record = dict(counts)
+        with self._measure(name, record, time.thread_time):
+            yield record
+        self._add(name, record)
+
+    def iterate(self, name: str, iterable: Iterable, count: Callable[[Any], dict[str, int]]) -> Iterator:
+        """
+        Measures the time it takes to produce the items of an iterable, e.g. loading data sets one after the other.
+
+        :param name: The name of the stage.
+        :param iterable: The iterable.
+        :param count: A function returning the counts of an item.
+        :return: An iterator over the items of the iterable.
+        """
+        iterator = iter(iterable)
+        while True:
+            record: dict[str, Any] = {}
+            with self._measure(name, record, time.thread_time):
+                item = next(iterator, _END)
+            if item is _END:
+                # Waiting for the end counts, but is no call.
+                self._add(name, record, 0)
+                return
+            record.update(count(item))
+            self._add(name, record)
+            yield item
+
+    def summary(self) -> dict[str, Any]:
+        """
+        :return: The measurements of all stages so far in the order the stages started, and the total.
+        """
+        wall, cpu, rss = self._start
+        with self._lock:
+            stages = [dict(stage=name, **record) for name, record in self._records.items()]
+        return {"job": self.job, "stages": stages,
+                "total": {"wallSeconds": time.perf_counter() - wall, "cpuSeconds": time.process_time() - cpu,
+                          "peakRssMb": peak_rss(), "peakRssDeltaMb": peak_rss() - rss}}
+
+    def report(self) -> dict[str, Any]:
+        """
+        Writes the measurements, one json object per stage and one for the total, to the stream, if emitting is switched
+        on, and dumps the profiles.
+
+        :return: The summary.
+        """
+        summary = self.summary()
+        if self.emit:
+            stream = self.stream or sys.stderr
+            for record in summary["stages"] + [dict(stage="total", **summary["total"])]:
+                stream.write(json.dumps(dict(job=self.job, **record)) + "\n")
+            stream.flush()
+        with self._lock:
+            profiles, self._profiles = self._profiles, {}
+        for name, runs in profiles.items():
+            pstats.Stats(*runs).dump_stats(os.path.join(self.profile_directory,
+                                                        "%s-%s-%d.prof" % (self.job, name, os.getpid())))
+        return summary
+
+    @contextmanager
+    def _measure(self, name: str, record: dict[str, Any], cpu_time: Callable[[], float]) -> Iterator[None]:
+        with self._lock:
+            # Taking the place here keeps the stages in the order they started.
+            self._records.setdefault(name, {"calls": 0})
+        profile = None
+        if "all" in self.profile or name in self.profile:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Since Python 3.12, only one profiler may be active at a time, so concurrent parts go unprofiled.
+                profile = None
+        wall, cpu = time.perf_counter(), cpu_time()
+        try:
+            yield
+        finally:
+            record["wallSeconds"] = time.perf_counter() - wall
+            record["cpuSeconds"] = cpu_time() - cpu
+            if profile is not None:
+                profile.disable()
+                with self._lock:
+                    self._profiles.setdefault(name, []).append(profile)
+
+    def _add(self, name: str, record: dict[str, Any], calls: int = 1) -> None:
+        with self._lock:
+            total = self._records.setdefault(name, {"calls": 0})
+            total["calls"] += calls
+            for key, value in record.items():
+                total[key] = total.get(key, 0) + value
@@ -0,0 +1,141 @@
+# coding=utf-8
+"""
+This file contains the class InferencePipeline, which is what a model is stored as: everything it takes to get from
+data sets to predictions, resolved and fitted when the model is built.
+
+Classifying used to put that together anew every time: the features were computed for all channels, imputed with an
+imputer fitted on the very data to classify and handed to the scaler in whatever order they came out. A pipeline knows
+the exact feature columns the scaler has been fitted with, in their order, and the training means to fill gaps with, so
+classifying is computing just these columns and one call to predict.
+"""
+import sys
+from pathlib import Path
+from typing import Optional, Union
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+from pandas import DataFrame
+
+from buildModel import featureEngine
+
+
+def column_means(data: DataFrame) -> np.ndarray:
+    """
+    Computes the mean of the finite values of every column, the statistics a pipeline fills gaps with.
+
+    :param data: The features of the training windows.
+    :return: The means as float64, zero for columns without any finite value.
+    """
+    values = data.to_numpy(dtype=np.float64)
+    finite = np.isfinite(values)
+    counts = np.count_nonzero(finite, axis=0)
+    sums = np.where(finite, values, 0).sum(axis=0)
+    return np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+
+class InferencePipeline:
+    """
+    This class bundles the feature columns, the fill values, the scaler and the classifier of a model.
+    """
+
+    def __init__(self, classifier, scaler, columns: Optional[list[str]], fill_values: Optional[np.ndarray] = None,
+                 features: Optional[list[str]] = None):
+        """
+        Creates a pipeline out of fitted parts. Use compile for new models.
+
+        :param classifier: The trained classifier.
+        :param scaler: The fitted scaler.
+        :param columns: The feature columns in the order the scaler has been fitted with. Only models stored before
+                        scalers knew the names of their features lack them; their columns depend on the channels of
+                        the data then, see columns_for.
+        :param fill_values: The value of every column to fill gaps with. If not passed, gaps become zero.
+        :param features: The features as chosen for the model, only needed without columns.
+        """
+        self.classifier = classifier
+        self.scaler = scaler
+        self.columns = None if columns is None else [str(x) for x in columns]
+        self.fill_values = fill_values
+        self.features = features
+
+    @classmethod
+    def compile(cls, classifier, scaler, training_data: DataFrame) -> "InferencePipeline":
+        """
+        Creates the pipeline of a model just built.
+
+        :param classifier: The trained classifier.
+        :param scaler: The scaler fitted on training_data.
+        :param training_data: The imputed, not yet scaled features of the training windows, without labels.
+        :return: The pipeline.
+        """
+        columns = [str(x) for x in getattr(scaler, "feature_names_in_", training_data.columns)]
+        return cls(classifier, scaler, columns, column_means(training_data[columns]))
+
+    @classmethod
+    def from_parts(cls, classifier, scaler, features: list[str]) -> "InferencePipeline":
+        """
+        Creates the pipeline of a model stored as classifier and scaler only. It classifies like those models always
+        did, i.e. gaps become zero.
+
+        :param classifier: The classifier of the model.
+        :param scaler: The scaler of the model.
+        :param features: The features stored with the model.
+        :return: The pipeline.
+        """
+        columns = getattr(scaler, "feature_names_in_", features if featureEngine.is_columns(features) else None)
+        return cls(classifier, scaler, None if columns is None else list(columns), features=features)
+
+    def columns_for(self, channels: list[str]) -> list[str]:
+        """
+        Tells which feature columns this pipeline needs.
+
+        :param channels: The channels of the data to classify, only used if the pipeline lacks columns.
+        :return: The feature columns in the order predict_features expects them.
+        """
+        if self.columns is not None:
+            return self.columns
+        return featureEngine.feature_names(featureEngine.feature_kinds(self.features), channels)
+
+    def channels(self) -> list[str]:
+        """
+        :return: The channels the feature columns are computed on, in the order of their first appearance.
+        """
+        return list(dict.fromkeys(featureEngine.split_column(x)[0] for x in self.columns_for([])))
+
+    def compute(self, data: Union[list[DataFrame], list[featureEngine.WindowBlock]]) -> np.ndarray:
+        """
+        Computes the feature columns, and only those, on every window.
+
+        :param data: The windows, e.g. whole data sets, as data frames or window blocks.
+        :return: The raw features, one row per window and one column per feature column in order.
+        """
+        # Imported here, as buildModel compiles pipelines and thus imports this module.
+        from buildModel.buildModel import compute_features
+        channels = [str(x) for x in data[0].columns] if self.columns is None and len(data) > 0 else []
+        return compute_features(self.columns_for(channels), data).to_numpy()
+
+    def predict_features(self, features: np.ndarray) -> np.ndarray:
+        """
+        Fills the gaps of features, scales them and classifies them.
+
+        :param features: The raw features as compute returns them. Their gaps are filled in place.
+        :return: The label code predicted for every row.
+        """
+        gaps = ~np.isfinite(features)
+        if gaps.any():
+            fill = np.zeros(features.shape[1]) if self.fill_values is None else self.fill_values
+            np.copyto(features, np.broadcast_to(fill.astype(features.dtype), features.shape), where=gaps)
+        # The scaler and the classifier have been fitted on data frames, they check the names of their columns.
+        scaled = self.scaler.transform(features if self.columns is None else
+                                       DataFrame(features, columns=self.columns, copy=False))
+        names = getattr(self.classifier, "feature_names_in_", None)
+        return self.classifier.predict(scaled if names is None else DataFrame(scaled, columns=names, copy=False))
+
+    def predict(self, data: Union[list[DataFrame], list[featureEngine.WindowBlock]]) -> np.ndarray:
+        """
+        Classifies every window.
+
+        :param data: The windows, e.g. whole data sets, see compute.
+        :return: The label code predicted for every window.
+        """
+        return self.predict_features(self.compute(data))
@@ -0,0 +1,94 @@
+# coding=utf-8
+"""
+This file contains the registries of the components a request may name, i.e. scalers, classifiers, imputators and
+feature selectors.
+A registry knows the module and the class of every component by name, but imports the module only once a component is
+actually asked for, so a process never pays for loading components it does not use.
+"""
+import importlib
+import sys
+from pathlib import Path
+from typing import Any
+
+# The imputators are registered as part of package buildModel, which needs to be importable for this.
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+class Registry:
+    """
+    This class maps the names the TypeScript front end uses for a kind of component onto the classes implementing them.
+    """
+
+    def __init__(self, default: tuple[str, str], **components: tuple[str, str]):
+        """
+        Creates a registry.
+
+        :param default: The module and the class name of the component used for unknown names.
+        :param components: The module and the class name of every component, keyed by its name.
+        """
+        self.default = default
+        self.components = dict(components)
+
+    def names(self) -> list[str]:
+        """
+        Returns the names of all registered components.
+
+        :return: The names in the order of registration.
+        """
+        return list(self.components)
+
+    def register(self, name: str, module: str, class_name: str) -> None:
+        """
+        Registers a component or replaces the one registered under the same name.
+
+        :param name: The name of the component, as the front end calls it.
+        :param module: The module containing the class of the component.
+        :param class_name: The name of the class.
+        """
+        self.components[name] = module, class_name
+
+    def load(self, name: str) -> type:
+        """
+        Imports the class of a component.
+
+        :param name: The name of the component. If it is unknown, the default component is taken.
+        :return: The class.
+        """
+        module, class_name = self.components.get(name, self.default)
+        return getattr(importlib.import_module(module), class_name)
+
+    def create(self, name: str, **parameters: Any) -> Any:
+        """
+        Creates a component.
+
+        :param name: The name of the component. If it is unknown, the default component is created.
+        :param parameters: The parameters passed to the constructor.
+        :return: A new object of the class of the component.
+        """
+        return self.load(name)(**parameters)
+
+
+SCALERS = Registry(("sklearn.preprocessing", "StandardScaler"),
+                   MIN_MAX=("sklearn.preprocessing", "MinMaxScaler"),
+                   NORMALIZER=("sklearn.preprocessing", "Normalizer"),
+                   QUANTILE_TRANSFORMER=("sklearn.preprocessing", "QuantileTransformer"),
+                   ROBUST_SCALER=("sklearn.preprocessing", "RobustScaler"),
+                   STANDARD_SCALER=("sklearn.preprocessing", "StandardScaler"))
+
+CLASSIFIERS = Registry(("sklearn.dummy", "DummyClassifier"),
+                       MLP=("sklearn.neural_network", "MLPClassifier"),
+                       RANDOM_FOREST=("sklearn.ensemble", "RandomForestClassifier"),
+                       K_NEIGHBORS=("sklearn.neighbors", "KNeighborsClassifier"),
+                       SVM=("sklearn.svm", "SVC"),
+                       SGD=("sklearn.linear_model", "SGDClassifier"),
+                       NAIVE_BAYES=("sklearn.naive_bayes", "GaussianNB"))
+
+IMPUTATORS = Registry(("sklearn.impute", "SimpleImputer"),
+                      MEAN=("buildModel.imputation", "MeanImputator"),
+                      FORWARD_FILL=("buildModel.imputation", "ForwardFillImputator"),
+                      LINEAR=("buildModel.imputation", "LinearImputator"))
+
+SELECTORS = Registry(("sklearn.feature_selection", "VarianceThreshold"),
+                     VARIANCE=("sklearn.feature_selection", "VarianceThreshold"),
+                     RELEVANCE=("sklearn.feature_selection", "GenericUnivariateSelect"),
+                     IMPORTANCE=("sklearn.feature_selection", "SelectFromModel"))
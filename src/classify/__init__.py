@@ -2,4 +2,4 @@
 """
 This file marks this folder as classify package of this module
 """
-__all__ = ["classify"]
+__all__ = ["classify", "streaming"]
@@ -5,18 +5,23 @@ This file is sort of a function for the TypeScript front end and handles request
 import sys
 from pathlib import Path
 
+import numpy as np
 import pandas
 from pandas import DataFrame
-from sklearn.impute import SimpleImputer
 
-sys.path.append(str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import json
 import os
+from typing import Iterable, Iterator
 
+from buildModel import featureEngine
 from buildModel.buildModel import IllegalArgumentError
-from buildModel.buildModel import extract_features
+from buildModel.buildModel import compute_features
+from buildModel.instrumentation import Instrumentation
+from classify.streaming import StreamingFeatures
 from database.database import Database
+from database.snapshotStore import SnapshotStore
 
 
 def fetch_parameters():
@@ -41,6 +46,17 @@ def fetch_parameters():
 
     There is no checking, if the given values are valid!
 
+    Pass 'compact': true to load the data set in float32, just like buildModel does in compact mode.
+
+    Pass 'resample' and 'resampleInterval' as they have been passed to buildModel, if the model has been built on
+    resampled data sets.
+
+    For classifying a live stream of samples instead of a recorded data set, pass 'stream': true instead of 'dataSet'.
+    The samples are then read from stdin, see classify_stream for their format and the further parameters.
+
+    For classifying several data sets with several classifiers at once, pass the lists of their ids in 'dataSets' and
+    'classifiers' instead of 'dataSet' and 'classifier'. The result is a single json document, see classify_batch.
+
     :return: All the contents of the specified json file as dict.
     """
     if len(sys.argv) < 2:
@@ -50,23 +66,211 @@ def fetch_parameters():
         data: dict = json.load(file)
         file.close()
     os.remove(file_path)
-    if "dataSet" not in data:
+    return check_parameters(data)
+
+
+def check_parameters(data: dict) -> dict:
+    """
+    This method checks whether the execution parameters as described in fetch_parameters are all present.
+
+    :param data: The execution parameters as loaded from json.
+    :return: The very same dict.
+    """
+    if "dataSets" in data or "classifiers" in data:
+        if "dataSets" not in data or "classifiers" not in data:
+            raise IndexError()
+        return data
+    if "dataSet" not in data and not data.get("stream", False):
         raise IndexError()
     if "classifier" not in data:
         raise IndexError()
     return data
 
 
-if __name__ == "__main__":
-    exec_params = fetch_parameters()
-    database = Database([exec_params["dataSet"]], 0)
-    data_sets: list[DataFrame] = database.get_data_sets()
-    classifier, scaler, sensors, labels, features = database.get_stuff(exec_params["classifier"])
-    data_sets: DataFrame = extract_features(features, data_sets, [], SimpleImputer())
-    scaled_data = scaler.transform(data_sets)
-    prediction = classifier.predict(scaled_data)
+def classify(exec_params: dict, connection=None, instrumentation: Instrumentation = None) -> list[str]:
+    """
+    This method classifies every window of a data set with a classifier stored in the data base. Its inference
+    pipeline computes the feature columns it has been trained on, fills their gaps with the training means and
+    predicts.
+
+    :param exec_params: The execution parameters as described in fetch_parameters.
+    :param connection: An open data base connection to use. If not passed, a new one is opened.
+    :param instrumentation: Where to measure the stages. If not passed, it is created from the config file. It is
+                            reported when classifying is done.
+    :return: The name of the label predicted for every window in order, "UNKNOWN PATTERN" where there is none.
+    """
+    instrumentation = instrumentation or Instrumentation.from_config("classify")
+    database = Database([exec_params["dataSet"]], 0, connection=connection, compact=exec_params.get("compact", False),
+                        resample=exec_params.get("resample"), resample_interval=exec_params.get("resampleInterval"),
+                        snapshots=SnapshotStore.from_config())
+    try:
+        with instrumentation.stage("get_data_sets") as record:
+            data_sets: list[DataFrame] = database.get_data_sets()
+            record["rows"] = sum(d.shape[0] for d in data_sets)
+        with instrumentation.stage("get_stuff"):
+            pipeline, _, labels, _ = database.get_pipeline(exec_params["classifier"])
+        database.close()
+        with instrumentation.stage("extract_features") as record:
+            featured_data = pipeline.compute(data_sets)
+            record["windows"], record["features"] = featured_data.shape
+        with instrumentation.stage("predict", windows=featured_data.shape[0]):
+            prediction = pipeline.predict_features(featured_data)
+    finally:
+        instrumentation.report()
+        database.close()
+    return label_names(prediction, labels)
+
+
+def classify_batch(exec_params: dict, connection=None, instrumentation: Instrumentation = None) -> dict:
+    """
+    This method classifies several data sets with several classifiers stored in the data base in one go, e.g. for
+    scoring a whole project anew. Every data set is loaded once, and the features all of the classifiers need are
+    extracted once for all data sets. Every classifier then predicts all the data sets at once.
+
+    Every data set is classified exactly as 'classify' would do it on its own, as every classifier fills the gaps of
+    its features with its own training means.
+
+    :param exec_params: The execution parameters as described in fetch_parameters, i.e. 'dataSets' and 'classifiers'.
+    :param connection: An open data base connection to use. If not passed, a new one is opened.
+    :param instrumentation: Where to measure the stages, see 'classify'.
+    :return: The ids of the data sets classified in 'dataSets' and one entry per classifier in 'results', holding its
+             id in 'classifier' and either the names of the labels predicted for every data set in 'predictions',
+             keyed by the id of the data set, or the reason it could not classify them in 'error'.
+    """
+    instrumentation = instrumentation or Instrumentation.from_config("classify")
+    database = Database(exec_params["dataSets"], 0, connection=connection, compact=exec_params.get("compact", False),
+                        resample=exec_params.get("resample"), resample_interval=exec_params.get("resampleInterval"),
+                        snapshots=SnapshotStore.from_config())
+    try:
+        with instrumentation.stage("get_data_sets") as record:
+            data_sets: list[DataFrame] = database.get_data_sets()
+            record["rows"] = sum(d.shape[0] for d in data_sets)
+        ids = [int(d.id) for d in data_sets]
+        # Labels of the data sets are no channels to classify.
+        data_sets = [d.drop(columns="label", errors="ignore") for d in data_sets]
+        models = {}
+        with instrumentation.stage("get_stuff"):
+            for classifier_id in exec_params["classifiers"]:
+                models[classifier_id] = database.get_pipeline(classifier_id)
+        database.close()
+        if len(data_sets) == 0:
+            return {"dataSets": [], "results": [{"classifier": x, "predictions": {}} for x in models]}
+        channels = [str(x) for x in data_sets[0].columns]
+        needed = {i: pipeline.columns_for(channels) for i, (pipeline, _, _, _) in models.items()}
+        # Only the feature columns some classifier needs are computed, and only on channels all data sets have.
+        available = set.intersection(*(set(str(x) for x in d.columns) for d in data_sets))
+        columns = [x for x in dict.fromkeys(x for c in needed.values() for x in c)
+                   if featureEngine.split_column(x)[0] in available]
+        with instrumentation.stage("extract_features") as record:
+            featured_data = compute_features(columns, data_sets) if len(columns) > 0 else \
+                DataFrame(index=np.arange(1, len(data_sets) + 1))
+            record["windows"], record["features"] = featured_data.shape
+        results = []
+        for classifier_id, (pipeline, _, labels, _) in models.items():
+            columns = needed[classifier_id]
+            missing = [x for x in columns if x not in featured_data.columns]
+            if len(missing) > 0:
+                results.append({"classifier": classifier_id, "error": "The data sets lack " + ", ".join(missing)})
+                continue
+            with instrumentation.accumulate("predict", windows=featured_data.shape[0]):
+                prediction = pipeline.predict_features(featured_data[columns].to_numpy())
+            results.append({"classifier": classifier_id,
+                            "predictions": {str(i): [x] for i, x in zip(ids, label_names(prediction, labels))}})
+    finally:
+        instrumentation.report()
+        database.close()
+    return {"dataSets": ids, "results": results}
+
+
+def label_names(prediction: Iterable, labels: dict) -> list[str]:
+    """
+    This method translates predicted label codes into label names.
+
+    :param prediction: The label codes as predicted by a classifier.
+    :param labels: The label table of the classifier.
+    :return: The name of the label of every code in order, "UNKNOWN PATTERN" for -1.
+    """
+    result: list[str] = []
     for x in prediction:
         if x == -1:
-            print("UNKNOWN PATTERN")
+            result.append("UNKNOWN PATTERN")
             continue
-        print(labels[str(x)])
+        result.append(labels[str(x)])
+    return result
+
+
+def classify_stream(exec_params: dict, samples: Iterable[dict], connection=None,
+                    instrumentation: Instrumentation = None) -> Iterator[str]:
+    """
+    This method classifies a stream of samples window by window, as soon as each window is complete. The windows are
+    cut like buildModel cuts the training data, and their features are updated incrementally with every sample.
+
+    Besides 'classifier', these execution parameters are used:
+
+    'slidingWindowSize' and 'slidingWindowStep' need to be the ones the model has been trained with, they default to
+    128 and 64 just like they do in buildModel.
+
+    'channels' lists the names of the values of a sample, which are the column names of the training data, e.g.
+    ["<Sensor> 0", "<Sensor> 1"]. If not passed, they are taken from the feature columns of the model, which lack the
+    channels a feature selection dropped entirely.
+
+    :param exec_params: The execution parameters as described above.
+    :param samples: The samples as dicts in the format of the dataJSON entries, i.e. {"relativeTime": t, "value": [...]}
+                    holding one value per channel. Missing values may be given as null.
+    :param connection: An open data base connection to use. If not passed, a new one is opened.
+    :param instrumentation: Where to measure the stages, see 'classify'. It is reported when the stream ends.
+    :return: An iterator yielding one json object per window, containing the relative times of the first and the last
+             sample of the window in 'start' and 'end' and the predicted label name in 'label'.
+    """
+    instrumentation = instrumentation or Instrumentation.from_config("classify")
+    database = Database([], 0, connection=connection)
+    try:
+        with instrumentation.stage("get_stuff"):
+            pipeline, _, labels, _ = database.get_pipeline(exec_params["classifier"])
+        database.close()
+        channels: list[str] = exec_params.get("channels") or pipeline.channels()
+        # The stream computes the features behind the columns of the model on all channels, the columns are picked
+        # per window.
+        kinds = featureEngine.feature_kinds(pipeline.columns_for(channels))
+        names = featureEngine.feature_names(kinds, channels)
+        positions = {name: i for i, name in enumerate(names)}
+        picked = [positions[x] for x in pipeline.columns_for(channels)]
+        stream = StreamingFeatures(kinds, len(channels), exec_params.get("slidingWindowSize", 128),
+                                   exec_params.get("slidingWindowStep", 64))
+        for sample in samples:
+            with instrumentation.accumulate("extract_features", rows=1) as record:
+                window = stream.push(sample["relativeTime"], [np.NaN if v is None else v for v in sample["value"]])
+                record["windows"] = 0 if window is None else 1
+            if window is None:
+                continue
+            with instrumentation.accumulate("predict", windows=1):
+                prediction = pipeline.predict_features(np.asarray(window.features)[np.newaxis, picked])[0]
+            label = "UNKNOWN PATTERN" if prediction == -1 else labels[str(prediction)]
+            yield json.dumps({"start": window.start, "end": window.end, "label": label})
+    finally:
+        instrumentation.report()
+        database.close()
+
+
+def read_samples(file) -> Iterator[dict]:
+    """
+    This method reads samples for classify_stream, one json object per line. Empty lines are skipped.
+
+    :param file: The text stream to read from, e.g. stdin.
+    :return: An iterator over the samples.
+    """
+    for line in file:
+        if line.strip() != "":
+            yield json.loads(line)
+
+
+if __name__ == "__main__":
+    exec_params = fetch_parameters()
+    if exec_params.get("stream", False):
+        for line in classify_stream(exec_params, read_samples(sys.stdin)):
+            print(line, flush=True)
+    elif "classifiers" in exec_params:
+        print(json.dumps(classify_batch(exec_params)))
+    else:
+        for line in classify(exec_params):
+            print(line)
@@ -0,0 +1,134 @@
+# coding=utf-8
+"""
+This file contains the incremental feature extraction for classifying a stream of samples window by window, as it is
+needed for live sensor data.
+"""
+import sys
+from pathlib import Path
+from typing import NamedTuple, Optional, Sequence
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from buildModel import featureEngine
+
+# These features are derived from running sums that are updated with every sample, all others are computed on the
+# whole window whenever one is complete.
+_INCREMENTAL = ("mean", "variance", "abs_energy", "skewness", "kurtosis")
+
+
+class StreamWindow(NamedTuple):
+    """
+    The features of one complete window of a stream together with the times of its first and its last sample.
+    """
+    start: float
+    end: float
+    features: np.ndarray
+
+
+class StreamingFeatures:
+    """
+    This class keeps the last samples of a stream in a ring buffer of the window size and hands out the features of a
+    window whenever one is complete. The windows are the same ones create_time_slices cuts out of a recorded data set,
+    and so are the features and the order of their values, which is the one of featureEngine.feature_names.
+
+    Every sample costs a constant amount of work: it is written into the ring buffer, and the sums of the first four
+    powers of all values in the window are updated by adding the new sample and removing the one dropped. Mean,
+    variance, energy, skewness and kurtosis follow from these sums directly. The sums are taken relative to a shift
+    close to the mean, which is renewed together with an exact recomputation of the sums once per window length, so
+    rounding errors cannot pile up.
+    """
+
+    def __init__(self, ft_list: list[str], channels: int, window_size: int = 128, window_step: int = 64):
+        """
+        Creates an empty stream.
+
+        :param ft_list: a list of features generated by method 'choose_features'. All of them must be supported by the
+                        feature engine.
+        :param channels: The number of values every sample has.
+        :param window_size: How many samples a window contains.
+        :param window_step: How many samples lie between the beginnings of two consecutive windows. Must lie between 1
+                            and window_size inclusively.
+        """
+        if not featureEngine.supports(ft_list):
+            raise ValueError("Streaming is not supported for features " + str(ft_list) + ".")
+        if window_size < 1 or not 1 <= window_step <= window_size or channels < 1:
+            raise ValueError("Illegal window size, window step or number of channels.")
+        self.ft_list = ft_list
+        self.window_size = window_size
+        self.window_step = window_step
+        self.count = 0
+        self._values = np.zeros((window_size, channels))
+        self._times = np.zeros(window_size)
+        self._position = 0
+        self._last = np.zeros(channels)
+        self._shift = np.zeros(channels)
+        self._sums = np.zeros((4, channels))
+        self._since_exact = 0
+
+    def push(self, time: float, values: Sequence[Optional[float]]) -> Optional[StreamWindow]:
+        """
+        Adds a sample to the stream. Missing values, given as None or NaN, are replaced by the last value of their
+        channel.
+
+        :param time: The relative time of the sample.
+        :param values: One value per channel.
+        :return: The window ending with this sample, if it is complete and due according to the window step, else
+                 None.
+        """
+        x = np.array(values, dtype=np.float64)
+        missing = np.isnan(x)
+        x[missing] = self._last[missing]
+        self._last = x
+        if self.count >= self.window_size:
+            self._sums -= self._powers(self._values[self._position])
+        self._values[self._position] = x
+        self._times[self._position] = time
+        self._sums += self._powers(x)
+        self._position = (self._position + 1) % self.window_size
+        self.count += 1
+        self._since_exact += 1
+        if self.count < self.window_size or (self.count - self.window_size) % self.window_step != 0:
+            return None
+        window = np.concatenate((self._values[self._position:], self._values[:self._position]))
+        if self._since_exact >= self.window_size:
+            self._recompute(window)
+        start = self._times[self._position]
+        end = self._times[self._position - 1]
+        return StreamWindow(float(start), float(end), self._features(window))
+
+    def _powers(self, x: np.ndarray) -> np.ndarray:
+        y = x - self._shift
+        y2 = y * y
+        return np.stack((y, y2, y2 * y, y2 * y2))
+
+    def _recompute(self, window: np.ndarray) -> None:
+        self._shift = window.mean(axis=0)
+        y = window - self._shift
+        y2 = y * y
+        self._sums = np.stack((y.sum(axis=0), y2.sum(axis=0), (y2 * y).sum(axis=0), (y2 * y2).sum(axis=0)))
+        self._since_exact = 0
+
+    def _features(self, window: np.ndarray) -> np.ndarray:
+        n = self.window_size
+        s1, s2, s3, s4 = self._sums
+        mean = s1 / n
+        # The central sums follow from the sums of powers by the binomial theorem.
+        m2 = s2 - s1 * mean
+        m3 = s3 - 3 * mean * s2 + 2 * s1 * mean ** 2
+        m4 = s4 - 4 * mean * s3 + 6 * mean ** 2 * s2 - 3 * s1 * mean ** 3
+        # What is left of a constant window is only rounding noise relative to the values.
+        flat = np.abs(m2) <= 1e-12 * s2
+        m2, m3, m4 = np.where(flat, 0, m2), np.where(flat, 0, m3), np.where(flat, 0, m4)
+        incremental = {
+            "mean": self._shift + mean,
+            "variance": m2 / n,
+            "abs_energy": s2 + 2 * self._shift * s1 + n * self._shift ** 2,
+            "skewness": featureEngine.skewness_from_sums(n, m2, m3),
+            "kurtosis": featureEngine.kurtosis_from_sums(n, m2, m4)
+        }
+        channels = window.shape[1]
+        parts = [incremental[kind].reshape(channels, 1) if kind in _INCREMENTAL else
+                 featureEngine.compute([kind], window[np.newaxis]).reshape(channels, -1) for kind in self.ft_list]
+        return np.concatenate(parts, axis=1).ravel()
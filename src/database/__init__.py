@@ -2,4 +2,4 @@
 """
 This file marks this folder as database package.
 """
-__all__ = ["database"]
\ No newline at end of file
+__all__ = ["artifact", "database", "decoding", "diskStore", "modelCache", "snapshotStore"]
\ No newline at end of file
@@ -0,0 +1,162 @@
+# coding=utf-8
+"""
+This file contains the artifact format the classifiers and scalers are stored in in the Classifiers table.
+
+An artifact is a pickle of protocol 5 whose numeric arrays are taken out of the pickle stream and stored as separate
+segments behind it. The pickle stream and every segment are compressed on their own. Laid out as bytes:
+
+    magic (8 bytes) | format version (1 byte) | length of the header (4 bytes, little endian) | header (json)
+    | compressed pickle stream | compressed segment 1 | ... | compressed segment n
+
+The header lists the compressed and the uncompressed length of the pickle stream and of every segment. If switched on
+in section MODEL_ARTIFACTS of the config file, the segments are decompressed into a file on loading that is
+memory-mapped, so the arrays are not copied into the memory of every process using the model, but share the pages of
+the operating system's file cache. The files are kept for later loads, and the least recently used ones are deleted
+once all of them exceed the size configured. Otherwise, the segments are decompressed into memory.
+
+Rows written before this format existed contain plain pickles, which are recognized by the missing magic and loaded as
+they always have been.
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import zlib
+from typing import Any, Optional
+
+from config.configReader import ConfigReader
+from database import diskStore
+
+MAGIC = b"KIAPPART"
+VERSION = 1
+_PREFIX = struct.Struct("<8sBI")
+# Segments start at multiples of this in the mapped file, so the arrays on top of them are aligned.
+_ALIGNMENT = 64
+
+
+def dumps(obj: Any, level: int = 6) -> bytes:
+    """
+    Serializes an object into an artifact.
+
+    :param obj: The object, e.g. a classifier or a scaler from sklearn.
+    :param level: The zlib compression level from 0 to 9.
+    :return: The artifact.
+    """
+    buffers: list[pickle.PickleBuffer] = []
+    stream = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    parts = [zlib.compress(stream, level)]
+    lengths = [[len(parts[0]), len(stream)]]
+    for buffer in buffers:
+        raw = buffer.raw()
+        parts.append(zlib.compress(raw, level))
+        lengths.append([len(parts[-1]), raw.nbytes])
+    header = json.dumps({"compression": "zlib", "pickle": lengths[0], "segments": lengths[1:]}).encode()
+    return b"".join([_PREFIX.pack(MAGIC, VERSION, len(header)), header] + parts)
+
+
+def loads(blob: bytes, directory: Optional[str] = None, max_size: Optional[int] = None) -> Any:
+    """
+    Deserializes an artifact or a plain pickle.
+
+    :param blob: The artifact or the plain pickle.
+    :param directory: The directory to put the files to memory-map into. If not passed, the one configured in section
+                      MODEL_ARTIFACTS of the config file is used. If it is an empty string or memory mapping is
+                      switched off in the config file, the segments are decompressed into memory instead.
+    :param max_size: The maximum number of bytes the files in directory may occupy. If a new file exceeds it, the least
+                     recently used other files are deleted. If not passed, the directory is not limited, unless it is
+                     the configured one, which is limited as configured.
+    :return: The object.
+    """
+    blob = bytes(blob)
+    if not is_artifact(blob):
+        return pickle.loads(blob)
+    _, version, header_length = _PREFIX.unpack_from(blob)
+    if version > VERSION:
+        raise ValueError("Artifact format version " + str(version) + " is not supported.")
+    header = json.loads(blob[_PREFIX.size:_PREFIX.size + header_length])
+    position = _PREFIX.size + header_length
+    stream = zlib.decompress(blob[position:position + header["pickle"][0]])
+    position += header["pickle"][0]
+    segments = []
+    for compressed, _ in header["segments"]:
+        segments.append((position, compressed))
+        position += compressed
+    if directory is None:
+        directory, max_size = _configured_directory()
+    if not directory or sum(raw for _, raw in header["segments"]) == 0:
+        buffers = [bytearray(zlib.decompress(blob[p:p + c])) for p, c in segments]
+    else:
+        buffers = _map_segments(blob, segments, [raw for _, raw in header["segments"]], directory, max_size)
+    return pickle.loads(stream, buffers=buffers)
+
+
+def is_artifact(blob: bytes) -> bool:
+    """
+    Tells plain pickles and artifacts apart.
+
+    :param blob: The content of a blob column.
+    :return: True, if the blob is an artifact.
+    """
+    return bytes(blob[:len(MAGIC)]) == MAGIC
+
+
+def loaded_size(blob: bytes) -> int:
+    """
+    Estimates how many bytes the object in an artifact or a plain pickle occupies, once it is loaded.
+
+    :param blob: The artifact or the plain pickle.
+    :return: The uncompressed size of the pickle stream and of all segments, or the size of the plain pickle.
+    """
+    if not is_artifact(blob):
+        return len(blob)
+    _, _, header_length = _PREFIX.unpack_from(blob)
+    header = json.loads(bytes(blob[_PREFIX.size:_PREFIX.size + header_length]))
+    return header["pickle"][1] + sum(raw for _, raw in header["segments"])
+
+
+def _configured_directory() -> tuple[Optional[str], Optional[int]]:
+    if ConfigReader().get_value("MODEL_ARTIFACTS", "memory_map") not in ("1", "true", "yes", "on"):
+        return None, None
+    directory, max_size = diskStore.configured("MODEL_ARTIFACTS", "modelArtifacts")
+    return directory, max_size if max_size > 0 else None
+
+
+def _map_segments(blob: bytes, segments: list[tuple[int, int]], raw_lengths: list[int],
+                  directory: str, max_size: Optional[int] = None) -> list[memoryview]:
+    """
+    Decompresses the segments of an artifact into a file, unless it exists already, and memory-maps it read only.
+    The file is named by the hash of the artifact, so every process loading the same model maps the same file.
+    Writing a file evicts the least recently used others beyond max_size.
+    """
+    offsets: list[int] = []
+    size = 0
+    for raw in raw_lengths:
+        offsets.append(size)
+        size += (raw + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+    path = os.path.join(directory, hashlib.sha256(blob).hexdigest() + ".segments")
+    if not os.path.exists(path) or os.path.getsize(path) != size:
+        os.makedirs(directory, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(handle, "wb") as file:
+            for (position, compressed), offset in zip(segments, offsets):
+                file.seek(offset)
+                file.write(zlib.decompress(blob[position:position + compressed]))
+            file.truncate(size)
+        # Replacing is atomic, so concurrent readers never map half written files.
+        os.replace(temporary, path)
+        if max_size is not None:
+            diskStore.evict(diskStore.list_entries(directory, ".segments"), max_size, path)
+    else:
+        os.utime(path)
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    return [view[offset:offset + raw] for offset, raw in zip(offsets, raw_lengths)]
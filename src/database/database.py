@@ -6,16 +6,27 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
+import hashlib
 import json
-import pickle
-from typing import Any
+import weakref
+from typing import Any, Iterator, Optional
 
 import mysql.connector
-import pandas as pd
 import numpy as np
 from pandas import DataFrame
 
+from buildModel.pipeline import InferencePipeline
 from config.configReader import ConfigReader
+from database import artifact
+from database.decoding import COMPACT_DTYPE, align_channels, decode_data_row, resample_channels, smallest_int_dtype
+from database.modelCache import ModelCache
+from database.snapshotStore import SnapshotStore
+
+# The server side prepared statements of every connection, keyed by their query. They are kept per connection, so that
+# all objects of class Database using the same connection, one after another, share them.
+_PREPARED: "weakref.WeakKeyDictionary[Any, dict[str, tuple[str, Any]]]" = weakref.WeakKeyDictionary()
+# The error number of MySQL for statements unknown to the server, e.g. because the connection has been reset.
+_UNKNOWN_STATEMENT = 1243
 
 
 class Database:
@@ -23,23 +34,68 @@ class Database:
     This class bundles together all needed database accessing needed for current plan of python part.
     """
 
-    def __init__(self, data_set_ids: list[int], project_id: int):
+    def __init__(self, data_set_ids: list[int], project_id: int, *, connection=None, compact: bool = False,
+                 resample: Optional[str] = None, resample_interval: Optional[float] = None,
+                 snapshots: Optional[SnapshotStore] = None):
         """
         Creates an object of Database class based on configuration file.
         :param data_set_ids: A list containing the database indices of all of the desired data sets for further
                              processing.
         :param project_id: The running number of the project this process belongs to.
+        :param connection: An open connection to reuse, e.g. one kept by a long-running worker. If not passed, a new
+                           connection is opened as configured in the config file.
+        :param compact: If set, the data sets hold their values as float32 (COMPACT_DTYPE) and their labels in the
+                        smallest integer type fitting all label codes, which roughly halves their memory.
+        :param resample: If set, the channels of every data set are resampled onto a fixed grid with this method (see
+                         decoding.RESAMPLING_METHODS) instead of being aligned on the union of their timestamps.
+        :param resample_interval: The interval of that grid in the unit of the relative times. If not passed, it is
+                                  inferred for every data set from the sampling rate of its fastest channel.
+        :param snapshots: If passed, data sets are opened from this store of decoded data sets instead of being
+                          fetched and decoded again, as long as their data rows are unchanged. Data sets fetched are
+                          put into it.
         """
         self.project_id = project_id
+        self.compact = compact
+        self.resample = resample
+        self.resample_interval = resample_interval
+        self.snapshots = snapshots
         self._labels: dict[int, str] = {}
         self._labels_reversed: dict[str, int] = {}
+        self._label_rows: dict[int, list[dict]] = {}
         self.data_set_ids = data_set_ids
-        config = ConfigReader()
-        db_data = config.get_values("DB")
-        self.data_base = mysql.connector.connect(**db_data)
+        self._owns_connection = connection is None
+        self.data_base = self.connect() if connection is None else connection
         self.data_sets: list[DataFrame] = []
         self.sensor_type_ids: list[int] = []
 
+    @staticmethod
+    def connect():
+        """
+        Opens a new connection to the data base specified in the config file.
+
+        If 'pool_name' is configured, the connection is drawn from a pool of 'pool_size' connections shared by the whole
+        process instead, and closing it hands it back to the pool.
+
+        :return: The connection.
+        """
+        config = ConfigReader()
+        db_data: dict[str, Any] = config.get_values("DB")
+        if db_data.get("pool_name", "") == "":
+            db_data.pop("pool_name", None)
+            db_data.pop("pool_size", None)
+        elif "pool_size" in db_data:
+            db_data["pool_size"] = int(db_data["pool_size"])
+        return mysql.connector.connect(**db_data)
+
+    def close(self) -> None:
+        """
+        Closes the connection of this object, which hands it back to the pool if it has been drawn from one.
+        Connections passed on creation are left open, as they belong to someone else.
+        """
+        if self._owns_connection and self.data_base is not None:
+            self.data_base.close()
+            self.data_base = None
+
     def get_data_sets(self) -> list[DataFrame]:
         """
         This method retrieves all datasets specified by parameter indices from the database specified in config file.
@@ -52,53 +108,184 @@ class Database:
         :return: A tuple containing all data rows found and matching one of the passed data set ids, grouped together
                  by their data set id into pandas Dataframe objects.
         """
-        if len(self.data_sets) > 0:
-            return self.data_sets
+        return list(self.iter_data_sets(keep=True))
+
+    def iter_data_sets(self, data_set_ids: Optional[list[int]] = None, keep: bool = False) -> Iterator[DataFrame]:
+        """
+        This method does the same as get_data_sets, but hands out every data set, labels included, as soon as it is
+        loaded, so that callers can already work on it while the next one is still being fetched.
+
+        All data rows are fetched by one single query ordered by data set and streamed through an unbuffered cursor.
+        Unless keep is set, only the data set currently built and the row in flight are held in memory by this object,
+        so memory stays flat as long as the caller lets go of the data sets handed out. Keep in mind that the connection
+        is busy until the iteration is finished.
+        With a snapshot store, data sets with unchanged data rows are opened from it instead of being fetched.
+
+        If data sets have been collected in the data_sets field before, e.g. by get_data_sets, they are handed out
+        from there without hitting the data base again.
+
+        :param data_set_ids: If passed, only these data sets out of the ones of this object are loaded.
+        :param keep: If set, the data sets are collected in the data_sets field as well. This does not apply, if only
+                     some of the data sets are requested.
+        :return: An iterator over the data sets in ascending order of their ids.
+        """
+        subset = data_set_ids is not None
+        if not subset and len(self.data_sets) > 0:
+            yield from self.data_sets
+            return
+        if subset and len(data_set_ids) == 0:
+            return
+        if self.project_id > 0:
+            self._get_labels()
+
+        found: set[int] = set()
+        ids = self.data_set_ids if data_set_ids is None else data_set_ids
+        loaded = self._fetch_data_sets(ids) if self.snapshots is None else self._open_data_sets(ids)
+        for ds in loaded:
+            found.add(ds.id)
+            if self.project_id > 0:
+                self._apply_labels(ds)
+            if keep and not subset:
+                self.data_sets.append(ds)
+            yield ds
+        if not subset:
+            self.data_set_ids[:] = [i for i in self.data_set_ids if i in found]
+
+    def _fetch_data_sets(self, data_set_ids: list[int]) -> Iterator[DataFrame]:
+        """
+        This PRIVATE method is not meant to be called from outside the class.
+        It fetches data sets from the data base and decodes them, as described in iter_data_sets, without labels.
 
-        cursor = self.data_base.cursor(dictionary=True)
+        :param data_set_ids: The ids of the data sets.
+        :return: An iterator over the data sets in ascending order of their ids.
+        """
         # With this query we select all data rows belonging to the given data sets together with their name and
         # the name of the sensor that was used for them.
-        query = """SELECT dataJSON, 
+        in_list, params = self._in_list(data_set_ids)
+        query = """SELECT datasetID,
+                          dataJSON, 
                           name, 
                           sensorID AS sensorName
                    FROM Datarow
-                   WHERE datasetID = %s"""
-        for i in self.data_set_ids:
-            # Execute query for every single dataset
-            cursor.execute(query, (i, ))
-            data_set: dict[str, dict] = {}
-            times = set()
-
-            # Integrate all the data rows found into the dataset
-            for data_row in cursor.fetchall():
-                name: str = str(data_row["sensorName"]) if data_row["name"] is None else str(data_row["name"])
-                if name in data_set:
-                    i = 0
-                    while name + "R" + str(i) in data_set:
-                        i += 1
-                    name += "R" + str(i)
-                data_rows_loaded = json.loads(data_row["dataJSON"])
-                for index, value in enumerate(data_rows_loaded[0]["value"]):
-                    dr_name = name + " " + str(index)
-                    data_set[dr_name] = {x["relativeTime"]: x["value"][index] for x in data_rows_loaded}
-                    times |= set(data_set[dr_name].keys())
-
-            # Ensure that all data rows feature exactly equal sets of timestamps and in all cases have values there and
-            # that all values are in correct ascending order by timestamp
-            for key in data_set.keys():
-                data_set[key] = {x: np.NaN for x in sorted(times)} | data_set[key]
-
-            if len(data_set) == 0:
-                self.data_set_ids.remove(i)
-            else:
-                ds = pd.DataFrame(data_set)
-                ds.id = i
-                self.data_sets.append(ds)
-        if self.project_id > 0:
-            for x in self.data_sets:
-                x["label"] = -1
-                self._get_labels()
-        return self.data_sets
+                   WHERE datasetID IN """ + in_list + """
+                   ORDER BY datasetID"""
+        cursor = self._execute(query, params)
+        rows: list[dict] = []
+        try:
+            data_row = cursor.fetchone()
+            while data_row is not None:
+                rows.append(data_row)
+                data_row = cursor.fetchone()
+                if data_row is not None and data_row["datasetID"] == rows[0]["datasetID"]:
+                    continue
+                # All rows of this data set have arrived, so it is built and handed out before reading on.
+                ds = self._build_data_set(rows, COMPACT_DTYPE if self.compact else None, self.resample,
+                                          self.resample_interval)
+                rows = []
+                if ds is not None:
+                    yield ds
+        finally:
+            if self.data_base.unread_result:
+                cursor.fetchall()
+
+    def _open_data_sets(self, data_set_ids: list[int]) -> Iterator[DataFrame]:
+        """
+        This PRIVATE method is not meant to be called from outside the class.
+        It opens the data sets with unchanged data rows from the snapshot store and fetches only the others from the
+        data base, which are put into the store then. Checking the data rows takes one query on their digests.
+
+        :param data_set_ids: The ids of the data sets.
+        :return: An iterator over the data sets in ascending order of their ids, without labels.
+        """
+        digests = self.get_data_set_digests(data_set_ids, with_labels=False)
+        settings = {"dtype": str(COMPACT_DTYPE) if self.compact else None, "resample": self.resample,
+                    "resampleInterval": self.resample_interval}
+        # Opening maps the files only, so holding all data sets opened costs next to no memory.
+        opened = {i: self.snapshots.get(i, digests[i], **settings) for i in sorted(digests)}
+        missing = [i for i, ds in opened.items() if ds is None]
+        fetched = self._fetch_data_sets(missing) if len(missing) > 0 else iter(())
+        ds = next(fetched, None)
+        for i in sorted(digests):
+            if opened[i] is not None:
+                yield opened.pop(i)
+            elif ds is not None and ds.id == i:
+                self.snapshots.put(ds, digests[i], **settings)
+                yield ds
+                ds = next(fetched, None)
+
+    def get_data_set_digests(self, data_set_ids: Optional[list[int]] = None,
+                             with_labels: bool = True) -> dict[int, str]:
+        """
+        This method computes a content hash for every data set of this object without transferring its data. It covers
+        the data rows of the data set and, if this object belongs to a project, the labels applied to it. Data sets
+        without any data rows are left out.
+
+        :param data_set_ids: If passed, only these data sets out of the ones of this object are hashed.
+        :param with_labels: If not set, the hash covers the data rows only, i.e. what decoding them depends on.
+        :return: The hex digests keyed by data set id.
+        """
+        if with_labels and self.project_id > 0:
+            self._get_labels()
+        in_list, params = self._in_list(data_set_ids)
+        query = """SELECT datasetID, 
+                          name, 
+                          sensorID AS sensorName, 
+                          MD5(dataJSON) AS digest
+                   FROM Datarow
+                   WHERE datasetID IN """ + in_list
+        cursor = self._execute(query, params)
+        contents: dict[int, list[str]] = {}
+        for row in cursor.fetchall():
+            content = json.dumps([row["name"], row["sensorName"], row["digest"]])
+            contents.setdefault(row["datasetID"], []).append(content)
+        digests: dict[int, str] = {}
+        for i, content in contents.items():
+            labels = [[self._labels_reversed[row["name"]], str(row["start"]), str(row["end"])]
+                      for row in self._label_rows.get(i, [])] if with_labels else []
+            digests[i] = hashlib.sha256(json.dumps([sorted(content), labels]).encode()).hexdigest()
+        return digests
+
+    @staticmethod
+    def _build_data_set(rows: list[dict], dtype: Optional[np.dtype] = None, resample: Optional[str] = None,
+                        resample_interval: Optional[float] = None) -> Optional[DataFrame]:
+        """
+        This PRIVATE method is not meant to be called from outside the class.
+        It builds one data set out of all of its data rows.
+
+        :param rows: The data rows of one single data set as selected in iter_data_sets.
+        :param dtype: The type of the values, see decode_data_row.
+        :param resample: The resampling method, if the data set is to be resampled, see __init__.
+        :param resample_interval: The interval to resample with, see __init__.
+        :return: The data set with its id attribute set or None, if the data rows contain no data at all.
+        """
+        data_set: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        times_replaced: list[np.ndarray] = []
+
+        # Integrate all the data rows found into the dataset
+        for data_row in rows:
+            name: str = str(data_row["sensorName"]) if data_row["name"] is None else str(data_row["name"])
+            if name in data_set:
+                j = 0
+                while name + "R" + str(j) in data_set:
+                    j += 1
+                name += "R" + str(j)
+            times, values = decode_data_row(data_row["dataJSON"], dtype)
+            for index in range(values.shape[1]):
+                dr_name = name + " " + str(index)
+                if dr_name in data_set:
+                    times_replaced.append(data_set[dr_name][0])
+                data_set[dr_name] = times, values[:, index]
+
+        if len(data_set) == 0:
+            return None
+        if resample is not None:
+            # Channels replaced by others are gone, so their timestamps do not matter on a grid.
+            ds = resample_channels(data_set, resample, resample_interval, dtype)
+        else:
+            # All channels are aligned on exactly equal sets of timestamps in correct ascending order.
+            ds = align_channels(data_set, times_replaced, dtype)
+        ds.id = rows[0]["datasetID"]
+        return ds
 
     def get_sensor_type_ids(self) -> list[int]:
         """
@@ -113,12 +300,11 @@ class Database:
         """
         if len(self.sensor_type_ids) > 0:
             return self.sensor_type_ids
-        cursor = self.data_base.cursor(dictionary=True)
+        in_list, params = self._in_list()
         query = """SELECT sensorID AS type
                    FROM Datarow 
-                   WHERE datasetID IN """
-        query += self._tuple_ize_dsi()
-        cursor.execute(query)
+                   WHERE datasetID IN """ + in_list
+        cursor = self._execute(query, params)
         result: set[int] = set()
         for row in cursor.fetchall():
             result.add(row["type"])
@@ -132,68 +318,135 @@ class Database:
         handled here. If there is more than one result with the specified ID, a ValueError is raised, as the database
         is corrupted in this case.
 
+        Models already loaded by this process are taken from the shared ModelCache, as long as their row did not change
+        in the meantime. Finding that out costs one query returning a few checksums instead of the whole model.
+
         :param classifier_id: The id of the classifier in its database table.
         :return: A classifier object and a scaler object bundled together in a tuple.
         """
+        pipeline, sensors, labels, features = self.get_pipeline(classifier_id)
+        return pipeline.classifier, pipeline.scaler, sensors, labels, features
+
+    def get_pipeline(self, classifier_id: int) -> tuple[InferencePipeline, list[int], dict[int, str], list[str]]:
+        """
+        This method retrieves a model as the inference pipeline it has been compiled to, just like get_stuff retrieves
+        its classifier and scaler. Models stored before pipelines existed get one made of their classifier and scaler.
+
+        :param classifier_id: The id of the classifier in its database table.
+        :return: The pipeline, the sensor types, the label table and the features of the model.
+        """
+        cache = ModelCache.shared()
+        if cache is None:
+            pipeline, sensors, labels, features = self._load_stuff(classifier_id)[0]
+        else:
+            # Hashing the artifact blobs would make the server read all of them on every call, costing more than the
+            # cache saves. Rows are written once by put_stuff, so the lengths of the blobs tell a rewritten row apart
+            # well enough, only the small columns are hashed.
+            query = """SELECT CONCAT_WS(':', LENGTH(Classifier), LENGTH(Scaler), MD5(Sensors), MD5(LabelsTable),
+                                        MD5(Features)) AS version
+                       FROM Classifiers WHERE ID = %s"""
+            cursor = self._execute(query, (classifier_id,))
+            result = cursor.fetchall()
+            if cursor.rowcount > 1:
+                raise ValueError
+            version = result[0]["version"]
+            stuff = cache.get(classifier_id, version)
+            if stuff is None:
+                stuff, size = self._load_stuff(classifier_id)
+                cache.put(classifier_id, version, stuff, size)
+            pipeline, sensors, labels, features = stuff
+        # The cached lists and dicts are handed out as copies, so callers cannot change the cache by accident.
+        self.sensor_type_ids, self._labels = list(sensors), dict(labels)
+        self._labels_reversed = {v: k for k, v in self._labels.items()}
+        return pipeline, self.sensor_type_ids, self._labels, list(features)
+
+    def _load_stuff(self, classifier_id: int) -> tuple[tuple[InferencePipeline, list[int], dict[int, str], list[str]],
+                                                       int]:
+        """
+        This PRIVATE method is not meant to be called from outside the class.
+        It reads and deserializes a row of the Classifiers table.
+
+        :param classifier_id: The id of the classifier in its database table.
+        :return: The pipeline, the sensor types, the label table and the features of the row, and next to them an
+                 estimate of the memory the pipeline occupies.
+        """
         query = """SELECT * FROM Classifiers WHERE ID = %s"""
         data_tuple = classifier_id,
-        cursor = self.data_base.cursor(dictionary=True)
-        cursor.execute(query, data_tuple)
+        cursor = self._execute(query, data_tuple)
         result = cursor.fetchall()
         if cursor.rowcount > 1:
             raise ValueError
-        classifier = pickle.loads(result[0]["Classifier"])
-        scaler = pickle.loads(result[0]["Scaler"])
-        self.sensor_type_ids, self._labels = json.loads(result[0]["Sensors"]), json.loads(result[0]["LabelsTable"])
-        self._labels_reversed = {v: k for k, v in self._labels.items()}
+        pipeline = artifact.loads(result[0]["Classifier"])
+        sensors, labels = json.loads(result[0]["Sensors"]), json.loads(result[0]["LabelsTable"])
         features = json.loads(result[0]["Features"])
-        return classifier, scaler, self.sensor_type_ids, self._labels, features
+        size = artifact.loaded_size(result[0]["Classifier"])
+        if not isinstance(pipeline, InferencePipeline):
+            # Rows written before pipelines existed hold the classifier and the scaler only.
+            pipeline = InferencePipeline.from_parts(pipeline, artifact.loads(result[0]["Scaler"]), features)
+            size += artifact.loaded_size(result[0]["Scaler"])
+        return (pipeline, sensors, labels, features), size
 
-    def put_stuff(self, classifier, scaler, sensors: list[int] = None, *, features: list[str]) -> int:
+    def put_stuff(self, pipeline: InferencePipeline, sensors: list[int] = None, *, features: list[str]) -> int:
         """
-        This method puts a classifier, a scaler, the label-to-number association table and the list of sensor types
-        that were used when collecting the data for the data sets used in the training of the ai model into the
+        This method puts the inference pipeline of a model, the label-to-number association table and the list of sensor
+        types that were used when collecting the data for the data sets used in the training of the ai model into the
         corresponding data base table.
 
+        The pipeline is stored in column Classifier in the compressed artifact format. Its scaler goes to column Scaler
+        on its own as well, as that column must not be empty.
+
         :param features: The features that were extracted from the model training data.
-        :param classifier: A classifier from sklearn. It is then pickled and stored.
-        :param scaler: The scaler that was used to transform the training data for the classifier passed right before.
+        :param pipeline: The pipeline bundling the classifier from sklearn, the scaler that was used to transform the
+                         training data for it, the feature columns and the values to fill their gaps with.
         :param sensors: The ids of the types of the sensors used for collecting the data that was used to train the
-                        classifier passed as first parameter and the scaler passed as second one.
+                        classifier and the scaler of the pipeline.
                         If not passed, the list stored in this object is used, as long as it is not empty. In the latter
                         case, the list is internally collected.
         :return: The Id of the classifier ("AI model ID").
         """
         query = """INSERT INTO Classifiers (Classifier, Scaler, Sensors, LabelsTable, ProjectID, Features) 
         VALUES (%s, %s, %s, %s, %s, %s)"""
-        cursor = self.data_base.cursor()
         self._get_labels()
         if sensors is None:
             sensors = self.get_sensor_type_ids()
-        cursor.execute(query,
-                       (pickle.dumps(classifier),
-                        pickle.dumps(scaler),
-                        json.dumps(sensors),
-                        json.dumps(self._labels),
-                        self.project_id,
-                        json.dumps(features)))
+        cursor = self._execute(query,
+                               (artifact.dumps(pipeline),
+                                artifact.dumps(pipeline.scaler),
+                                json.dumps(sensors),
+                                json.dumps(self._labels),
+                                self.project_id,
+                                json.dumps(features)))
         self.data_base.commit()
         return cursor.lastrowid
 
+    def put_metrics(self, model_id: int, metrics: dict) -> None:
+        """
+        This method stores the measurements taken while building a model next to the model, in column Metrics of the
+        Classifiers table. That column is optional, so this is only done if option store of section METRICS of the
+        config file is set.
+
+        :param model_id: The id of the classifier as returned by put_stuff.
+        :param metrics: The measurements, e.g. Instrumentation.summary(). They are stored as json.
+        """
+        self._execute("""UPDATE Classifiers SET Metrics = %s WHERE ID = %s""", (json.dumps(metrics), model_id))
+        self.data_base.commit()
+
     def _get_labels(self) -> None:
         """
         This PRIVATE method is not meant to be called from outside the class.
         It gathers information about labels on the data requested via this specific instance of this class.
-        It also applies them onto the data sets.
+        It also applies them onto the data sets already loaded.
+
+        If a label table is set already, i.e. the one of a model loaded by get_stuff, it is kept, so the labels of
+        the data sets get the codes that model knows. Labels missing in that table raise a value error then.
 
         If there are no labels provided for the data in question, a value error is raised.
         """
-        if len(self._labels) > 0:
+        if len(self._label_rows) > 0:
             return
-        query = """SELECT datasetID, name, start, end FROM Label WHERE datasetID IN """
-        query += self._tuple_ize_dsi()
-        cursor = self.data_base.cursor(dictionary=True)
-        cursor.execute(query)
+        in_list, params = self._in_list()
+        query = """SELECT datasetID, name, start, end FROM Label WHERE datasetID IN """ + in_list
+        cursor = self._execute(query, params)
         label_names: set[str] = set()
         result = cursor.fetchall()
         if len(result) == 0:
@@ -201,20 +454,82 @@ class Database:
         for row in result:
             row["name"] = row["name"].strip().casefold().upper()  # This ensures unified all-uppercase format
             label_names.add(row["name"])
-        self._labels = {k: v for k, v in enumerate(sorted(label_names))}
-        self._labels_reversed = {v: k for k, v in enumerate(sorted(label_names))}
+        if len(self._labels) == 0:
+            self._labels = {k: v for k, v in enumerate(sorted(label_names))}
+        else:
+            # Tables loaded from json have strings as keys.
+            self._labels = {int(k): v for k, v in self._labels.items()}
+            unknown = label_names.difference(self._labels.values())
+            if len(unknown) > 0:
+                raise ValueError("Labels missing in the label table: " + ", ".join(sorted(unknown)))
+        self._labels_reversed = {v: k for k, v in self._labels.items()}
+        self._label_rows = {}
+        for row in result:
+            self._label_rows.setdefault(row["datasetID"], []).append(row)
         for ds in self.data_sets:
-            if "label" not in ds.columns:
-                ds["label"] = -1
-            timestamps = list(ds.index)
-            for row in result:
-                if row["datasetID"] == ds.id:
-                    new_label = []
-                    for k, v in zip(timestamps, ds["label"]):
-                        new_label.append(self._labels_reversed[row["name"]] if row["start"] <= k <= row["end"] else v)
-                    ds["label"] = new_label
-                else:
-                    continue
+            self._apply_labels(ds)
+
+    def _apply_labels(self, ds: DataFrame) -> None:
+        """
+        This PRIVATE method is not meant to be called from outside the class.
+        It applies the labels gathered by _get_labels onto a single data set. Every label covers all timestamps between
+        its start and its end inclusively, which are found by binary search on the sorted index. If labels overlap, the
+        one coming later wins.
+
+        :param ds: The data set to label. Its id attribute must be set.
+        """
+        if "label" not in ds.columns:
+            ds["label"] = -1
+        timestamps = ds.index.to_numpy()
+        new_label = ds["label"].to_numpy(copy=True)
+        if self.compact:
+            new_label = new_label.astype(smallest_int_dtype(-1, len(self._labels) - 1))
+        ordered = ds.index.is_monotonic_increasing
+        for row in self._label_rows.get(ds.id, []):
+            code = self._labels_reversed[row["name"]]
+            if ordered:
+                new_label[np.searchsorted(timestamps, row["start"], side="left"):
+                          np.searchsorted(timestamps, row["end"], side="right")] = code
+            else:
+                new_label[(row["start"] <= timestamps) & (timestamps <= row["end"])] = code
+        ds["label"] = new_label
+
+    def _execute(self, query: str, params: tuple = ()):
+        """
+        This PRIVATE method is not meant to be called from outside the class.
+        It executes a query as server side prepared statement with the parameters bound to its placeholders. Every
+        query is prepared only once per connection and reused by all later calls with the same query on it.
 
-    def _tuple_ize_dsi(self) -> str:
-        return str(tuple(self.data_set_ids)) if len(self.data_set_ids) > 1 else "(" + str(self.data_set_ids[0]) + ")"
\ No newline at end of file
+        :param query: The query with %s as placeholders.
+        :param params: The values of the placeholders.
+        :return: The cursor holding the result, which hands out rows as dicts. They have to be read completely before
+                 the next query on the same connection.
+        """
+        statements = _PREPARED.setdefault(getattr(self.data_base, "_cnx", self.data_base), {})
+        if query not in statements:
+            statements[query] = query, self.data_base.cursor(prepared=True, dictionary=True)
+        # The cursor only reuses its statement for the very same string object it has been prepared with.
+        query, cursor = statements[query]
+        try:
+            cursor.execute(query, params)
+        except mysql.connector.Error as error:
+            if error.errno != _UNKNOWN_STATEMENT:
+                raise
+            # The server has forgotten the statement, e.g. after a reconnect, so it is prepared anew.
+            cursor = self.data_base.cursor(prepared=True, dictionary=True)
+            statements[query] = query, cursor
+            cursor.execute(query, params)
+        return cursor
+
+    def _in_list(self, data_set_ids: Optional[list[int]] = None) -> tuple[str, tuple[int, ...]]:
+        """
+        This PRIVATE method is not meant to be called from outside the class.
+        It builds an IN list of placeholders for data set ids. The number of placeholders is rounded up to the next
+        power of two, the last id filling the rest, so that a handful of prepared statements serves all numbers of ids.
+
+        :param data_set_ids: The ids to put into the list. If not passed, those of this object are taken.
+        :return: The IN list including its parentheses and the ids to bind to it.
+        """
+        ids = tuple(self.data_set_ids if data_set_ids is None else data_set_ids)
+        length = 1 << max(len(ids) - 1, 0).bit_length()
+        return "(" + ", ".join(["%s"] * length) + ")", ids + ids[-1:] * (length - len(ids))
@@ -0,0 +1,140 @@
+# coding=utf-8
+"""
+This file contains the columnar decoding of the dataJSON blobs of the Datarow table into pandas DataFrame objects.
+
+The channels of a data set are either aligned on the union of their timestamps or resampled onto a fixed grid. The
+latter keeps unsynchronized sensors from multiplying the rows of a data set with gaps, and it makes a window of a given
+number of rows always cover the same time span.
+"""
+import json
+from typing import Optional
+
+import numpy as np
+from pandas import DataFrame
+
+# The type of the sensor values and features in compact mode, where memory matters more than the last digits.
+COMPACT_DTYPE = np.dtype(np.float32)
+
+# The ways of resampling a channel onto a grid: interpolating linearly between the samples around a point of the grid or
+# taking the last sample at or before it (an as-of join).
+RESAMPLING_METHODS = ("LINEAR", "ASOF")
+
+
+def smallest_int_dtype(low: int, high: int) -> np.dtype:
+    """
+    Finds the smallest signed integer type holding all numbers of a range, e.g. for label codes in compact mode.
+
+    :param low: The smallest number of the range.
+    :param high: The largest number of the range.
+    :return: The integer type.
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def decode_data_row(data_json: str, dtype: Optional[np.dtype] = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Parses one dataJSON blob into a time array and a value array.
+
+    :param data_json: The blob as it is stored in the data base, a list of {"relativeTime": t, "value": [...]} objects.
+    :param dtype: The type of the values, e.g. COMPACT_DTYPE. If not passed, it is chosen by the values.
+    :return: An array of the relative times and a two dimensional array holding one column per channel. The values are
+             integers, if all of them are, else floating point numbers, unless dtype says otherwise.
+    """
+    data_rows_loaded = json.loads(data_json)
+    channels = len(data_rows_loaded[0]["value"])
+    times = np.array([x["relativeTime"] for x in data_rows_loaded])
+    values = np.array([x["value"][:channels] for x in data_rows_loaded])
+    if dtype is not None:
+        values = values.astype(dtype, copy=False)
+    elif values.dtype.kind not in "iuf":
+        values = values.astype(np.float64)
+    return times, values.reshape(len(data_rows_loaded), channels)
+
+
+def align_channels(channels: dict[str, tuple[np.ndarray, np.ndarray]],
+                   extra_times: Optional[list[np.ndarray]] = None, dtype: Optional[np.dtype] = None) -> DataFrame:
+    """
+    Puts all channels onto the sorted union of all of their timestamps and builds one data frame out of them. Where a
+    channel has no value for a timestamp, it gets NaN. If a channel has more than one value for a timestamp, the last
+    one wins.
+
+    :param channels: The time and value arrays of every channel, keyed by column name in the desired column order.
+    :param extra_times: Further timestamps the index has to contain, e.g. those of channels replaced by others.
+    :param dtype: The floating point type of channels with gaps. Defaults to float64.
+    :return: A data frame indexed by the relative times.
+    """
+    times = np.unique(np.concatenate([t for t, _ in channels.values()] + (extra_times or [])))
+    columns: dict[str, np.ndarray] = {}
+    for name, (t, v) in channels.items():
+        unique_t, v = _last_values(t, v)
+        if unique_t.shape[0] == times.shape[0]:
+            columns[name] = v
+            continue
+        column = np.full(times.shape[0], np.NaN, dtype=dtype or np.float64)
+        column[np.searchsorted(times, unique_t)] = v
+        columns[name] = column
+    return DataFrame(columns, index=times)
+
+
+def infer_interval(channels: dict[str, tuple[np.ndarray, np.ndarray]]) -> float:
+    """
+    Infers the sampling interval of a data set as the one of its fastest channel, so resampling onto it loses no
+    detail. The interval of a channel is the median of the differences of its timestamps, which ignores dropouts.
+
+    :param channels: The time and value arrays of every channel.
+    :return: The interval in the unit of the timestamps, or 0 if no channel has two different timestamps.
+    """
+    intervals = [np.median(np.diff(t)) for t in (np.unique(t) for t, _ in channels.values()) if t.shape[0] > 1]
+    return float(min(intervals)) if len(intervals) > 0 else 0.0
+
+
+def resample_channels(channels: dict[str, tuple[np.ndarray, np.ndarray]], method: str = "LINEAR",
+                      interval: Optional[float] = None, dtype: Optional[np.dtype] = None) -> DataFrame:
+    """
+    Puts all channels onto a grid of equally spaced timestamps covering all of their samples and builds one data frame
+    out of them. Points of the grid before the first or after the last sample of a channel get NaN in that channel. If
+    a channel has more than one value for a timestamp, the last one wins.
+
+    :param channels: The time and value arrays of every channel, keyed by column name in the desired column order.
+    :param method: One of RESAMPLING_METHODS.
+    :param interval: The distance of the points of the grid in the unit of the timestamps. If not passed, it is
+                     inferred by infer_interval.
+    :param dtype: The floating point type of the values. Defaults to float64.
+    :return: A data frame indexed by the timestamps of the grid.
+    """
+    if method not in RESAMPLING_METHODS:
+        raise ValueError("Unknown resampling method " + str(method))
+    interval = interval or infer_interval(channels)
+    start = min(t.min() for t, _ in channels.values())
+    end = max(t.max() for t, _ in channels.values())
+    if interval <= 0:
+        # There is a single timestamp only.
+        return align_channels(channels, dtype=dtype or np.float64)
+    times = start + interval * np.arange(int(np.floor((end - start) / interval)) + 1)
+    columns: dict[str, np.ndarray] = {}
+    for name, (t, v) in channels.items():
+        t, v = _last_values(t, v)
+        if method == "LINEAR":
+            column = np.interp(times, t, v, left=np.NaN, right=np.NaN)
+        else:
+            before = np.searchsorted(t, times, side="right") - 1
+            column = v[np.maximum(before, 0)].astype(np.float64)
+            column[(before < 0) | (times > t[-1])] = np.NaN
+        columns[name] = column.astype(dtype or np.float64, copy=False)
+    return DataFrame(columns, index=times)
+
+
+def _last_values(times: np.ndarray, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sorts the samples of a channel by time and drops all but the last one of every timestamp.
+
+    :param times: The timestamps of the samples.
+    :param values: The values of the samples.
+    :return: The unique timestamps in ascending order and their values.
+    """
+    # Looking for the first occurrence in the reversed array finds the last one in the original array.
+    unique_t, last = np.unique(times[::-1], return_index=True)
+    return unique_t, values[times.shape[0] - 1 - last]
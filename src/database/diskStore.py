@@ -0,0 +1,137 @@
+# coding=utf-8
+"""
+This file contains the class DiskStore, the base of the stores keeping entries in a local directory, and the functions
+it is built on, which the model artifacts use on their own.
+
+Every entry is a file or a directory of files whose modification time is its last use. Once all entries together exceed
+the size limit, the least recently used ones are deleted.
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.configReader import ConfigReader
+
+
+def configured(section: str, default_name: str) -> tuple[str, int]:
+    """
+    Reads the directory and the maximum size of a store from a section of the config file.
+
+    :param section: The section, holding the keys directory and max_size_mb.
+    :param default_name: The name of the directory in the temporary directory of the system, if none is configured.
+    :return: The directory and the maximum size in bytes, which is 0 if it is missing or not positive.
+    """
+    config = ConfigReader()
+    directory = config.get_value(section, "directory")
+    if directory is None or directory.strip() == "":
+        directory = os.path.join(tempfile.gettempdir(), default_name)
+    max_size = config.get_value(section, "max_size_mb")
+    if max_size is None or max_size.strip() == "" or float(max_size) <= 0:
+        return directory, 0
+    return directory, int(float(max_size) * 2 ** 20)
+
+
+def list_entries(directory: str, suffix: str) -> list[tuple[float, int, str]]:
+    """
+    Lists the entries of a store.
+
+    :param directory: The directory of the store.
+    :param suffix: The suffix of the names of the entries, everything else in directory is left alone.
+    :return: The time of the last use, the size in bytes and the path of every entry.
+    """
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(suffix):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+            size = sum(x.stat().st_size for x in os.scandir(path)) if os.path.isdir(path) else stat.st_size
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, size, path))
+    return entries
+
+
+def evict(entries: list[tuple[float, int, str]], max_size: int, keep: Optional[str] = None) -> int:
+    """
+    Deletes the least recently used entries, until the rest fits in max_size.
+
+    :param entries: All entries of the store, as list_entries returns them.
+    :param max_size: The maximum number of bytes the entries may occupy.
+    :param keep: The path of an entry that is never deleted, e.g. the one just written.
+    :return: The number of entries deleted.
+    """
+    size = sum(x for _, x, _ in entries)
+    evicted = 0
+    for _, entry_size, path in sorted(entries):
+        if size <= max_size:
+            break
+        if path == keep:
+            continue
+        # Files still mapped by some process stay valid for it after being deleted.
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except OSError:
+            continue
+        size -= entry_size
+        evicted += 1
+    return evicted
+
+
+class DiskStore:
+    """
+    This class is the base of the stores keeping entries in a local directory, see the description of this file. It
+    counts hits, misses and evictions, the subclasses store and look up the entries.
+    """
+
+    # The section of the config file and the name of the default directory of the store.
+    SECTION = ""
+    DEFAULT_NAME = ""
+    # The suffix of the names of the entries.
+    SUFFIX = ""
+
+    def __init__(self, directory: str, max_size: int):
+        """
+        Creates a store.
+
+        :param directory: The directory to store the entries in. It is created if necessary.
+        :param max_size: The maximum number of bytes all entries together may occupy.
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_config(cls) -> Optional["DiskStore"]:
+        """
+        Creates the store as configured in its section of the config file.
+
+        :return: The store or None, if it is switched off by a maximum size of 0 or a missing section.
+        """
+        directory, max_size = configured(cls.SECTION, cls.DEFAULT_NAME)
+        return cls(directory, max_size) if max_size > 0 else None
+
+    def statistics(self) -> dict[str, int]:
+        """
+        Returns the hit and miss statistics of this object together with the current size of the store.
+
+        :return: A dict containing hits, misses, evictions, entries and size in bytes.
+        """
+        entries = list_entries(self.directory, self.SUFFIX)
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "entries": len(entries),
+                "size": sum(size for _, size, _ in entries)}
+
+    def _evict(self) -> None:
+        self.evictions += evict(list_entries(self.directory, self.SUFFIX), self.max_size)
@@ -0,0 +1,128 @@
+# coding=utf-8
+"""
+This file contains the class ModelCache, an in-process cache for classifiers loaded from the data base.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.configReader import ConfigReader
+
+
+class ModelCache:
+    """
+    This class keeps deserialized models in memory, so that a process classifying again and again with the same model
+    neither transfers nor unpickles it more than once. Every entry is stored together with a version, so a changed row
+    in the data base is detected. If the entries together exceed the memory budget, the least recently used ones are
+    dropped. All methods may be called from several threads at once.
+    """
+
+    _shared: Optional["ModelCache"] = None
+    _shared_loaded = False
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_size: int):
+        """
+        Creates a model cache.
+
+        :param max_size: The maximum number of bytes all entries together may occupy.
+        """
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Any, tuple[str, Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> Optional["ModelCache"]:
+        """
+        Creates the model cache as configured in section MODEL_CACHE of the config file.
+
+        :return: The model cache or None, if caching is switched off by a maximum size of 0 or a missing section.
+        """
+        max_size = ConfigReader().get_value("MODEL_CACHE", "max_size_mb")
+        if max_size is None or float(max_size) <= 0:
+            return None
+        return cls(int(float(max_size) * 2 ** 20))
+
+    @classmethod
+    def shared(cls) -> Optional["ModelCache"]:
+        """
+        Returns the model cache all Database objects of this process share. It is created from the config file on the
+        first call.
+
+        :return: The shared model cache or None, if caching is switched off.
+        """
+        with cls._shared_lock:
+            if not cls._shared_loaded:
+                cls._shared = cls.from_config()
+                cls._shared_loaded = True
+            return cls._shared
+
+    def get(self, key: Any, version: str) -> Optional[Any]:
+        """
+        Looks up an entry and marks it as recently used. An entry of another version is dropped.
+
+        :param key: The key of the entry, e.g. the id of the classifier.
+        :param version: The version the entry must have.
+        :return: The value stored or None, if there is no such entry of this version.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Any, version: str, value: Any, size: int) -> None:
+        """
+        Stores an entry and drops the least recently used entries, if the memory budget is exceeded afterwards.
+        Values larger than the whole budget are not stored at all.
+
+        :param key: The key of the entry, e.g. the id of the classifier.
+        :param version: The version of the value.
+        :param value: The value to store.
+        :param size: The number of bytes the value occupies, an estimate is fine.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_size:
+                return
+            self._entries[key] = (version, value, size)
+            self.size += size
+            while self.size > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Drops all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def statistics(self) -> dict[str, int]:
+        """
+        Returns the hit and miss statistics of this object together with the current size of the cache.
+
+        :return: A dict containing hits, misses, evictions, entries and size in bytes.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self._entries), "size": self.size}
+
+    def _remove(self, key: Any) -> None:
+        _, _, size = self._entries.pop(key)
+        self.size -= size
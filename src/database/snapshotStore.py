@@ -0,0 +1,123 @@
+# coding=utf-8
+"""
+This file contains the class SnapshotStore, a persistent on-disk store of decoded data sets.
+
+Recordings never change once they are uploaded, yet every job would fetch their dataJSON from the data base and parse
+it again. The store keeps every data set decoded as it comes out of decoding, i.e. before labels are applied, in a
+directory of its own:
+
+    meta.json           the columns, the data base digest of the data rows and the layout of the arrays
+    index.npy           the relative times
+    values-<n>.npy      the values of all columns of one type as a column-major two dimensional array
+
+The directories are named <id>-<hash of the settings>.snapshot. The arrays are memory-mapped read-only on loading. A
+data set of a single value type, which is the usual case, becomes a data frame on top of the mapped array without
+copying it, and processes loading the same data set share its pages.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+from pandas import DataFrame, concat
+
+from database.diskStore import DiskStore
+
+
+class SnapshotStore(DiskStore):
+    """
+    This class stores decoded data sets keyed by their id and the settings they were decoded with. An entry is only
+    handed out while the digest of the data rows in the data base is still the one it was stored with. If the store
+    grows beyond its size limit, the least recently used entries are deleted. It is configured in section
+    SNAPSHOT_STORE of the config file.
+    """
+
+    SECTION = "SNAPSHOT_STORE"
+    DEFAULT_NAME = "snapshotStore"
+    SUFFIX = ".snapshot"
+    # Increase this whenever the decoding might produce something else for the same data rows.
+    VERSION = 1
+
+    def get(self, data_set_id: int, digest: str, **settings) -> Optional[DataFrame]:
+        """
+        Opens a data set and marks it as recently used.
+
+        :param data_set_id: The id of the data set.
+        :param digest: The digest of its data rows in the data base, as of 'Database.get_data_set_digests' without
+                       labels.
+        :param settings: Everything else the decoded data depends on, e.g. the value type and the resampling.
+        :return: The data set with its id attribute set, or None, if there is no entry or it is outdated.
+        """
+        path = self._path(data_set_id, settings)
+        try:
+            with open(os.path.join(path, "meta.json")) as file:
+                meta = json.load(file)
+            if meta["digest"] != digest:
+                self.misses += 1
+                return None
+            index = np.load(os.path.join(path, "index.npy"), mmap_mode="r")
+            groups = [(np.load(os.path.join(path, group["file"]), mmap_mode="r"), group["columns"])
+                      for group in meta["groups"]]
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        columns = meta["columns"]
+        if len(groups) == 1:
+            # The transposed column-major array is what pandas keeps as block, so nothing is copied.
+            ds = DataFrame(groups[0][0], columns=[columns[i] for i in groups[0][1]], index=index, copy=False)
+        else:
+            ds = concat([DataFrame(values, columns=[columns[i] for i in positions], index=index, copy=False)
+                         for values, positions in groups], axis=1)[columns]
+        ds.id = data_set_id
+        return ds
+
+    def put(self, ds: DataFrame, digest: str, **settings) -> None:
+        """
+        Stores a data set and evicts the least recently used entries, if the size limit is exceeded afterwards.
+
+        :param ds: The data set as decoded, without labels, with its id attribute set.
+        :param digest: The digest of its data rows in the data base, see get.
+        :param settings: Everything else the decoded data depends on, see get.
+        """
+        temporary = tempfile.mkdtemp(dir=self.directory, suffix=".tmp")
+        try:
+            groups = []
+            for n, (dtype, positions) in enumerate(self._groups(ds).items()):
+                values = np.asfortranarray(ds.iloc[:, positions].to_numpy(dtype=dtype))
+                np.save(os.path.join(temporary, "values-%d.npy" % n), values)
+                groups.append({"file": "values-%d.npy" % n, "columns": positions})
+            np.save(os.path.join(temporary, "index.npy"), ds.index.to_numpy())
+            with open(os.path.join(temporary, "meta.json"), "w") as file:
+                json.dump({"digest": digest, "columns": [str(c) for c in ds.columns], "groups": groups}, file)
+            path = self._path(ds.id, settings)
+            # Renaming a directory is atomic, so concurrent readers never see half written entries. An outdated entry
+            # is moved out of the way first, it might still be mapped by someone.
+            if os.path.isdir(path):
+                shutil.rmtree(path + ".old", ignore_errors=True)
+                os.replace(path, path + ".old")
+            os.replace(temporary, path)
+            shutil.rmtree(path + ".old", ignore_errors=True)
+        finally:
+            shutil.rmtree(temporary, ignore_errors=True)
+        self._evict()
+
+    @staticmethod
+    def _groups(ds: DataFrame) -> dict[np.dtype, list[int]]:
+        groups: dict[np.dtype, list[int]] = {}
+        for position, dtype in enumerate(ds.dtypes):
+            groups.setdefault(dtype, []).append(position)
+        return groups
+
+    def _path(self, data_set_id: int, settings: dict) -> str:
+        description = json.dumps([self.VERSION, settings], sort_keys=True, default=repr).encode()
+        return os.path.join(self.directory,
+                            "%d-%s%s" % (data_set_id, hashlib.sha256(description).hexdigest()[:16], self.SUFFIX))
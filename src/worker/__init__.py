@@ -0,0 +1,5 @@
+# coding=utf-8
+"""
+This file marks this folder as worker package of this module
+"""
+__all__ = ["worker"]
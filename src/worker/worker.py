@@ -0,0 +1,216 @@
+# coding=utf-8
+"""
+This file contains a long-running worker for the jobs of buildModel.py and classify.py. Instead of starting a fresh
+process per request, which imports pandas, sklearn and tsfresh and connects to the data base every time, the server
+hands the jobs to a worker that has done all of this once already.
+
+Jobs are the very same json objects the scripts expect in their temporary file, plus the name of the script in
+'script' and optionally an arbitrary 'requestID' that is handed back with the result:
+
+    {"script": "classify", "requestID": 17, "dataSet": 1, "classifier": 3}
+
+Every job is one line of json. For every job the worker writes one line of json containing what the script would
+have printed and the exit code it would have had:
+
+    {"requestID": 17, "exitCode": 0, "output": ["<Label>", "<Label>", "UNKNOWN PATTERN"]}
+
+The worker either reads jobs from stdin and writes results to stdout or serves a Unix socket, on which every connection
+may send any number of jobs. To work on several jobs at once, start the socket server with more than one worker
+process or start several stdin workers.
+
+Usage: python worker.py [--socket <path> [--workers <n>]]
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import contextlib
+import json
+import os
+import signal
+import socket
+import traceback
+from typing import Callable, Optional, TextIO
+
+from buildModel import buildModel
+from classify import classify
+from database.database import Database
+
+
+def _build_model(exec_params: dict, connection) -> list[str]:
+    exec_params = buildModel.check_parameters(exec_params)
+    if "candidates" in exec_params:
+        candidates = buildModel.build_candidates(exec_params, connection)
+        return [json.dumps(x) for x in candidates] + [str(candidates[0]["id"])]
+    if "baseClassifier" in exec_params:
+        return [str(buildModel.update(exec_params, connection))]
+    return [str(buildModel.build(exec_params, connection))]
+
+
+def _classify(exec_params: dict, connection) -> list[str]:
+    exec_params = classify.check_parameters(exec_params)
+    if exec_params.get("stream", False):
+        # A stream handed to a worker is a finite one, its samples are part of the job.
+        return list(classify.classify_stream(exec_params, exec_params.get("samples", []), connection))
+    if "classifiers" in exec_params:
+        return [json.dumps(classify.classify_batch(exec_params, connection))]
+    return classify.classify(exec_params, connection)
+
+
+# The scripts a job may name, each one taking the execution parameters and a data base connection and returning the
+# lines the script prints.
+SCRIPTS: dict[str, Callable[[dict, object], list[str]]] = {
+    "buildModel": _build_model,
+    "classify": _classify
+}
+
+
+class Worker:
+    """
+    This class runs jobs one after another while keeping a connection to the data base open between them.
+    """
+
+    def __init__(self):
+        self.connection = None
+
+    def run(self, job: dict) -> dict:
+        """
+        Runs a single job. Errors do not escape, they are reported the way the scripts report them: by a traceback in
+        the output and an exit code of 1.
+
+        :param job: The execution parameters together with 'script' and, optionally, 'requestID'.
+        :return: The result holding 'requestID', 'exitCode' and 'output'.
+        """
+        result = {"requestID": job.pop("requestID", None), "exitCode": 0, "output": []}
+        try:
+            script = SCRIPTS[job.pop("script", None)]
+            # Everything printed while running belongs to the log, never to the results.
+            with contextlib.redirect_stdout(sys.stderr):
+                result["output"] = script(job, self._connect())
+        except Exception:
+            result["exitCode"] = 1
+            result["output"] = traceback.format_exc().splitlines()
+            # After a failure the connection might be in any state, e.g. in the middle of a streamed result.
+            self.disconnect()
+        return result
+
+    def serve(self, reader: TextIO, writer: TextIO) -> None:
+        """
+        Runs every job read from reader and writes its result to writer, until reader is exhausted.
+
+        :param reader: A text stream containing one job per line. Empty lines are skipped.
+        :param writer: A text stream to write one result per line to.
+        """
+        for line in reader:
+            if line.strip() == "":
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError:
+                result = {"requestID": None, "exitCode": 1, "output": traceback.format_exc().splitlines()}
+            else:
+                result = self.run(job) if isinstance(job, dict) else \
+                    {"requestID": None, "exitCode": 1, "output": ["A job must be a json object."]}
+            writer.write(json.dumps(result) + "\n")
+            writer.flush()
+
+    def disconnect(self) -> None:
+        """
+        Closes the data base connection, if there is one.
+        """
+        if self.connection is None:
+            return
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+        self.connection = None
+
+    def _connect(self):
+        if self.connection is not None:
+            try:
+                self.connection.ping(reconnect=True, attempts=1)
+                return self.connection
+            except Exception:
+                self.disconnect()
+        self.connection = Database.connect()
+        return self.connection
+
+
+def serve_socket(path: str, workers: int = 1) -> None:
+    """
+    Serves jobs on a Unix socket with the given number of worker processes, until the process is terminated. The
+    worker processes share the socket, so every connection is handled by whichever worker is idle. A worker process
+    that dies is replaced.
+
+    :param path: The path of the socket. An existing file at this path is replaced.
+    :param workers: The number of worker processes.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(max(16, workers * 4))
+    children: set[int] = set()
+
+    def stop(signum, frame):
+        for child in children:
+            with contextlib.suppress(OSError):
+                os.kill(child, signal.SIGTERM)
+        with contextlib.suppress(OSError):
+            os.remove(path)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        while True:
+            while len(children) < workers:
+                child = os.fork()
+                if child == 0:
+                    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                    signal.signal(signal.SIGINT, signal.SIG_DFL)
+                    _accept_forever(server)
+                    os._exit(0)
+                children.add(child)
+            child, _ = os.wait()
+            children.discard(child)
+    finally:
+        server.close()
+
+
+def _accept_forever(server: socket.socket) -> None:
+    worker = Worker()
+    while True:
+        connection, _ = server.accept()
+        with connection, connection.makefile("r", encoding="utf-8") as reader, \
+                connection.makefile("w", encoding="utf-8") as writer:
+            try:
+                worker.serve(reader, writer)
+            except OSError:
+                # The client went away before reading everything.
+                pass
+
+
+def main(arguments: Optional[list[str]] = None) -> None:
+    """
+    Starts the worker as described by the command line arguments.
+
+    :param arguments: The command line arguments. If not passed, those of this process are used.
+    """
+    parser = argparse.ArgumentParser(description="Runs buildModel and classify jobs in a long-running process.")
+    parser.add_argument("--socket", help="The path of a Unix socket to serve. If not passed, stdin is read.")
+    parser.add_argument("--workers", type=int, default=1, help="The number of worker processes serving the socket.")
+    parsed = parser.parse_args(arguments)
+    if parsed.socket is None:
+        worker = Worker()
+        worker.serve(sys.stdin, sys.stdout)
+        worker.disconnect()
+    else:
+        serve_socket(parsed.socket, max(1, parsed.workers))
+
+
+if __name__ == "__main__":
+    main()
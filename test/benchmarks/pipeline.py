@@ -0,0 +1,194 @@
+# coding=utf-8
+"""
+This file measures the throughput of the training pipeline on synthetic data, stage by stage: decoding the data sets
+from the data base (a local stand-in for it), imputation (with every strategy), slicing into windows, feature
+extraction, scaling and training.
+
+Usage: python pipeline.py [--data-sets <n>] [--rows <n>] [--channels <n>] [--sensors <n>] [--repeat <n>]
+                          [--classifier <name>] [--trace-memory] [--save <file>] [--baseline <file>
+                          [--tolerance <fraction>]]
+
+With --save, the results are written to a json file. With --baseline, they are compared to such a file, and the exit
+code is 1 if a stage lost more throughput than the tolerance allows or the peak memory grew by more than that.
+
+baseline.json next to this file holds the results at the default scale, measured on a single core with Python 3.11,
+NumPy 1.26, pandas 2.1 and scikit-learn 1.9. Throughput depends on the machine, so check for regressions on one alike:
+
+    python pipeline.py --baseline baseline.json
+
+A change meant to move the numbers, or a new stage, comes with a baseline measured anew by
+
+    python pipeline.py --save baseline.json
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from buildModel.buildModel import choose_features, create_time_slices, extract_features, impute, preprocess_data, \
+    train_classifier
+from buildModel.instrumentation import peak_rss
+from buildModel.registry import CLASSIFIERS, IMPUTATORS, SCALERS
+from database.database import Database
+from standin import StandInConnection
+from synthetic import generate_data_sets, generate_tables
+
+
+def run_stage(function: Callable[[], Any], repeat: int, trace_memory: bool) -> tuple[Any, dict[str, float]]:
+    """
+    Runs one stage several times.
+
+    :param function: The stage.
+    :param repeat: How often to run it. There is one more run before, which is not counted, as it pays for the lazy
+                   imports.
+    :param trace_memory: Whether to trace the memory allocated by the stage. This slows the stage down.
+    :return: The result of the last run, and the best wall time in seconds, the peak resident set size of the process
+             after the stage in MB and, if traced, the peak of the memory allocated by the stage in MB.
+    """
+    seconds = []
+    result = function()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - start)
+    measurement = {"seconds": min(seconds), "peakRssMb": peak_rss()}
+    if trace_memory:
+        tracemalloc.start()
+        function()
+        measurement["allocatedMb"] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        tracemalloc.stop()
+    return result, measurement
+
+
+def measure(data_sets: int, rows: int, channels: int, sensors: int, repeat: int, classifier: str,
+            trace_memory: bool = False) -> dict[str, dict]:
+    """
+    Runs all stages of the pipeline on synthetic data.
+
+    :param data_sets: The number of data sets.
+    :param rows: The number of samples per data set.
+    :param channels: The number of channels per sensor.
+    :param sensors: The number of sensors per data set.
+    :param repeat: How often to run every stage, not counting the warm-up.
+    :param classifier: The name of the classifier to train, as accepted by choose_classifier.
+    :param trace_memory: Whether to trace the memory allocated by every stage.
+    :return: For every stage its measurement as by run_stage, the number of items processed per second and the unit of
+             these items ('rows' or 'windows').
+    """
+    results: dict[str, dict] = {}
+
+    def stage(name: str, function: Callable[[], Any], items: Callable[[Any], int], unit: str) -> Any:
+        result, measurement = run_stage(function, repeat, trace_memory)
+        measurement["throughput"] = items(result) / measurement["seconds"]
+        measurement["unit"] = unit
+        results[name] = measurement
+        return result
+
+    connection = StandInConnection()
+    connection.insert(*generate_tables(data_sets, rows, channels, sensors=sensors))
+    ids = list(range(1, data_sets + 1))
+    stage("get_data_sets", lambda: Database(ids, 1, connection=connection).get_data_sets(),
+          lambda x: sum(d.shape[0] for d in x), "rows")
+    connection.close()
+
+    # The stages after decoding work on data sets with a few gaps, so that imputation has something to do.
+    data = generate_data_sets(data_sets, rows, channels * sensors, missing=0.01)
+    # Taking the values of a data set without the labels copies them, so every run imputes data with gaps.
+    stage("impute", lambda: [impute(d.iloc[:, :-1], IMPUTATORS.create("MEAN")) for d in data],
+          lambda x: sum(d.shape[0] for d in x), "rows")
+    for name in ("FORWARD_FILL", "LINEAR"):
+        stage("impute_" + name.lower(), lambda: [impute(d.iloc[:, :-1], IMPUTATORS.create(name)) for d in data],
+              lambda x: sum(d.shape[0] for d in x), "rows")
+    # The imputator of sklearn the imputation engine replaces, as a reference.
+    stage("impute_simple_imputer", lambda: [impute(d.iloc[:, :-1], IMPUTATORS.create("")) for d in data],
+          lambda x: sum(d.shape[0] for d in x), "rows")
+    stage("create_time_slices", lambda: create_time_slices(data, IMPUTATORS.create("MEAN")),
+          lambda x: len(x[1]), "windows")
+    windows, labels = stage("create_time_slices_strided",
+                            lambda: create_time_slices(data, IMPUTATORS.create("MEAN"), strided=True),
+                            lambda x: len(x[1]), "windows")
+    features = stage("extract_features",
+                     lambda: extract_features(choose_features([]), windows, labels, IMPUTATORS.create("MEAN")),
+                     len, "windows")
+    x, y = features.iloc[:, :-1], features["label"]
+    scaled = stage("preprocess_data", lambda: preprocess_data(x, SCALERS.create("STANDARD")), len, "windows")
+    stage("train_classifier", lambda: train_classifier(scaled, y, CLASSIFIERS.create(classifier)),
+          lambda _: len(scaled), "windows")
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Compares results to a baseline.
+
+    :param results: The results as saved by main.
+    :param baseline: Results saved before.
+    :param tolerance: How much throughput a stage may lose and how much more memory it may take, as a fraction of the
+                      baseline.
+    :return: A description of every regression found.
+    """
+    if results["scale"] != baseline["scale"]:
+        return ["the baseline was measured at scale %s, not %s" % (baseline["scale"], results["scale"])]
+    regressions = []
+    for name, result in results["stages"].items():
+        if name not in baseline["stages"]:
+            continue
+        limit = baseline["stages"][name]["throughput"] * (1 - tolerance)
+        if result["throughput"] < limit:
+            regressions.append("%s: %.0f %s/s instead of at least %.0f" % (name, result["throughput"], result["unit"],
+                                                                          limit))
+        limit = baseline["stages"][name]["peakRssMb"] * (1 + tolerance)
+        if result["peakRssMb"] > limit:
+            regressions.append("%s: peak RSS %.0f MB instead of at most %.0f MB" % (name, result["peakRssMb"], limit))
+    return regressions
+
+
+def main() -> int:
+    """
+    Runs the benchmark as described by the command line arguments.
+
+    :return: The exit code.
+    """
+    parser = argparse.ArgumentParser(description="Measures the throughput of the training pipeline.")
+    parser.add_argument("--data-sets", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--channels", type=int, default=3)
+    parser.add_argument("--sensors", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--classifier", default="RANDOM_FOREST")
+    parser.add_argument("--trace-memory", action="store_true")
+    parser.add_argument("--save")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    arguments = parser.parse_args()
+    scale = {"dataSets": arguments.data_sets, "rows": arguments.rows, "channels": arguments.channels,
+             "sensors": arguments.sensors, "classifier": arguments.classifier}
+    results = {"scale": scale,
+               "stages": measure(arguments.data_sets, arguments.rows, arguments.channels, arguments.sensors,
+                                 arguments.repeat, arguments.classifier, arguments.trace_memory)}
+    for name, result in results["stages"].items():
+        line = "%-28s %8.3f s %12.0f %s/s   peak RSS %6.0f MB" % (name, result["seconds"], result["throughput"],
+                                                                  result["unit"], result["peakRssMb"])
+        if "allocatedMb" in result:
+            line += "   allocated %6.0f MB" % result["allocatedMb"]
+        print(line)
+    if arguments.save is not None:
+        with open(arguments.save, "w") as file:
+            json.dump(results, file, indent=4)
+    if arguments.baseline is None:
+        return 0
+    with open(arguments.baseline) as file:
+        regressions = compare(results, json.load(file), arguments.tolerance)
+    for regression in regressions:
+        print("REGRESSION " + regression)
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# coding=utf-8
+"""
+This file contains a local stand-in for the MySQL data base, so that the data base access of class Database can be
+benchmarked and tested without a server. It runs on sqlite3 and speaks just as much of the API of mysql.connector as
+Database uses.
+"""
+import hashlib
+import re
+import sqlite3
+from typing import Any, Optional
+
+_SCHEMA = """
+CREATE TABLE Datarow (ID INTEGER PRIMARY KEY AUTOINCREMENT, datasetID INTEGER, name TEXT, sensorID INTEGER,
+                      dataJSON TEXT);
+CREATE INDEX DatarowDataset ON Datarow (datasetID);
+CREATE TABLE Label (ID INTEGER PRIMARY KEY AUTOINCREMENT, datasetID INTEGER, name TEXT, start INTEGER, "end" INTEGER);
+CREATE TABLE Classifiers (ID INTEGER PRIMARY KEY AUTOINCREMENT, Classifier BLOB, Scaler BLOB, Sensors TEXT,
+                          LabelsTable TEXT, ProjectID INTEGER, Features TEXT, Metrics TEXT);
+"""
+
+
+def _md5(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return hashlib.md5(value if isinstance(value, bytes) else str(value).encode()).hexdigest()
+
+
+def _concat_ws(separator: str, *values: Any) -> str:
+    return separator.join(str(v) for v in values if v is not None)
+
+
+class StandInCursor:
+    """
+    A cursor of the stand-in. Whether it is prepared, buffered or handing out dicts makes no difference, rows are
+    always dicts.
+    """
+
+    def __init__(self, connection: "StandInConnection"):
+        self.connection = connection
+        self.rowcount = -1
+        self.lastrowid: Optional[int] = None
+        self._cursor: Optional[sqlite3.Cursor] = None
+
+    def execute(self, query: str, params: tuple = ()) -> None:
+        # MySQL takes %s as placeholder, sqlite takes ?. 'end' needs quotes in sqlite.
+        query = re.sub(r"\bend\b", '"end"', query.replace("%s", "?"))
+        self._cursor = self.connection.sqlite.execute(query, tuple(params))
+        self.lastrowid = self._cursor.lastrowid
+        self.rowcount = self._cursor.rowcount
+
+    def fetchone(self) -> Optional[dict]:
+        row = self._cursor.fetchone()
+        return None if row is None else self._to_dict(row)
+
+    def fetchall(self) -> list[dict]:
+        rows = [self._to_dict(row) for row in self._cursor.fetchall()]
+        self.rowcount = len(rows)
+        return rows
+
+    def close(self) -> None:
+        pass
+
+    def _to_dict(self, row: tuple) -> dict:
+        return {d[0]: v for d, v in zip(self._cursor.description, row)}
+
+
+class StandInConnection:
+    """
+    A connection to an sqlite3 data base holding the tables Datarow, Label and Classifiers.
+    """
+
+    unread_result = False
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Creates the data base including its tables.
+
+        :param path: Where to put the data base. By default it is kept in memory.
+        """
+        self.sqlite = sqlite3.connect(path, check_same_thread=False)
+        self.sqlite.create_function("MD5", 1, _md5, deterministic=True)
+        self.sqlite.create_function("CONCAT_WS", -1, _concat_ws, deterministic=True)
+        self.sqlite.executescript(_SCHEMA)
+
+    def insert(self, data_rows: list[dict], labels: list[dict]) -> None:
+        """
+        Fills the tables Datarow and Label.
+
+        :param data_rows: The rows of table Datarow as dicts keyed by column name, e.g. from synthetic.generate_tables.
+        :param labels: The rows of table Label as dicts keyed by column name.
+        """
+        self.sqlite.executemany("INSERT INTO Datarow (datasetID, name, sensorID, dataJSON) VALUES (?, ?, ?, ?)",
+                                [(r["datasetID"], r["name"], r["sensorID"], r["dataJSON"]) for r in data_rows])
+        self.sqlite.executemany('INSERT INTO Label (datasetID, name, start, "end") VALUES (?, ?, ?, ?)',
+                                [(r["datasetID"], r["name"], r["start"], r["end"]) for r in labels])
+        self.sqlite.commit()
+
+    def cursor(self, prepared: bool = False, dictionary: bool = False, buffered: bool = None) -> StandInCursor:
+        return StandInCursor(self)
+
+    def ping(self, reconnect: bool = False, attempts: int = 1) -> None:
+        pass
+
+    def commit(self) -> None:
+        self.sqlite.commit()
+
+    def consume_results(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.sqlite.close()
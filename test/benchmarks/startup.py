@@ -0,0 +1,136 @@
+# coding=utf-8
+"""
+This file measures how long it takes a fresh Python process to import the entry points, which is the cold start
+latency of every request handled by starting buildModel.py or classify.py.
+
+Usage: python startup.py [--repeat <n>] [--save <file>] [--baseline <file> [--tolerance <fraction>]]
+
+With --save, the results are written to a json file. With --baseline, they are compared to such a file, and the exit
+code is 1 if an entry point got slower than the baseline by more than the tolerance.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SOURCE = Path(__file__).parent.parent.parent / "src"
+
+ENTRY_POINTS = {
+    "classify": "classify.classify",
+    "buildModel": "buildModel.buildModel",
+    "worker": "worker.worker"
+}
+
+# Modules that must not be imported by an entry point on its own, as only a few requests need them.
+LAZY_MODULES = ["tsfresh", "sklearn.ensemble", "sklearn.neural_network", "sklearn.svm", "sklearn.preprocessing"]
+
+
+def run(module: str) -> tuple[float, list[str]]:
+    """
+    Imports a module in a fresh interpreter.
+
+    :param module: The name of the module, relative to the source folder.
+    :return: The wall time in seconds and which of the LAZY_MODULES have been imported along.
+    """
+    code = "import sys; sys.path.insert(0, %r); import %s; print(' '.join(m for m in %r if m in sys.modules))" % (
+        str(SOURCE), module, LAZY_MODULES)
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return time.perf_counter() - start, output.split()
+
+
+def heaviest_imports(module: str, count: int = 5) -> list[tuple[str, float]]:
+    """
+    Finds the imports taking the most time, including the imports they trigger themselves.
+
+    :param module: The name of the module, relative to the source folder.
+    :param count: How many imports to report.
+    :return: The names of the imported modules and their cumulative import times in seconds, slowest first.
+    """
+    code = "import sys; sys.path.insert(0, %r); import %s" % (str(SOURCE), module)
+    lines = subprocess.run([sys.executable, "-X", "importtime", "-c", code], check=True, capture_output=True,
+                           text=True).stderr.splitlines()
+    times: list[tuple[str, float]] = []
+    for line in lines[1:]:
+        _, cumulative, name = line.split("|")
+        # Only the imports done directly by our own code are of interest, i.e. those of the lowest nesting level.
+        if name.startswith("   ") and not name.startswith("    "):
+            times.append((name.strip(), int(cumulative) / 1e6))
+    return sorted(times, key=lambda x: -x[1])[:count]
+
+
+def measure(repeat: int) -> dict[str, dict]:
+    """
+    Measures the startup time of all entry points.
+
+    :param repeat: How many fresh interpreters to start per entry point. The first one is not counted, as it fills the
+                   caches of the operating system.
+    :return: For every entry point the median and the minimum wall time in seconds, the lazy modules imported and the
+             heaviest imports.
+    """
+    results: dict[str, dict] = {}
+    for name, module in ENTRY_POINTS.items():
+        run(module)
+        runs = [run(module) for _ in range(repeat)]
+        results[name] = {"median": statistics.median(t for t, _ in runs), "minimum": min(t for t, _ in runs),
+                         "lazyModulesImported": runs[0][1], "heaviestImports": heaviest_imports(module)}
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    """
+    Compares results to a baseline.
+
+    :param results: The results of measure.
+    :param baseline: Results of measure stored before.
+    :param tolerance: How much slower than the baseline an entry point may be, as a fraction of the baseline.
+    :return: A description of every regression found.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        limit = baseline[name]["median"] * (1 + tolerance)
+        if result["median"] > limit:
+            regressions.append("%s: %.3f s instead of at most %.3f s" % (name, result["median"], limit))
+        if len(result["lazyModulesImported"]) > len(baseline[name]["lazyModulesImported"]):
+            regressions.append("%s: imports %s" % (name, ", ".join(result["lazyModulesImported"])))
+    return regressions
+
+
+def main() -> int:
+    """
+    Runs the benchmark as described by the command line arguments.
+
+    :return: The exit code.
+    """
+    parser = argparse.ArgumentParser(description="Measures the cold start latency of the entry points.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    arguments = parser.parse_args()
+    results = measure(arguments.repeat)
+    for name, result in results.items():
+        print("%-12s median %.3f s, minimum %.3f s" % (name, result["median"], result["minimum"]))
+        for module, seconds in result["heaviestImports"]:
+            print("%14s%-40s %.3f s" % ("", module, seconds))
+        if len(result["lazyModulesImported"]) > 0:
+            print("%14simports %s" % ("", ", ".join(result["lazyModulesImported"])))
+    if arguments.save is not None:
+        with open(arguments.save, "w") as file:
+            json.dump(results, file, indent=4)
+    if arguments.baseline is None:
+        return 0
+    with open(arguments.baseline) as file:
+        regressions = compare(results, json.load(file), arguments.tolerance)
+    for regression in regressions:
+        print("REGRESSION " + regression)
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# coding=utf-8
+"""
+This file contains a generator of synthetic labelled sensor recordings for the benchmarks. Its size is scaled by the
+number of data sets, the number of rows per data set and the number of channels.
+
+Every recording consists of segments of random length, each belonging to one activity. An activity is a sine of its
+own frequency and amplitude on every channel plus noise, so classifiers have something to learn.
+"""
+import json
+from typing import Optional
+
+import numpy as np
+from pandas import DataFrame
+
+ACTIVITIES = ["WALK", "SIT", "RUN", "STAND"]
+
+
+def generate_recording(rows: int, channels: int, rng: np.random.Generator, segment_length: int = 400) \
+        -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Generates one recording.
+
+    :param rows: The number of samples.
+    :param channels: The number of values per sample.
+    :param rng: The random number generator to use.
+    :param segment_length: The mean number of samples of one activity.
+    :return: The relative times in milliseconds, the values shaped (rows, channels) and the index of the activity of
+             every sample in ACTIVITIES.
+    """
+    times = np.cumsum(rng.integers(15, 25, rows))
+    activities = np.empty(rows, dtype=np.int64)
+    position = 0
+    while position < rows:
+        length = int(rng.integers(segment_length // 2, segment_length * 3 // 2))
+        activities[position:position + length] = rng.integers(len(ACTIVITIES))
+        position += length
+    frequency = 0.5 + activities[:, None] * 0.75 + rng.uniform(0, 0.1, channels)
+    amplitude = 1 + activities[:, None] * 0.5
+    values = amplitude * np.sin(2 * np.pi * frequency * times[:, None] / 1000 + np.arange(channels))
+    values += rng.normal(0, 0.3, values.shape)
+    return times, values, activities
+
+
+def generate_data_sets(count: int, rows: int, channels: int, seed: int = 0, missing: float = 0.0) -> list[DataFrame]:
+    """
+    Generates data sets the way Database.get_data_sets returns them, i.e. indexed by the relative times, one column
+    per channel and the label codes in the last column.
+
+    :param count: The number of data sets.
+    :param rows: The number of samples per data set.
+    :param channels: The number of channels.
+    :param seed: The seed of the random number generator.
+    :param missing: The fraction of values to replace by NaN.
+    :return: The data sets.
+    """
+    rng = np.random.default_rng(seed)
+    data_sets: list[DataFrame] = []
+    for i in range(count):
+        times, values, activities = generate_recording(rows, channels, rng)
+        if missing > 0:
+            values[rng.random(values.shape) < missing] = np.nan
+        data_set = DataFrame(values, index=times, columns=["acc " + str(c) for c in range(channels)])
+        data_set["label"] = activities
+        data_set.id = i + 1
+        data_sets.append(data_set)
+    return data_sets
+
+
+def generate_tables(count: int, rows: int, channels: int, seed: int = 0, sensors: int = 1,
+                    labelled: Optional[int] = None) -> tuple[list[dict], list[dict]]:
+    """
+    Generates the rows of the tables Datarow and Label for data sets like those of generate_data_sets.
+
+    :param count: The number of data sets.
+    :param rows: The number of samples per data set.
+    :param channels: The number of channels per sensor.
+    :param seed: The seed of the random number generator.
+    :param sensors: The number of sensors, i.e. of data rows, per data set. They share their timestamps.
+    :param labelled: The number of data sets having labels. Defaults to all of them.
+    :return: The rows of the Datarow table and the rows of the Label table, as dicts keyed by column name.
+    """
+    rng = np.random.default_rng(seed)
+    data_rows: list[dict] = []
+    labels: list[dict] = []
+    for i in range(count):
+        times, values, activities = generate_recording(rows, channels * sensors, rng)
+        for sensor in range(sensors):
+            samples = [{"relativeTime": int(t), "value": [round(float(v), 6) for v in row]}
+                       for t, row in zip(times, values[:, sensor * channels:(sensor + 1) * channels])]
+            data_rows.append({"datasetID": i + 1, "name": "sensor" + str(sensor), "sensorID": sensor + 1,
+                              "dataJSON": json.dumps(samples)})
+        if labelled is not None and i >= labelled:
+            continue
+        borders = np.flatnonzero(np.diff(activities)) + 1
+        for start, end in zip(np.concatenate(([0], borders)), np.concatenate((borders, [rows]))):
+            labels.append({"datasetID": i + 1, "name": ACTIVITIES[activities[start]], "start": int(times[start]),
+                           "end": int(times[end - 1])})
+    return data_rows, labels
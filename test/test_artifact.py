@@ -0,0 +1,91 @@
+# coding=utf-8
+"""
+This file contains all unit tests for artifact.py
+"""
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from unittest import TestCase
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from src.database import artifact
+
+
+class ArtifactTest(TestCase):
+
+    def setUp(self) -> None:
+        """
+        Fits some models and creates a directory for the mapped files.
+        """
+        rng = np.random.default_rng(2)
+        self.x = rng.normal(0, 1, (300, 6))
+        self.y = (self.x[:, 0] > 0).astype(int) + (self.x[:, 1] > 0).astype(int)
+        self.models = [RandomForestClassifier(n_estimators=10, random_state=0).fit(self.x, self.y),
+                       SVC().fit(self.x, self.y), StandardScaler().fit(self.x)]
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        """
+        Removes the directory for the mapped files.
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def check(self, model, loaded):
+        if hasattr(model, "predict"):
+            np.testing.assert_array_equal(model.predict(self.x), loaded.predict(self.x))
+        else:
+            np.testing.assert_array_equal(model.transform(self.x), loaded.transform(self.x))
+
+    def test_round_trip_mapped(self):
+        for model in self.models:
+            blob = artifact.dumps(model)
+            self.assertTrue(artifact.is_artifact(blob))
+            self.check(model, artifact.loads(blob, self.directory))
+            # A second load maps the very same file.
+            self.check(model, artifact.loads(bytearray(blob), self.directory))
+        self.assertEqual(len(os.listdir(self.directory)), len(self.models))
+
+    def test_eviction(self):
+        blobs = [artifact.dumps(model) for model in self.models[:2]]
+        artifact.loads(blobs[0], self.directory)
+        first = os.path.join(self.directory, os.listdir(self.directory)[0])
+        os.utime(first, (0, 0))
+        # The file just written stays, even if it alone exceeds the limit, the least recently used ones go.
+        self.check(self.models[1], artifact.loads(blobs[1], self.directory, 1))
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        self.assertFalse(os.path.exists(first))
+        # Loading again marks a file as used instead of writing it anew.
+        second = os.path.join(self.directory, os.listdir(self.directory)[0])
+        os.utime(second, (0, 0))
+        artifact.loads(blobs[1], self.directory, 1)
+        self.assertGreater(os.path.getmtime(second), 0)
+
+    def test_smaller(self):
+        blob = artifact.dumps(self.models[0])
+        self.assertLess(len(blob), len(pickle.dumps(self.models[0])) / 2)
+        self.assertGreater(artifact.loaded_size(blob), len(blob))
+
+    def test_round_trip_in_memory(self):
+        for model in self.models:
+            self.check(model, artifact.loads(artifact.dumps(model), ""))
+
+    def test_plain_pickle(self):
+        blob = pickle.dumps(self.models[0])
+        self.assertFalse(artifact.is_artifact(blob))
+        self.check(self.models[0], artifact.loads(blob, self.directory))
+        self.assertEqual(artifact.loads(pickle.dumps({"a": [1, 2]})), {"a": [1, 2]})
+
+    def test_unknown_version(self):
+        blob = bytearray(artifact.dumps(self.models[2]))
+        blob[len(artifact.MAGIC)] = artifact.VERSION + 1
+        self.assertRaises(ValueError, artifact.loads, bytes(blob), self.directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
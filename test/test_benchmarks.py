@@ -0,0 +1,81 @@
+# coding=utf-8
+"""
+This file contains the unit tests for the synthetic data and the data base stand-in of the benchmarks
+"""
+import json
+import sys
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+from pipeline import compare, measure
+from standin import StandInConnection
+from synthetic import ACTIVITIES, generate_data_sets, generate_tables
+from src.database.database import Database
+
+
+class BenchmarksTest(TestCase):
+
+    def setUp(self):
+        """
+        Fills a stand-in data base with two data sets of two sensors, of which only the first one is labelled.
+        """
+        self.connection = StandInConnection()
+        self.connection.insert(*generate_tables(2, 1000, 3, seed=4, sensors=2, labelled=1))
+
+    def tearDown(self):
+        """
+        Closes the stand-in data base.
+        """
+        self.connection.close()
+
+    def test_decoding(self):
+        data_sets = Database([1, 2], 1, connection=self.connection).get_data_sets()
+        self.assertEqual(len(data_sets), 2)
+        self.assertListEqual(data_sets[1]["label"].unique().tolist(), [-1])
+        self.assertEqual(data_sets[0].shape, (1000, 7))
+        self.assertEqual(data_sets[0].columns[-1], "label")
+        # The decoded data is the generated data, as far as the JSON holds it.
+        expected = generate_data_sets(1, 1000, 6, seed=4)[0]
+        np.testing.assert_allclose(data_sets[0].iloc[:, :-1].to_numpy(), expected.iloc[:, :-1].to_numpy(), atol=1e-6)
+        self.assertTrue((data_sets[0].index == expected.index).all())
+        # Label codes are assigned by sorted label names.
+        names = sorted(set(ACTIVITIES[i] for i in expected["label"]))
+        self.assertListEqual([names[int(i)] for i in data_sets[0]["label"]],
+                             [ACTIVITIES[i] for i in expected["label"]])
+
+    def test_resampling(self):
+        database = Database([1], 1, connection=self.connection, resample="ASOF", resample_interval=25)
+        data_set = database.get_data_sets()[0]
+        self.assertTrue((np.diff(data_set.index.to_numpy()) == 25).all())
+        self.assertEqual(data_set.columns[-1], "label")
+        self.assertGreater((data_set["label"] >= 0).mean(), 0.9)
+
+    def test_digests(self):
+        digests = Database([1, 2], 1, connection=self.connection).get_data_set_digests()
+        self.assertListEqual(sorted(digests), [1, 2])
+        self.assertNotEqual(digests[1], digests[2])
+
+    def test_compare(self):
+        scale = {"rows": 10}
+        baseline = {"scale": scale, "stages": {"impute": {"throughput": 100.0, "peakRssMb": 100.0, "unit": "rows"}}}
+        results = {"scale": scale, "stages": {"impute": {"throughput": 80.0, "peakRssMb": 120.0, "unit": "rows"}}}
+        self.assertListEqual(compare(results, baseline, 0.25), [])
+        self.assertEqual(len(compare(results, baseline, 0.1)), 2)
+        self.assertEqual(len(compare(dict(results, scale={"rows": 20}), baseline, 0.25)), 1)
+
+    def test_baseline(self):
+        with open(Path(__file__).parent / "benchmarks" / "baseline.json") as file:
+            baseline = json.load(file)
+        # The committed baseline covers every stage measured, so no stage escapes the regression check.
+        stages = measure(1, 2000, 1, 1, 1, "NAIVE_BAYES")
+        self.assertListEqual(sorted(baseline["stages"]), sorted(stages))
+        self.assertListEqual(compare(baseline, baseline, 0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,8 +7,9 @@ import random
 import unittest
 from contextlib import redirect_stdout
 from pickle import load
-from unittest import TestCase
+from unittest import TestCase, mock
 
+import numpy as np
 import pandas as pd
 
 from sklearn.dummy import DummyClassifier
@@ -16,9 +17,16 @@ from sklearn.impute import SimpleImputer
 from sklearn.neural_network import MLPClassifier
 from sklearn.preprocessing import StandardScaler, Normalizer
 
-from src.buildModel import buildModel
-
 import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+from standin import StandInConnection
+from synthetic import generate_tables
+
+from src.buildModel import buildModel
+from src.database.database import Database
 
 
 class BuildModelTest(TestCase):
@@ -84,6 +92,15 @@ class BuildModelTest(TestCase):
         self.assertEqual(len(result[0]), len(result[1]))
         self.assertLessEqual(len(result[0][0]), self.chunk)
 
+    def test_create_time_slices_strided(self):
+        expected = buildModel.create_time_slices([self.data.iloc[:4096]], self.imputator, self.chunk, self.step)
+        result = buildModel.create_time_slices([self.data.iloc[:4096]], self.imputator, self.chunk, self.step, True)
+        self.assertEqual(len(result[0]), 1)
+        self.assertEqual(result[0][0].windows.shape, (len(expected[0]),) + expected[0][0].shape)
+        self.assertListEqual(result[1], expected[1])
+        for window, frame in zip(result[0][0].windows, expected[0]):
+            self.assertTrue((window == frame.to_numpy()).all())
+
     def test_create_time_slices_illegal_values(self):
         self.assertRaises(ValueError, buildModel.create_time_slices, [self.data], self.imputator, 0)
         self.assertRaises(ValueError, buildModel.create_time_slices, [self.data], None, self.chunk, self.chunk + 1)
@@ -94,6 +111,118 @@ class BuildModelTest(TestCase):
                                     [1], self.imputator)
         self.assertTrue(True)
 
+    def test_extract_features_pipelined(self):
+        data_sets = [self.data.iloc[:2048], self.data.iloc[2048:5120], self.data.iloc[:3]]
+        x, y = buildModel.create_time_slices(data_sets[:2], self.imputator, 128, 64)
+        expected = buildModel.extract_features(["minimum", "quantile"], x, y, SimpleImputer())
+        result = buildModel.extract_features_pipelined(["minimum", "quantile"], iter(data_sets),
+                                                       (SimpleImputer(), SimpleImputer()), workers=2, queue_size=1,
+                                                       slidingWindowSize=128, slidingWindowStep=64)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_compact(self):
+        data = self.data.iloc[:2048].astype(np.float32)
+        data["label"] = self.data["label"].iloc[:2048].astype(np.int8)
+        x, y = buildModel.create_time_slices([data], self.imputator, 128, 64, True)
+        self.assertEqual(x[0].windows.dtype, np.float32)
+        features = buildModel.extract_features(["minimum", "quantile"], x, y, SimpleImputer())
+        self.assertTrue((features.dtypes.iloc[:-1] == np.float32).all())
+        self.assertEqual(features["label"].dtype, np.int8)
+        scaled = buildModel.preprocess_data(features.iloc[:, :-1], buildModel.choose_scaler("STANDARD"))
+        self.assertTrue((scaled.dtypes == np.float32).all())
+
+    def test_train_incremental(self):
+        class DataSets:
+            def __init__(self, data_sets):
+                self.data_sets = data_sets
+
+            def iter_data_sets(self):
+                return iter(self.data_sets)
+
+        data_sets = [self.data.iloc[:2048].copy(), self.data.iloc[2048:5120].copy(), self.data.iloc[:3].copy()]
+        for i, data_set in enumerate(data_sets):
+            data_set.id = i + 1
+        exec_params = {"features": ["MIN", "MEAN"], "imputator": "MEAN", "trainingDataPercentage": 0.7, "epochs": 2}
+        scaler = StandardScaler()
+        classifier = buildModel.choose_classifier("SGD")
+        features, columns, means = buildModel.train_incremental(exec_params, DataSets(data_sets), scaler, classifier)
+        self.assertListEqual(features, ["minimum", "mean"])
+        # The scaler has seen exactly the training part split_data would choose.
+        featured_data = buildModel.extract_features_pipelined(features, iter(data_sets), (SimpleImputer(),) * 2)
+        x_training = buildModel.split_data(exec_params, featured_data)[0]
+        np.testing.assert_allclose(scaler.mean_, x_training.mean().to_numpy())
+        np.testing.assert_allclose(means, x_training.mean().to_numpy())
+        self.assertListEqual(columns, list(x_training.columns))
+        self.assertEqual(classifier.predict(scaler.transform(x_training)).shape, (x_training.shape[0],))
+
+    def test_train_incremental_streams(self):
+        connection = StandInConnection()
+        connection.insert(*generate_tables(4, 1000, 2, seed=3))
+        database = Database([1, 2, 3, 4], 1, connection=connection)
+        exec_params = {"features": ["MIN", "MEAN"], "imputator": "MEAN"}
+        buildModel.train_incremental(exec_params, database, StandardScaler(), buildModel.choose_classifier("SGD"))
+        # No data set is held on to once its features are spilled.
+        self.assertListEqual(database.data_sets, [])
+        connection.close()
+
+    def test_build_incremental(self):
+        connection = StandInConnection()
+        connection.insert(*generate_tables(4, 1000, 2, seed=3))
+        for scaler in ("STANDARD", "MIN_MAX"):
+            model_id = buildModel.build({"dataSets": [1, 2, 3, 4], "projectID": 1, "features": ["MIN", "MEAN"],
+                                         "imputator": "MEAN", "scaler": scaler, "classifier": "SGD",
+                                         "incremental": True}, connection)
+            pipeline = Database([], 0, connection=connection).get_pipeline(model_id)[0]
+            self.assertTrue(all(type(x) is str for x in pipeline.columns))
+            self.assertEqual(len(pipeline.columns), len(pipeline.fill_values))
+        connection.close()
+
+    def test_load_features_streams(self):
+        connection = StandInConnection()
+        connection.insert(*generate_tables(4, 1000, 2, seed=3))
+        database = Database([1, 2, 3, 4], 1, connection=connection)
+        with mock.patch.object(buildModel.FeatureCache, "from_config", return_value=None):
+            features = buildModel.load_features({"features": ["MIN"], "imputator": "MEAN"}, database)[1]
+        self.assertEqual(features.shape[1], 3)
+        # The pipeline bounds memory by its queue only, if the data sets it streams are not collected elsewhere.
+        self.assertListEqual(database.data_sets, [])
+        connection.close()
+
+    def test_continue_training(self):
+        x = pd.DataFrame(np.random.default_rng(0).normal(size=(60, 3)))
+        y = pd.Series([0, 1, 2] * 20)
+        forest = buildModel.choose_classifier("RANDOM_FOREST").set_params(n_estimators=5)
+        forest.fit(x, y)
+        # The new data lacks class 2 and has unlabelled windows, which are left out.
+        buildModel.continue_training(forest, x.iloc[:20], pd.Series([0, 1, -1, 1] * 5), 3)
+        self.assertEqual(len(forest.estimators_), 8)
+        self.assertListEqual(forest.classes_.tolist(), [0, 1, 2])
+        self.assertEqual(forest.predict_proba(x).shape, (60, 3))
+        self.assertRaises(ValueError, buildModel.continue_training, forest, x.iloc[:4], pd.Series([0, 1, 3, 1]))
+
+        sgd = buildModel.choose_classifier("SGD")
+        sgd.fit(x, y)
+        buildModel.continue_training(sgd, x.iloc[:20], pd.Series([0, 1] * 10))
+        self.assertListEqual(sgd.classes_.tolist(), [0, 1, 2])
+        self.assertRaises(ValueError, buildModel.continue_training, DummyClassifier().fit(x, y), x, y)
+
+    def test_select_features(self):
+        rng = np.random.default_rng(0)
+        y = pd.Series(rng.integers(0, 3, 300))
+        x = pd.DataFrame({"a__mean": y + rng.normal(0, 0.1, 300), "a__minimum": rng.normal(size=300),
+                          "b__mean": np.ones(300), "b__minimum": -y + rng.normal(0, 0.5, 300)})
+        self.assertListEqual(buildModel.select_features({"featureSelection": "VARIANCE"}, x, y),
+                             ["a__mean", "a__minimum", "b__minimum"])
+        self.assertListEqual(buildModel.select_features({"featureSelection": "RELEVANCE"}, x, y),
+                             ["a__mean", "b__minimum"])
+        self.assertListEqual(buildModel.select_features({"featureSelection": "RELEVANCE", "selectedFeatures": 1}, x, y),
+                             ["a__mean"])
+        self.assertEqual(len(buildModel.select_features({"featureSelection": "IMPORTANCE", "selectedFeatures": 2}, x,
+                                                        y)), 2)
+        # Nothing passing the threshold keeps everything.
+        self.assertEqual(len(buildModel.select_features({"featureSelection": "VARIANCE", "selectionThreshold": 9}, x,
+                                                        y)), 4)
+
     def test_partition_data(self):
         result = buildModel.partition_data(self.data)
         self.assertEqual(result[0].shape[1] + 1, self.columns)
@@ -0,0 +1,60 @@
+# coding=utf-8
+"""
+This file contains all unit tests for candidates.py
+"""
+import unittest
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from sklearn.dummy import DummyClassifier
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from src.buildModel.candidates import attach, share, train_candidates
+
+
+class CandidatesTest(TestCase):
+
+    def setUp(self) -> None:
+        """
+        Creates features whose labels depend on the first column only.
+        """
+        rng = np.random.default_rng(3)
+        self.x = pd.DataFrame(rng.normal(size=(400, 4)), columns=["a", "b", "c", "d"])
+        self.y = pd.Series((self.x["a"] > 0).astype(int))
+
+    def test_share_attach(self):
+        array = np.arange(12, dtype=np.float32).reshape(3, 4)
+        block, description = share(array)
+        try:
+            attached, copy = attach(description)
+            np.testing.assert_array_equal(copy, array)
+            del copy
+            attached.close()
+        finally:
+            block.close()
+            block.unlink()
+
+    def test_train_candidates(self):
+        results = train_candidates(self.x[:300], self.y[:300], self.x[300:], self.y[300:],
+                                   [{"classifier": "PONY"}, {"classifier": "K_NEIGHBORS", "scaler": "MIN_MAX"}],
+                                   workers=2)
+        self.assertListEqual([x["classifier"] for x in results], ["K_NEIGHBORS", "PONY"])
+        self.assertIsInstance(results[0]["classifierObject"], KNeighborsClassifier)
+        self.assertIsInstance(results[0]["scalerObject"], MinMaxScaler)
+        self.assertIsInstance(results[1]["classifierObject"], DummyClassifier)
+        self.assertIsInstance(results[1]["scalerObject"], StandardScaler)
+        self.assertGreater(results[0]["score"], 0.9)
+        # The models returned are usable on their own.
+        expected = results[0]["classifierObject"].score(
+            pd.DataFrame(results[0]["scalerObject"].transform(self.x[300:]), columns=self.x.columns), self.y[300:])
+        self.assertAlmostEqual(results[0]["score"], expected)
+
+    def test_no_testing_data(self):
+        results = train_candidates(self.x, self.y, self.x[:0], self.y[:0], [{"classifier": "K_NEIGHBORS"}])
+        self.assertTrue(np.isnan(results[0]["score"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+# coding=utf-8
+"""
+This file contains the unit tests for classify.py, run on the data base stand-in of the benchmarks
+"""
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase, mock
+
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+from standin import StandInConnection
+from synthetic import generate_tables
+from src.buildModel import buildModel
+from src.buildModel.instrumentation import Instrumentation
+from src.classify import classify
+from src.database import artifact
+
+
+class ClassifyTest(TestCase):
+
+    def setUp(self):
+        """
+        Fills a stand-in data base with four data sets and builds two models of different features on the first two.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        # The disk caches are switched on, but in a directory of their own, so nothing is left over between runs.
+        self.local_cache("buildModel.featureCache.FeatureCache.from_config",
+                         lambda: buildModel.FeatureCache(os.path.join(self.directory.name, "features"), 2 ** 30))
+        self.local_cache("database.snapshotStore.SnapshotStore.from_config",
+                         lambda: buildModel.SnapshotStore(os.path.join(self.directory.name, "snapshots"), 2 ** 30))
+        self.local_cache("database.artifact._configured_directory",
+                         lambda: (os.path.join(self.directory.name, "artifacts"), 2 ** 30))
+        self.connection = StandInConnection()
+        self.connection.insert(*generate_tables(4, 2000, 3, seed=2, labelled=2))
+        self.models = [buildModel.build({"dataSets": [1, 2], "projectID": 1, "features": features, "imputator": "MEAN",
+                                         "scaler": "STANDARD", "classifier": "RANDOM_FOREST"},
+                                        self.connection, Instrumentation("test"))
+                       for features in (["MIN", "MEAN"], ["MAX", "VARIANCE"])]
+
+    def local_cache(self, target: str, create) -> None:
+        patcher = mock.patch(target, create)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """
+        Closes the stand-in data base.
+        """
+        self.connection.close()
+
+    def test_classify_batch(self):
+        document = classify.classify_batch({"dataSets": [1, 2, 3, 4], "classifiers": self.models}, self.connection,
+                                           Instrumentation("test"))
+        self.assertListEqual(document["dataSets"], [1, 2, 3, 4])
+        self.assertListEqual([x["classifier"] for x in document["results"]], self.models)
+        # Every data set gets what classifying it on its own would give.
+        for result in document["results"]:
+            for data_set in document["dataSets"]:
+                expected = classify.classify({"dataSet": data_set, "classifier": result["classifier"]},
+                                             self.connection, Instrumentation("test"))
+                self.assertListEqual(result["predictions"][str(data_set)], expected)
+
+    def test_legacy_model(self):
+        expected = classify.classify({"dataSet": 3, "classifier": self.models[0]}, self.connection,
+                                     Instrumentation("test"))
+        # Models stored before pipelines existed hold the bare classifier.
+        classifier = buildModel.Database([], 0, connection=self.connection).get_stuff(self.models[0])[0]
+        self.connection.sqlite.execute("UPDATE Classifiers SET Classifier = ? WHERE ID = ?",
+                                       (artifact.dumps(classifier), self.models[0]))
+        pipeline = buildModel.Database([], 0, connection=self.connection).get_pipeline(self.models[0])[0]
+        self.assertIsNone(pipeline.fill_values)
+        self.assertListEqual(classify.classify({"dataSet": 3, "classifier": self.models[0]}, self.connection,
+                                               Instrumentation("test")), expected)
+
+    def test_check_parameters(self):
+        self.assertRaises(IndexError, classify.check_parameters, {"dataSets": [1]})
+        self.assertRaises(IndexError, classify.check_parameters, {"classifiers": [1]})
+        classify.check_parameters({"dataSets": [1], "classifiers": [1]})
+
+
+if __name__ == '__main__':
+    unittest.main()
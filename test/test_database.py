@@ -0,0 +1,137 @@
+# coding=utf-8
+"""
+This file contains the unit tests for database.py that get along without a data base server
+"""
+import sys
+import unittest
+from pathlib import Path
+from unittest import TestCase, mock
+
+import mysql.connector
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+from standin import StandInConnection
+from synthetic import generate_tables
+
+from src.database import artifact
+from src.database.database import Database
+from src.database.modelCache import ModelCache
+
+
+class FakeCursor:
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.prepared = None
+
+    def execute(self, query, params=()):
+        if self.connection.forget:
+            self.connection.forget = False
+            raise mysql.connector.Error(errno=1243)
+        if self.prepared is not query:
+            self.connection.prepared += 1
+            self.prepared = query
+        self.connection.executed.append(params)
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.prepared = 0
+        self.executed = []
+        self.forget = False
+
+    def cursor(self, prepared=False, dictionary=False):
+        return FakeCursor(self)
+
+
+class DatabaseTest(TestCase):
+
+    def setUp(self) -> None:
+        """
+        Creates a Database object on a fake connection.
+        """
+        self.connection = FakeConnection()
+        self.database = Database([4, 2, 7], 0, connection=self.connection)
+
+    def test_in_list(self):
+        self.assertEqual(self.database._in_list(), ("(%s, %s, %s, %s)", (4, 2, 7, 7)))
+        self.assertEqual(self.database._in_list([5]), ("(%s)", (5,)))
+        self.assertEqual(self.database._in_list([5, 6]), ("(%s, %s)", (5, 6)))
+        in_list, params = self.database._in_list(list(range(9)))
+        self.assertEqual(in_list.count("%s"), 16)
+        self.assertEqual(params, tuple(range(9)) + (8,) * 7)
+
+    def test_prepared_once(self):
+        for i in range(3):
+            # Every call builds a new string, but the statement is prepared only once.
+            self.database._execute("SELECT * FROM Classifiers WHERE ID = " + "%s", (i,))
+            Database([1], 0, connection=self.connection)._execute("SELECT * FROM Label WHERE ID = " + "%s", (i,))
+        self.assertEqual(self.connection.prepared, 2)
+        self.assertListEqual(self.connection.executed, [(0,), (0,), (1,), (1,), (2,), (2,)])
+
+    def test_prepared_again(self):
+        self.database._execute("SELECT 1", ())
+        self.connection.forget = True
+        self.database._execute("SELECT 1", ())
+        self.assertEqual(self.connection.prepared, 2)
+        self.assertListEqual(self.connection.executed, [(), ()])
+
+    def test_close(self):
+        self.database.close()
+        self.assertIs(self.database.data_base, self.connection)
+
+    def test_iter_data_sets(self):
+        connection = StandInConnection()
+        connection.insert(*generate_tables(3, 300, 2, seed=1))
+        database = Database([1, 2, 3], 1, connection=connection)
+        self.assertListEqual([ds.id for ds in database.iter_data_sets()], [1, 2, 3])
+        # Streaming holds on to nothing, only get_data_sets collects the data sets.
+        self.assertListEqual(database.data_sets, [])
+        data_sets = database.get_data_sets()
+        self.assertListEqual([ds.id for ds in database.data_sets], [1, 2, 3])
+        self.assertTrue(all(x is y for x, y in zip(database.iter_data_sets(), data_sets)))
+        connection.close()
+
+    def test_labels_of_every_data_set(self):
+        connection = StandInConnection()
+        data_rows, labels = generate_tables(3, 300, 2, seed=1)
+        connection.insert(data_rows, labels)
+        database = Database([1, 2, 3], 1, connection=connection)
+        data_sets = database.get_data_sets()
+        codes = {name: code for code, name in database._labels.items()}
+        # Not only the first data set gets its labels, every one does.
+        for ds in data_sets:
+            expected = np.full(ds.shape[0], -1)
+            for label in (x for x in labels if x["datasetID"] == ds.id):
+                expected[(ds.index >= label["start"]) & (ds.index <= label["end"])] = codes[label["name"].upper()]
+            np.testing.assert_array_equal(ds["label"].to_numpy(), expected)
+            self.assertGreater(np.count_nonzero(expected >= 0), 0)
+        connection.close()
+
+    def test_model_cache_version(self):
+        connection = StandInConnection()
+        connection.sqlite.execute("INSERT INTO Classifiers (Classifier, Scaler, Sensors, LabelsTable, Features) "
+                                  "VALUES (?, ?, '[1]', '{}', '[]')",
+                                  (artifact.dumps("model"), artifact.dumps("scaler")))
+        hashed = []
+        # The blobs must not be hashed to tell whether the cached model is still the stored one.
+        connection.sqlite.create_function("MD5", 1, lambda value: hashed.append(value) or "", deterministic=True)
+        cache = ModelCache(2 ** 20)
+        with mock.patch("database.modelCache.ModelCache.shared", return_value=cache):
+            database = Database([], 0, connection=connection)
+            for misses in (1, 1, 2):
+                if misses == 2:
+                    connection.sqlite.execute("UPDATE Classifiers SET Classifier = ? WHERE ID = 1",
+                                              (artifact.dumps("other model"),))
+                database.get_pipeline(1)
+                self.assertEqual(cache.misses, misses)
+        self.assertEqual(database.get_pipeline(1)[0].classifier, "other model")
+        self.assertFalse(any(isinstance(x, bytes) for x in hashed))
+        connection.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
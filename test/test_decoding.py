@@ -0,0 +1,73 @@
+# coding=utf-8
+"""
+This file contains all unit tests for decoding.py
+"""
+import json
+import unittest
+from unittest import TestCase
+
+import numpy as np
+
+from src.database import decoding
+
+
+class DecodingTest(TestCase):
+
+    def test_decode_data_row(self):
+        times, values = decoding.decode_data_row(json.dumps([{"relativeTime": 3, "value": [1, 2]},
+                                                             {"relativeTime": 1, "value": [3, 4]}]))
+        self.assertListEqual(list(times), [3, 1])
+        self.assertEqual(values.shape, (2, 2))
+        self.assertEqual(values.dtype.kind, "i")
+        times, values = decoding.decode_data_row(json.dumps([{"relativeTime": 0, "value": [1.5]},
+                                                             {"relativeTime": 1, "value": [2]}]))
+        self.assertEqual(values.dtype.kind, "f")
+
+    def test_align_channels(self):
+        result = decoding.align_channels({"a 0": (np.array([0, 2, 4, 2]), np.array([1.0, 2.0, 3.0, 4.0])),
+                                          "b 0": (np.array([0, 1, 2, 3, 4]), np.arange(5))},
+                                         [np.array([7])])
+        self.assertListEqual(list(result.index), [0, 1, 2, 3, 4, 7])
+        self.assertListEqual(list(result.columns), ["a 0", "b 0"])
+        np.testing.assert_array_equal(result["a 0"].to_numpy(), [1.0, np.NaN, 4.0, np.NaN, 3.0, np.NaN])
+        np.testing.assert_array_equal(result["b 0"].to_numpy(), [0, 1, 2, 3, 4, np.NaN])
+
+    def test_align_channels_complete(self):
+        result = decoding.align_channels({"a 0": (np.array([2, 0, 1]), np.array([5, 3, 4]))})
+        self.assertListEqual(list(result.index), [0, 1, 2])
+        self.assertListEqual(list(result["a 0"]), [3, 4, 5])
+        self.assertEqual(result["a 0"].dtype.kind, "i")
+
+    def test_compact(self):
+        times, values = decoding.decode_data_row(json.dumps([{"relativeTime": 0, "value": [1, 2]}]),
+                                                 decoding.COMPACT_DTYPE)
+        self.assertEqual(values.dtype, np.float32)
+        result = decoding.align_channels({"a 0": (np.array([0, 2]), np.array([1, 2], dtype=np.float32)),
+                                          "b 0": (np.array([0, 1]), np.array([3, 4], dtype=np.float32))},
+                                         dtype=decoding.COMPACT_DTYPE)
+        self.assertListEqual(list(result.dtypes), [np.float32, np.float32])
+
+    def test_resample_channels(self):
+        # Two sensors at 10 time units, shifted against each other, would give twice the rows aligned.
+        channels = {"a 0": (np.arange(0, 100, 10), np.arange(10.0)),
+                    "b 0": (np.arange(5, 105, 10), np.arange(10, 20))}
+        self.assertEqual(decoding.infer_interval(channels), 10)
+        self.assertEqual(decoding.align_channels(channels).shape[0], 20)
+        result = decoding.resample_channels(channels)
+        self.assertListEqual(list(result.index), list(range(0, 91, 10)))
+        np.testing.assert_array_equal(result["a 0"].to_numpy(), range(10))
+        np.testing.assert_array_equal(result["b 0"].to_numpy(), [np.NaN] + [x + 0.5 for x in range(10, 19)])
+        result = decoding.resample_channels(channels, "ASOF", 20, decoding.COMPACT_DTYPE)
+        self.assertListEqual(list(result.index), list(range(0, 81, 20)))
+        np.testing.assert_array_equal(result["b 0"].to_numpy(), [np.NaN, 11, 13, 15, 17])
+        self.assertListEqual(list(result.dtypes), [np.float32, np.float32])
+        self.assertRaises(ValueError, decoding.resample_channels, channels, "CUBIC")
+
+    def test_smallest_int_dtype(self):
+        self.assertEqual(decoding.smallest_int_dtype(-1, 127), np.int8)
+        self.assertEqual(decoding.smallest_int_dtype(-1, 128), np.int16)
+        self.assertEqual(decoding.smallest_int_dtype(-1, 2 ** 31), np.int64)
+
+
+if __name__ == "__main__":
+    unittest.main()
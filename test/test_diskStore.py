@@ -0,0 +1,59 @@
+# coding=utf-8
+"""
+This file contains all unit tests for diskStore.py
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import TestCase, mock
+
+from src.database import diskStore
+
+
+class DiskStoreTest(TestCase):
+
+    def setUp(self) -> None:
+        """
+        Creates a directory holding two file entries, a directory entry and a file that is no entry.
+        """
+        self.directory = tempfile.mkdtemp()
+        for name, used in (("a.entry", 2), ("b.entry", 0), ("c.tmp", 0)):
+            with open(os.path.join(self.directory, name), "wb") as file:
+                file.write(b"x" * 100)
+            os.utime(os.path.join(self.directory, name), (used, used))
+        os.mkdir(os.path.join(self.directory, "d.entry"))
+        for name in ("one", "two"):
+            with open(os.path.join(self.directory, "d.entry", name), "wb") as file:
+                file.write(b"x" * 100)
+        os.utime(os.path.join(self.directory, "d.entry"), (1, 1))
+
+    def tearDown(self) -> None:
+        """
+        Removes the directory.
+        """
+        shutil.rmtree(self.directory)
+
+    def test_list_entries(self):
+        entries = sorted(diskStore.list_entries(self.directory, ".entry"))
+        self.assertListEqual([(used, size, os.path.basename(path)) for used, size, path in entries],
+                             [(0, 100, "b.entry"), (1, 200, "d.entry"), (2, 100, "a.entry")])
+
+    def test_evict(self):
+        entries = diskStore.list_entries(self.directory, ".entry")
+        # The least recently used entry is kept when asked to, the next ones go instead.
+        self.assertEqual(diskStore.evict(entries, 100, os.path.join(self.directory, "b.entry")), 2)
+        self.assertListEqual(sorted(os.listdir(self.directory)), ["b.entry", "c.tmp"])
+        self.assertEqual(diskStore.evict(diskStore.list_entries(self.directory, ".entry"), 100), 0)
+
+    def test_configured(self):
+        values = {"directory": "", "max_size_mb": "1.5"}
+        with mock.patch("config.configReader.ConfigReader.get_value", lambda _, section, key: values[key]):
+            self.assertEqual(diskStore.configured("STORE", "store"),
+                             (os.path.join(tempfile.gettempdir(), "store"), 3 * 2 ** 19))
+            values.update(directory=self.directory, max_size_mb="0")
+            self.assertEqual(diskStore.configured("STORE", "store"), (self.directory, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
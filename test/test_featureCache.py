@@ -0,0 +1,71 @@
+# coding=utf-8
+"""
+This file contains all unit tests for featureCache.py
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from src.buildModel.featureCache import FeatureCache
+
+
+class FeatureCacheTest(TestCase):
+
+    def test_make_key(self):
+        key = FeatureCache.make_key("abc", features=["mean"], slidingWindowSize=128)
+        self.assertEqual(key, FeatureCache.make_key("abc", slidingWindowSize=128, features=["mean"]))
+        self.assertNotEqual(key, FeatureCache.make_key("abd", features=["mean"], slidingWindowSize=128))
+        self.assertNotEqual(key, FeatureCache.make_key("abc", features=["mean"], slidingWindowSize=64))
+
+    def test_put_get(self):
+        self.assertIsNone(self.cache.get("missing"))
+        self.cache.put("entry", self.features, [1, 2, 1])
+        features, labels = self.cache.get("entry")
+        pd.testing.assert_frame_equal(features, self.features)
+        self.assertListEqual(labels, [1, 2, 1])
+        self.assertTrue(all(type(x) is str for x in features.columns))
+        self.assertListEqual(list(StandardScaler().fit(features).feature_names_in_), ["a__mean", "b__mean"])
+        self.cache.put("empty", None, [])
+        self.assertEqual(self.cache.get("empty"), (None, []))
+        statistics = self.cache.statistics()
+        self.assertEqual(statistics["hits"], 2)
+        self.assertEqual(statistics["misses"], 1)
+        self.assertEqual(statistics["entries"], 2)
+
+    def test_eviction(self):
+        self.cache.put("first", self.features, [1, 2, 1])
+        self.cache.max_size = os.path.getsize(os.path.join(self.directory, "first.npz")) * 2
+        self.cache.put("second", self.features, [1, 2, 1])
+        os.utime(os.path.join(self.directory, "first.npz"), (0, 0))
+        os.utime(os.path.join(self.directory, "second.npz"), (1, 1))
+        self.assertIsNotNone(self.cache.get("first"))
+        self.cache.put("third", self.features, [1, 2, 1])
+        self.assertIsNone(self.cache.get("second"))
+        self.assertIsNotNone(self.cache.get("first"))
+        self.assertIsNotNone(self.cache.get("third"))
+        self.assertEqual(self.cache.statistics()["evictions"], 1)
+
+    def setUp(self) -> None:
+        """
+        Creates a feature cache in a temporary directory.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.cache = FeatureCache(self.directory, 2 ** 20)
+        self.features = pd.DataFrame(np.arange(6.0).reshape(3, 2), columns=["a__mean", "b__mean"], index=[1, 2, 3])
+
+    def tearDown(self) -> None:
+        """
+        Removes the temporary directory.
+        """
+        shutil.rmtree(self.directory)
+        del self.cache, self.features
+
+
+if __name__ == "__main__":
+    unittest.main()
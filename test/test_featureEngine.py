@@ -0,0 +1,106 @@
+# coding=utf-8
+"""
+This file contains all unit tests for featureEngine.py
+"""
+import unittest
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+import tsfresh
+from tsfresh.feature_extraction import ComprehensiveFCParameters
+
+from src.buildModel import featureEngine
+
+
+class FeatureEngineTest(TestCase):
+
+    def test_supports(self):
+        self.assertTrue(featureEngine.supports(["minimum", "ar_coefficient"]))
+        self.assertTrue(featureEngine.supports([]))
+        self.assertFalse(featureEngine.supports(["minimum", "sample_entropy"]))
+
+    def test_feature_names(self):
+        result = featureEngine.feature_names(["mean", "ar_coefficient"], ["a", "b"])
+        self.assertEqual(len(result), 2 * 12)
+        self.assertEqual(result[0], "a__mean")
+        self.assertEqual(result[1], "a__ar_coefficient__coeff_0__k_10")
+        self.assertEqual(result[12], "b__mean")
+
+    def test_split_column(self):
+        self.assertTupleEqual(featureEngine.split_column("a 0__quantile__q_0.1"), ("a 0", "quantile"))
+        self.assertTupleEqual(featureEngine.split_column("a__minimum__mean"), ("a__minimum", "mean"))
+        self.assertRaises(ValueError, featureEngine.split_column, "a__sample_entropy")
+        self.assertListEqual(featureEngine.feature_kinds(["a__mean", "b__ar_coefficient__coeff_0__k_10", "b__mean"]),
+                             ["mean", "ar_coefficient"])
+        self.assertFalse(featureEngine.is_columns(["mean"]))
+
+    def test_majority_labels(self):
+        labels = np.array([1, 1, 2, 2, 2, 3, 3, 1, 3, 3])
+        result = featureEngine.majority_labels(labels, 4, 2)
+        self.assertListEqual(list(result), [1, 2, 3, 3])
+        windows = featureEngine.slide(np.arange(20.0).reshape(10, 2), 4, 2)
+        self.assertEqual(windows.shape, (4, 4, 2))
+        self.assertListEqual(list(windows[1, :, 1]), [5.0, 7.0, 9.0, 11.0])
+
+    def test_extract_matches_tsfresh(self):
+        result = featureEngine.extract(self.features, self.windows)
+        expected = self._tsfresh(self.windows)
+        self.assertListEqual(list(result.columns), list(expected.columns))
+        self.assertListEqual(list(result.index), list(expected.index))
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-6, atol=1e-9)
+
+    def test_extract_corner_cases(self):
+        windows = [pd.DataFrame(np.ones((32, 6)), columns=self.data.columns), self.data.iloc[:15], self.data.iloc[:3]]
+        result = featureEngine.extract(self.features, windows)
+        expected = self._tsfresh(windows)
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-6, atol=1e-9)
+
+    def test_extract_blocks(self):
+        block = featureEngine.WindowBlock(np.stack([x.to_numpy() for x in self.windows]), list(self.data.columns))
+        result = featureEngine.extract(self.features, [block])
+        expected = featureEngine.extract(self.features, self.windows)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_extract_columns(self):
+        expected = featureEngine.extract(self.features, self.windows)
+        columns = list(expected.columns[::7])
+        result = featureEngine.extract(columns, self.windows)
+        self.assertListEqual(list(result.columns), columns)
+        np.testing.assert_allclose(result.to_numpy(), expected[columns].to_numpy(), rtol=1e-12, equal_nan=True)
+        self.assertRaises(ValueError, featureEngine.extract, ["unknown 0__mean"], self.windows)
+
+    def test_extract_compact(self):
+        windows = [x.astype(np.float32) for x in self.windows]
+        result = featureEngine.extract(self.features, windows)
+        self.assertTrue((result.dtypes == np.float32).all())
+        expected = featureEngine.extract(self.features, self.windows)
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-3, atol=1e-4)
+
+    def _tsfresh(self, windows: list[pd.DataFrame]) -> pd.DataFrame:
+        settings = {key: ComprehensiveFCParameters()[key] for key in self.features}
+        results = []
+        for i, x in enumerate(windows):
+            block = x.copy()
+            block["id"] = i + 1
+            results.append(tsfresh.extract_features(block, column_id="id", default_fc_parameters=settings,
+                                                    disable_progressbar=True, n_jobs=0))
+        return pd.concat(results)
+
+    def setUp(self) -> None:
+        """
+        Prepares some windows out of the test data.
+        """
+        self.data = pd.read_csv("exp12_user06.csv").iloc[:, :-1]
+        self.windows = [self.data.iloc[i:i + 64] for i in range(0, 64 * 8, 32)]
+        self.features = list(featureEngine.FEATURE_PARAMETERS)
+
+    def tearDown(self) -> None:
+        """
+        Clears up all resources.
+        """
+        del self.data, self.windows, self.features
+
+
+if __name__ == "__main__":
+    unittest.main()
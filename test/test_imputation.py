@@ -0,0 +1,84 @@
+# coding=utf-8
+"""
+This file contains all unit tests for imputation.py
+"""
+import tracemalloc
+import unittest
+from unittest import TestCase
+
+import numpy as np
+from pandas import DataFrame
+from sklearn.base import clone
+
+from src.buildModel import buildModel
+from src.buildModel.imputation import ForwardFillImputator, LinearImputator, MeanImputator
+
+
+class ImputationTest(TestCase):
+
+    def setUp(self):
+        """
+        Creates data with a gap at the start, one in the middle, an infinite value and a column without any value.
+        """
+        self.values = np.array([[np.nan, 1, np.nan],
+                                [2, np.inf, np.nan],
+                                [np.nan, 3, np.nan],
+                                [6, -np.inf, np.nan]])
+
+    def test_mean(self):
+        values = self.values.copy()
+        self.assertEqual(MeanImputator().impute_in_place(values), 8)
+        np.testing.assert_array_equal(values, [[4, 1, 0], [2, 2, 0], [4, 3, 0], [6, 2, 0]])
+
+    def test_forward_fill(self):
+        values = self.values.copy()
+        ForwardFillImputator().impute_in_place(values)
+        np.testing.assert_array_equal(values, [[2, 1, 0], [2, 1, 0], [2, 3, 0], [6, 3, 0]])
+
+    def test_linear(self):
+        values = self.values.copy()
+        LinearImputator().impute_in_place(values)
+        np.testing.assert_array_equal(values, [[2, 1, 0], [2, 2, 0], [4, 3, 0], [6, 3, 0]])
+        # Rows not equally spaced in time are interpolated by their times.
+        values = self.values.copy()
+        LinearImputator().impute_in_place(values, np.array([0, 10, 40, 50]))
+        np.testing.assert_array_equal(values[:, 0], [2, 2, 5, 6])
+
+    def test_float32(self):
+        values = self.values.astype(np.float32)
+        MeanImputator().impute_in_place(values)
+        self.assertEqual(values.dtype, np.float32)
+        self.assertEqual(values[0, 0], 4)
+
+    def test_sklearn_interface(self):
+        imputator = clone(LinearImputator())
+        result = imputator.fit(self.values).transform(self.values)
+        self.assertEqual(np.count_nonzero(np.isnan(self.values)), 6)
+        self.assertTrue(np.isfinite(result).all())
+        self.assertEqual(repr(MeanImputator()), "MeanImputator()")
+
+    def test_impute_in_place(self):
+        data = DataFrame(self.values.copy(), columns=["a", "b", "c"])
+        self.assertIs(buildModel.impute(data, MeanImputator()), data)
+        self.assertTrue(np.isfinite(data.to_numpy()).all())
+        # Frames of mixed types are imputed on a copy.
+        data = DataFrame(self.values.copy(), columns=["a", "b", "c"]).astype({"a": np.float32})
+        result = buildModel.impute(data, ForwardFillImputator())
+        self.assertTrue(np.isfinite(result.to_numpy()).all())
+        self.assertTrue(np.isnan(data["a"].iloc[0]))
+
+    def test_memory(self):
+        values = np.random.default_rng(0).normal(size=(100000, 8))
+        values[::7, :] = np.nan
+        for imputator in (MeanImputator(), ForwardFillImputator(), LinearImputator()):
+            data = values.copy()
+            tracemalloc.start()
+            imputator.impute_in_place(data)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            # The gap mask is an eighth of the data here, a column of positions another eighth, the rest is per gap.
+            self.assertLess(peak, 0.35 * data.nbytes, type(imputator).__name__)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+# coding=utf-8
+"""
+This file contains all unit tests for instrumentation.py
+"""
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import TestCase
+
+from src.buildModel.instrumentation import Instrumentation
+
+
+class InstrumentationTest(TestCase):
+
+    def test_stage(self):
+        instrumentation = Instrumentation("test")
+        for _ in range(2):
+            with instrumentation.stage("load", rows=10) as record:
+                record["windows"] = 3
+                time.sleep(0.01)
+        stages = instrumentation.summary()["stages"]
+        self.assertEqual(len(stages), 1)
+        self.assertEqual(stages[0]["stage"], "load")
+        self.assertEqual(stages[0]["calls"], 2)
+        self.assertEqual(stages[0]["rows"], 20)
+        self.assertEqual(stages[0]["windows"], 6)
+        self.assertGreaterEqual(stages[0]["wallSeconds"], 0.02)
+        self.assertIn("cpuSeconds", stages[0])
+        self.assertIn("peakRssDeltaMb", stages[0])
+
+    def test_order(self):
+        instrumentation = Instrumentation("test")
+        with instrumentation.stage("outer"):
+            with instrumentation.stage("inner"):
+                pass
+        self.assertListEqual([x["stage"] for x in instrumentation.summary()["stages"]], ["outer", "inner"])
+
+    def test_accumulate(self):
+        instrumentation = Instrumentation("test")
+
+        def work():
+            with instrumentation.accumulate("extract", windows=5):
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stage = instrumentation.summary()["stages"][0]
+        self.assertEqual(stage["calls"], 4)
+        self.assertEqual(stage["windows"], 20)
+        self.assertGreaterEqual(stage["wallSeconds"], 0.04)
+
+    def test_iterate(self):
+        instrumentation = Instrumentation("test")
+        items = list(instrumentation.iterate("load", iter([[1, 2], [3]]), lambda x: {"rows": len(x)}))
+        self.assertListEqual(items, [[1, 2], [3]])
+        stage = instrumentation.summary()["stages"][0]
+        self.assertEqual(stage["calls"], 2)
+        self.assertEqual(stage["rows"], 3)
+
+    def test_report(self):
+        stream = io.StringIO()
+        instrumentation = Instrumentation("test", emit=True, stream=stream)
+        with instrumentation.stage("load"):
+            pass
+        instrumentation.report()
+        lines = [json.loads(x) for x in stream.getvalue().splitlines()]
+        self.assertListEqual([(x["job"], x["stage"]) for x in lines], [("test", "load"), ("test", "total")])
+        # Nothing is written, unless switched on.
+        stream = io.StringIO()
+        Instrumentation("test", stream=stream).report()
+        self.assertEqual(stream.getvalue(), "")
+
+    def test_profile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            instrumentation = Instrumentation("test", profile=["train"], profile_directory=directory)
+            with instrumentation.stage("train"):
+                sum(i * i for i in range(1000))
+            with instrumentation.stage("load"):
+                pass
+            instrumentation.report()
+            self.assertListEqual(os.listdir(directory), ["test-train-%d.prof" % os.getpid()])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+# coding=utf-8
+"""
+This file contains all unit tests for modelCache.py
+"""
+import unittest
+from unittest import TestCase
+
+from src.database.modelCache import ModelCache
+
+
+class ModelCacheTest(TestCase):
+
+    def setUp(self) -> None:
+        """
+        Creates a small cache.
+        """
+        self.cache = ModelCache(100)
+
+    def test_get_put(self):
+        self.assertIsNone(self.cache.get(1, "a"))
+        self.cache.put(1, "a", ("classifier", "scaler"), 10)
+        self.assertEqual(self.cache.get(1, "a"), ("classifier", "scaler"))
+        statistics = self.cache.statistics()
+        self.assertEqual(statistics["hits"], 1)
+        self.assertEqual(statistics["misses"], 1)
+        self.assertEqual(statistics["entries"], 1)
+        self.assertEqual(statistics["size"], 10)
+
+    def test_version_changed(self):
+        self.cache.put(1, "a", "old", 10)
+        self.assertIsNone(self.cache.get(1, "b"))
+        # The outdated entry is gone for good.
+        self.assertIsNone(self.cache.get(1, "a"))
+        self.assertEqual(self.cache.statistics()["size"], 0)
+
+    def test_eviction(self):
+        self.cache.put(1, "a", "first", 40)
+        self.cache.put(2, "a", "second", 40)
+        self.assertEqual(self.cache.get(1, "a"), "first")
+        self.cache.put(3, "a", "third", 40)
+        # The second entry has been used least recently.
+        self.assertIsNone(self.cache.get(2, "a"))
+        self.assertEqual(self.cache.get(1, "a"), "first")
+        self.assertEqual(self.cache.get(3, "a"), "third")
+        self.assertEqual(self.cache.statistics()["evictions"], 1)
+        self.assertEqual(self.cache.statistics()["size"], 80)
+
+    def test_too_large(self):
+        self.cache.put(1, "a", "huge", 101)
+        self.assertIsNone(self.cache.get(1, "a"))
+        self.cache.put(2, "a", "fitting", 100)
+        self.cache.put(2, "b", "replaced", 50)
+        self.assertEqual(self.cache.get(2, "b"), "replaced")
+        self.assertEqual(self.cache.statistics()["size"], 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
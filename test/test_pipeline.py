@@ -0,0 +1,75 @@
+# coding=utf-8
+"""
+This file contains all unit tests for pipeline.py
+"""
+import unittest
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from src.buildModel.pipeline import InferencePipeline, column_means
+
+
+class InferencePipelineTest(TestCase):
+
+    def setUp(self):
+        """
+        Trains a scaler and a classifier on the mean and the minimum of two channels, with the columns not in the order
+        the feature engine computes them.
+        """
+        rng = np.random.default_rng(0)
+        self.windows = [pd.DataFrame(rng.normal(loc=i % 2, size=(32, 2)), columns=["a 0", "b 0"]) for i in range(40)]
+        self.columns = ["b 0__minimum", "a 0__mean", "a 0__minimum"]
+        self.training_data = pd.DataFrame([[w["b 0"].min(), w["a 0"].mean(), w["a 0"].min()] for w in self.windows],
+                                          columns=self.columns)
+        self.labels = [i % 2 for i in range(40)]
+        self.scaler = StandardScaler().fit(self.training_data)
+        self.classifier = LogisticRegression().fit(pd.DataFrame(self.scaler.transform(self.training_data),
+                                                                columns=self.columns), self.labels)
+
+    def test_compile(self):
+        pipeline = InferencePipeline.compile(self.classifier, self.scaler, self.training_data)
+        self.assertListEqual(pipeline.columns, self.columns)
+        np.testing.assert_allclose(pipeline.fill_values, self.training_data.mean().to_numpy())
+        self.assertListEqual(pipeline.channels(), ["b 0", "a 0"])
+
+    def test_predict(self):
+        pipeline = InferencePipeline.compile(self.classifier, self.scaler, self.training_data)
+        np.testing.assert_allclose(pipeline.compute(self.windows), self.training_data.to_numpy())
+        np.testing.assert_array_equal(pipeline.predict(self.windows), self.labels)
+
+    def test_fill(self):
+        pipeline = InferencePipeline.compile(self.classifier, self.scaler, self.training_data)
+        features = self.training_data.to_numpy(copy=True)[:4]
+        features[0, 1], features[2, 0] = np.nan, np.inf
+        expected = features.copy()
+        expected[0, 1], expected[2, 0] = pipeline.fill_values[1], pipeline.fill_values[0]
+        prediction = pipeline.predict_features(features)
+        np.testing.assert_array_equal(features, expected)
+        np.testing.assert_array_equal(prediction, self.classifier.predict(
+            pd.DataFrame(self.scaler.transform(pd.DataFrame(expected, columns=self.columns)), columns=self.columns)))
+
+    def test_from_parts(self):
+        # Models stored before pipelines fill gaps with zero.
+        pipeline = InferencePipeline.from_parts(self.classifier, self.scaler, ["minimum", "mean"])
+        self.assertListEqual(pipeline.columns, self.columns)
+        self.assertIsNone(pipeline.fill_values)
+        features = np.full((1, 3), np.nan)
+        pipeline.predict_features(features)
+        np.testing.assert_array_equal(features, 0)
+        # Scalers fitted without names leave the columns to the channels of the data.
+        scaler = StandardScaler().fit(self.training_data.to_numpy())
+        pipeline = InferencePipeline.from_parts(self.classifier, scaler, ["minimum", "mean"])
+        self.assertIsNone(pipeline.columns)
+        self.assertListEqual(pipeline.columns_for(["a 0"]), ["a 0__minimum", "a 0__mean"])
+
+    def test_column_means(self):
+        data = pd.DataFrame({"a": [1.0, np.nan, 3.0], "b": [np.inf, np.nan, np.nan]})
+        np.testing.assert_array_equal(column_means(data), [2, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
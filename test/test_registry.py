@@ -0,0 +1,44 @@
+# coding=utf-8
+"""
+This file contains all unit tests for registry.py
+"""
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+from sklearn.dummy import DummyClassifier
+from sklearn.preprocessing import MinMaxScaler
+
+from src.buildModel.registry import CLASSIFIERS, IMPUTATORS, Registry, SCALERS
+
+
+class RegistryTest(TestCase):
+
+    def test_create(self):
+        self.assertIsInstance(SCALERS.create("MIN_MAX"), MinMaxScaler)
+        self.assertIsInstance(CLASSIFIERS.create("PONY"), DummyClassifier)
+        self.assertEqual(CLASSIFIERS.create("K_NEIGHBORS", n_neighbors=3).n_neighbors, 3)
+        self.assertTrue(hasattr(CLASSIFIERS.create("NAIVE_BAYES"), "partial_fit"))
+        self.assertEqual(type(IMPUTATORS.create("FORWARD_FILL")).__name__, "ForwardFillImputator")
+        # Every call creates a new object.
+        self.assertIsNot(SCALERS.create("MIN_MAX"), SCALERS.create("MIN_MAX"))
+
+    def test_register(self):
+        registry = Registry(("sklearn.dummy", "DummyClassifier"))
+        self.assertListEqual(registry.names(), [])
+        registry.register("SCALER", "sklearn.preprocessing", "MinMaxScaler")
+        self.assertListEqual(registry.names(), ["SCALER"])
+        self.assertIs(registry.load("SCALER"), MinMaxScaler)
+
+    def test_entry_points_import_lazily(self):
+        source = str(Path(__file__).parent.parent / "src")
+        code = "import sys; sys.path.insert(0, %r); import classify.classify; " \
+               "print([m for m in ('tsfresh', 'sklearn.ensemble', 'sklearn.svm') if m in sys.modules])" % source
+        output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+        self.assertEqual(output.strip(), "[]")
+
+
+if __name__ == '__main__':
+    unittest.main()
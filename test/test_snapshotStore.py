@@ -0,0 +1,104 @@
+# coding=utf-8
+"""
+This file contains all unit tests for snapshotStore.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+from standin import StandInConnection
+from synthetic import generate_tables
+
+from src.database.database import Database
+from src.database.snapshotStore import SnapshotStore
+
+
+class SnapshotStoreTest(TestCase):
+
+    def test_put_get(self):
+        self.assertIsNone(self.store.get(3, "abc"))
+        self.store.put(self.data_set, "abc")
+        ds = self.store.get(3, "abc")
+        pd.testing.assert_frame_equal(ds, self.data_set)
+        self.assertEqual(ds.id, 3)
+        # The values are mapped read-only, not copied.
+        self.assertFalse(ds.to_numpy().flags.writeable)
+        self.assertTrue(np.may_share_memory(ds.to_numpy(), ds.iloc[:, 0].to_numpy()))
+        statistics = self.store.statistics()
+        self.assertEqual((statistics["hits"], statistics["misses"], statistics["entries"]), (1, 1, 1))
+
+    def test_mixed_types(self):
+        self.data_set["b 0"] = self.data_set["b 0"].astype(np.float32)
+        self.store.put(self.data_set, "abc")
+        pd.testing.assert_frame_equal(self.store.get(3, "abc"), self.data_set)
+
+    def test_outdated(self):
+        self.store.put(self.data_set, "abc")
+        self.assertIsNone(self.store.get(3, "abd"))
+        self.assertIsNone(self.store.get(3, "abc", resample="LINEAR"))
+        changed = self.data_set * 2
+        changed.id = 3
+        self.store.put(changed, "abd")
+        pd.testing.assert_frame_equal(self.store.get(3, "abd"), changed)
+        self.assertEqual(self.store.statistics()["entries"], 1)
+
+    def test_eviction(self):
+        self.store.put(self.data_set, "abc")
+        self.store.max_size = self.store.statistics()["size"] * 2
+        self.data_set.id = 4
+        self.store.put(self.data_set, "abc")
+        for name, used in zip(sorted(os.listdir(self.directory)), (0, 1)):
+            os.utime(os.path.join(self.directory, name), (used, used))
+        self.assertIsNotNone(self.store.get(3, "abc"))
+        self.data_set.id = 5
+        self.store.put(self.data_set, "abc")
+        self.assertIsNone(self.store.get(4, "abc"))
+        self.assertIsNotNone(self.store.get(3, "abc"))
+        self.assertIsNotNone(self.store.get(5, "abc"))
+        self.assertEqual(self.store.statistics()["evictions"], 1)
+
+    def test_database(self):
+        connection = StandInConnection()
+        connection.insert(*generate_tables(3, 500, 2, seed=1))
+        expected = Database([1, 2, 3], 1, connection=connection).get_data_sets()
+        for hits in (0, 3):
+            database = Database([1, 2, 3], 1, connection=connection, snapshots=self.store)
+            data_sets = database.get_data_sets()
+            self.assertEqual(self.store.hits, hits)
+            self.assertListEqual([ds.id for ds in data_sets], [1, 2, 3])
+            for ds, other in zip(data_sets, expected):
+                pd.testing.assert_frame_equal(ds, other)
+        # Changed data rows are fetched again.
+        connection.sqlite.execute("UPDATE Datarow SET name = 'other' WHERE datasetID = 2")
+        data_sets = Database([1, 2, 3], 1, connection=connection, snapshots=self.store).get_data_sets()
+        self.assertEqual(self.store.hits, 5)
+        self.assertTrue(data_sets[1].columns[0].startswith("other"))
+
+    def setUp(self) -> None:
+        """
+        Creates a snapshot store in a temporary directory and a data set to store.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.store = SnapshotStore(self.directory, 2 ** 24)
+        self.data_set = pd.DataFrame(np.arange(12.0).reshape(4, 3), columns=["a 0", "a 1", "b 0"],
+                                     index=[0, 10, 20, 35])
+        self.data_set.id = 3
+
+    def tearDown(self) -> None:
+        """
+        Deletes the temporary directory.
+        """
+        shutil.rmtree(self.directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+# coding=utf-8
+"""
+This file contains all unit tests for streaming.py
+"""
+import unittest
+from unittest import TestCase
+
+import numpy as np
+
+from src.buildModel import featureEngine
+from src.classify.streaming import StreamingFeatures
+
+
+class StreamingFeaturesTest(TestCase):
+
+    def setUp(self) -> None:
+        """
+        Creates a recording with an offset far from zero and a constant stretch on one channel.
+        """
+        self.features = list(featureEngine.FEATURE_PARAMETERS)
+        self.data = np.random.default_rng(4).normal(500, 2, (1200, 2))
+        self.data[300:700, 1] = 3.0
+
+    def stream(self, data: np.ndarray, size: int, step: int) -> tuple[np.ndarray, list[tuple[float, float]]]:
+        stream = StreamingFeatures(self.features, data.shape[1], size, step)
+        rows, times = [], []
+        for i, sample in enumerate(data):
+            window = stream.push(float(i), sample)
+            if window is not None:
+                rows.append(window.features)
+                times.append((window.start, window.end))
+        return np.array(rows), times
+
+    def test_same_as_feature_engine(self):
+        for size, step in [(128, 64), (40, 7), (16, 16)]:
+            rows, times = self.stream(self.data, size, step)
+            expected = featureEngine.compute(self.features, featureEngine.slide(self.data, size, step))
+            self.assertEqual(rows.shape, expected.shape)
+            np.testing.assert_allclose(rows, expected, rtol=1e-4, atol=1e-8)
+            self.assertListEqual(times, [(float(i), float(i + size - 1)) for i in range(0, 1200 - size + 1, step)])
+
+    def test_missing_values(self):
+        data = self.data[:300].copy()
+        data[100, 0] = np.NaN
+        rows, _ = self.stream(data, 128, 64)
+        data[100, 0] = data[99, 0]
+        np.testing.assert_allclose(rows, featureEngine.compute(self.features, featureEngine.slide(data, 128, 64)),
+                                   rtol=1e-4, atol=1e-8)
+
+    def test_illegal_values(self):
+        self.assertRaises(ValueError, StreamingFeatures, ["unknown"], 1)
+        self.assertRaises(ValueError, StreamingFeatures, self.features, 1, 16, 17)
+        self.assertRaises(ValueError, StreamingFeatures, self.features, 1, 0, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
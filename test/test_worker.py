@@ -0,0 +1,80 @@
+# coding=utf-8
+"""
+This file contains all unit tests for worker.py
+"""
+import io
+import json
+import unittest
+from unittest import TestCase
+
+from src.worker import worker
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = False
+
+    def ping(self, reconnect=False, attempts=1):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class WorkerTest(TestCase):
+
+    def setUp(self) -> None:
+        """
+        Replaces the scripts by ones that need no data base, and gives the worker a connection to keep.
+        """
+        self.scripts = dict(worker.SCRIPTS)
+        worker.SCRIPTS["echo"] = lambda params, connection: [str(params["value"]), str(id(connection))]
+        worker.SCRIPTS["fail"] = lambda params, connection: [][1]
+        self.connection = FakeConnection()
+        self.worker = worker.Worker()
+        self.worker.connection = self.connection
+
+    def tearDown(self) -> None:
+        """
+        Restores the original scripts.
+        """
+        worker.SCRIPTS.clear()
+        worker.SCRIPTS.update(self.scripts)
+
+    def test_run(self):
+        result = self.worker.run({"script": "echo", "requestID": 5, "value": 3})
+        self.assertDictEqual(result, {"requestID": 5, "exitCode": 0, "output": ["3", str(id(self.connection))]})
+        # The connection is kept for the next job.
+        result = self.worker.run({"script": "echo", "value": 4})
+        self.assertDictEqual(result, {"requestID": None, "exitCode": 0, "output": ["4", str(id(self.connection))]})
+        self.assertFalse(self.connection.closed)
+
+    def test_run_failing(self):
+        result = self.worker.run({"script": "fail", "requestID": "a"})
+        self.assertEqual(result["requestID"], "a")
+        self.assertEqual(result["exitCode"], 1)
+        self.assertEqual(result["output"][-1], "IndexError: list index out of range")
+        # A failed job does not leave its connection to the next one.
+        self.assertTrue(self.connection.closed)
+        self.assertIsNone(self.worker.connection)
+
+    def test_run_unknown_script(self):
+        self.worker.connection = None
+        result = self.worker.run({"script": "unknown"})
+        self.assertEqual(result["exitCode"], 1)
+
+    def test_serve(self):
+        reader = io.StringIO("\n".join([json.dumps({"script": "echo", "requestID": 1, "value": "x"}), "",
+                                        "no json", "[1, 2]", json.dumps({"script": "echo", "value": 2})]) + "\n")
+        writer = io.StringIO()
+        self.worker.serve(reader, writer)
+        results = [json.loads(x) for x in writer.getvalue().splitlines()]
+        self.assertEqual(len(results), 4)
+        self.assertListEqual([x["exitCode"] for x in results], [0, 1, 1, 0])
+        self.assertListEqual(results[0]["output"], ["x", str(id(self.connection))])
+        self.assertListEqual(results[3]["output"], ["2", str(id(self.connection))])
+
+
+if __name__ == '__main__':
+    unittest.main()